@@ -44,3 +44,39 @@ class Profiler():
         print("%30s: %7.2f   percent: %3.0f" % (n, ms*1000.0, ms/self.tot*100))
     print("Iter clock: %2.6f   TOTAL: %2.2f" % (self.tot/self.iter, self.tot))
 
+
+
+class StartupTimer():
+  """Wall time breakdown of a sequence of startup stages."""
+  def __init__(self, start_time=None):
+    self.start_time = time.time() if start_time is None else start_time
+    self.last_time = self.start_time
+    self.stages = {}
+    self.substages = {}
+
+  def stage(self, name):
+    # time since the previous stage ended is attributed to this one
+    tt = time.time()
+    self.stages[name] = tt - self.last_time
+    self.last_time = tt
+
+  def substage(self, stage, name, dt):
+    self.substages.setdefault(stage, {})[name] = dt
+
+  def total(self):
+    return self.last_time - self.start_time
+
+  def as_dict(self):
+    return {
+      'total': self.total(),
+      'stages': dict(self.stages),
+      'substages': {k: dict(v) for k, v in self.substages.items()},
+    }
+
+  def display(self):
+    print("******* Startup timing *******")
+    for n, dt in self.stages.items():
+      print("%30s: %7.2f ms" % (n, dt*1000.0))
+      for sn, sdt in sorted(self.substages.get(n, {}).items(), key=lambda x: -x[1]):
+        print("%30s  %7.2f ms" % ("- " + sn, sdt*1000.0))
+    print("TOTAL: %2.2f s" % self.total())
@@ -1,6 +1,8 @@
 """Utilities for reading real time clocks and keeping soft real time constraints."""
 import os
+import mmap
 import time
+import struct
 import platform
 import subprocess
 import multiprocessing
@@ -15,6 +17,11 @@ DT_MDL = 0.05  # model
 DT_DMON = 0.1  # driver monitoring
 DT_TRML = 0.5  # thermald and manager
 
+# loop stats published by the first Ratekeeper of each process started by manager,
+# read by proctelemd. manager and proctelemd remove them once the process is gone
+RATEKEEPER_STATS_PATH = "/dev/shm/ratekeeper_%d"
+RATEKEEPER_STATS = struct.Struct("<QQdd")  # frames, lagged frames, total lag [s], last lag [s]
+
 
 ffi = FFI()
 ffi.cdef("long syscall(long number, ...);")
@@ -36,6 +43,40 @@ def set_realtime_priority(level):
   return subprocess.call(['chrt', '-f', '-p', str(level), str(tid)])
 
 
+class RatekeeperStats():
+  _owner_pid = None
+
+  def __init__(self):
+    self.buf = None
+    self.lagged_frames = 0
+    self.total_lag = 0.
+
+    # only one Ratekeeper per process publishes its stats, and only under manager
+    pid = os.getpid()
+    if RatekeeperStats._owner_pid == pid or os.getenv("MANAGER_PID") is None:
+      return
+
+    try:
+      fd = os.open(RATEKEEPER_STATS_PATH % pid, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o666)
+      try:
+        os.ftruncate(fd, RATEKEEPER_STATS.size)
+        self.buf = mmap.mmap(fd, RATEKEEPER_STATS.size)
+      finally:
+        os.close(fd)
+      RatekeeperStats._owner_pid = pid
+    except OSError:
+      self.buf = None
+
+  def update(self, frame, remaining):
+    if self.buf is None:
+      return
+    lag = max(0., -remaining)
+    if lag > 0.:
+      self.lagged_frames += 1
+      self.total_lag += lag
+    RATEKEEPER_STATS.pack_into(self.buf, 0, frame, self.lagged_frames, self.total_lag, lag)
+
+
 class Ratekeeper():
   def __init__(self, rate, print_delay_threshold=0.):
     """Rate in Hz for ratekeeping. print_delay_threshold must be nonnegative."""
@@ -45,6 +86,7 @@ class Ratekeeper():
     self._frame = 0
     self._remaining = 0
     self._process_name = multiprocessing.current_process().name
+    self._stats = RatekeeperStats()
 
   @property
   def frame(self):
@@ -71,4 +113,5 @@ class Ratekeeper():
       lagged = True
     self._frame += 1
     self._remaining = remaining
+    self._stats.update(self._frame, remaining)
     return lagged
@@ -19,13 +19,33 @@ unsigned int pedal_checksum(uint64_t d, int l);
 uint64_t read_u64_be(const uint8_t* v);
 uint64_t read_u64_le(const uint8_t* v);
 
+// a signal lowered to the shift, mask and scale that decode it
+struct SignalDecode {
+  uint64_t mask;
+  uint64_t sign;  // sign bit, 0 for unsigned signals
+  double factor, offset;
+  uint8_t shift;
+  bool is_little_endian;
+};
+
+// where the value of a parsed signal is kept in CANParser::values
+struct SignalSlot {
+  uint32_t address;
+  const char* name;
+  size_t index;
+};
+
 class MessageState {
 public:
   uint32_t address;
   unsigned int size;
 
   std::vector<Signal> parse_sigs;
-  std::vector<double> vals;
+  std::vector<SignalDecode> decode;
+  std::vector<size_t> check_sigs;  // checksum and counter signals
+  size_t index;  // of the first value in the parser values
+  double *vals;
+  uint16_t *vals_ts;
 
   uint16_t ts;
   uint64_t seen;
@@ -45,10 +65,16 @@ private:
   const DBC *dbc = NULL;
   std::unordered_map<uint32_t, MessageState> message_states;
 
+  friend class CANDemux;
+
 public:
   bool can_valid = false;
   uint64_t last_sec = 0;
 
+  // latest values and bus times of all the parsed signals, laid out by signal_slots()
+  std::vector<double> values;
+  std::vector<uint16_t> values_ts;
+
   CANParser(int abus, const std::string& dbc_name,
             const std::vector<MessageParseOptions> &options,
             const std::vector<SignalParseOptions> &sigoptions);
@@ -56,6 +82,31 @@ public:
   void UpdateValid(uint64_t sec);
   void update_string(std::string data, bool sendcan);
   std::vector<SignalValue> query_latest();
+  std::vector<uint32_t> query_updated();
+  std::vector<SignalSlot> signal_slots();
+};
+
+// Decodes every event once and hands each message to the states of the
+// parsers tracking its bus and address
+class CANDemux {
+private:
+  std::vector<CANParser*> parsers;
+  std::unordered_map<uint64_t, std::vector<MessageState*>> routes;
+
+public:
+  void add(CANParser *parser);
+  void update_string(const std::string &data, bool sendcan);
+};
+
+// a message with its signals resolved once, packed from values in signal order
+struct PreparedMsg {
+  uint32_t address;
+  unsigned int size;
+  std::vector<Signal> sigs;
+  bool has_counter;
+  Signal counter;
+  bool has_checksum;
+  Signal checksum;
 };
 
 class CANPacker {
@@ -63,8 +114,11 @@ private:
   const DBC *dbc = NULL;
   std::map<std::pair<uint32_t, std::string>, Signal> signal_lookup;
   std::map<uint32_t, Msg> message_lookup;
+  std::vector<PreparedMsg> prepared;
 
 public:
   CANPacker(const std::string& dbc_name);
   uint64_t pack(uint32_t address, const std::vector<SignalPackValue> &signals, int counter);
+  int prepare(uint32_t address, const std::vector<std::string> &signal_names);
+  uint64_t pack_prepared(int handle, const double *values, int counter);
 };
@@ -71,12 +71,28 @@ cdef extern from "common_dbc.h":
 cdef extern from "common.h":
   cdef const DBC* dbc_lookup(const string);
 
+  cdef struct SignalSlot:
+    uint32_t address
+    const char* name
+    size_t index
+
   cdef cppclass CANParser:
     bool can_valid
+    vector[double] values
+    vector[uint16_t] values_ts
     CANParser(int, string, vector[MessageParseOptions], vector[SignalParseOptions])
     void update_string(string, bool)
     vector[SignalValue] query_latest()
+    vector[uint32_t] query_updated()
+    vector[SignalSlot] signal_slots()
+
+  cdef cppclass CANDemux:
+    CANDemux()
+    void add(CANParser *)
+    void update_string(string, bool)
 
   cdef cppclass CANPacker:
    CANPacker(string)
    uint64_t pack(uint32_t, vector[SignalPackValue], int counter)
+   int prepare(uint32_t, vector[string])
+   uint64_t pack_prepared(int, const double *, int counter)
@@ -1,10 +1,18 @@
 import re
 import os
+import json
 import struct
 import sys
+import hashlib
 import numbers
+import tempfile
+import numpy as np
 from collections import namedtuple, defaultdict
 
+# parsed DBCs are cached by the hash of the DBC file, bump the version when the parsed format changes
+DBC_CACHE_DIR = os.getenv("DBC_CACHE_DIR", os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "opendbc"))
+DBC_CACHE_VERSION = 2
+
 def int_or_float(s):
   # return number, trying to maintain int format
   if s.isdigit():
@@ -17,13 +25,72 @@ DBCSignal = namedtuple(
                 "factor", "offset", "tmin", "tmax", "units"])
 
 
+def dbc_cache_path(name, raw):
+  digest = hashlib.sha1(raw).hexdigest()
+  return os.path.join(DBC_CACHE_DIR, "%s-%s.v%d.json" % (name, digest, DBC_CACHE_VERSION))
+
+def load_dbc_cache(path):
+  """Returns the (msgs, def_vals) cached at path, or None if there is no valid cache."""
+  # the cache is plain json, anything that doesn't load into the parsed format is a miss
+  try:
+    with open(path, "rb") as f:
+      dat = json.load(f)
+    if dat["version"] != DBC_CACHE_VERSION:
+      return None
+    msgs = {address: ((name, size), [DBCSignal(*sig) for sig in sigs]) for address, name, size, sigs in dat["msgs"]}
+    def_vals = defaultdict(list)
+    for address, sgname, defvals in dat["def_vals"]:
+      def_vals[address].append((sgname, defvals))
+    return msgs, def_vals
+  except Exception:
+    return None
+
+def save_dbc_cache(path, msgs, def_vals):
+  dat = {
+    "version": DBC_CACHE_VERSION,
+    "msgs": [[address, name, size, [list(sig) for sig in sigs]] for address, ((name, size), sigs) in msgs.items()],
+    "def_vals": [[address, sgname, defvals] for address, vals in def_vals.items() for sgname, defvals in vals],
+  }
+  try:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # written to a temporary file first, so other processes never load half a cache
+    with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(path), delete=False) as f:
+      json.dump(dat, f)
+    os.replace(f.name, path)
+  except OSError:
+    pass
+
+
 class dbc():
-  def __init__(self, fn):
+  def __init__(self, fn, use_cache=True):
     self.name, _ = os.path.splitext(os.path.basename(fn))
-    with open(fn, encoding="ascii") as f:
-      self.txt = f.readlines()
+    with open(fn, "rb") as f:
+      raw = f.read()
+    self.txt = raw.decode("ascii").splitlines(keepends=True)
     self._warned_addresses = set()
+    self._encode_plans = {}
+
+    # lookup to bit reverse each byte
+    self.bits_index = [(i & ~0b111) + ((-i-1) & 0b111) for i in range(64)]
+
+    cached = None
+    if use_cache:
+      cache_path = dbc_cache_path(self.name, raw)
+      cached = load_dbc_cache(cache_path)
+
+    if cached is not None:
+      self.msgs, self.def_vals = cached
+    else:
+      self.parse()
+      if use_cache:
+        save_dbc_cache(cache_path, self.msgs, self.def_vals)
+
+    self.msg_name_to_address = {}
+    for address, m in self.msgs.items():
+      name = m[0][0]
+      self.msg_name_to_address[name] = address
 
+  def parse(self):
     # regexps from https://github.com/ebroecker/canmatrix/blob/master/canmatrix/importdbc.py
     bo_regexp = re.compile(r"^BO\_ (\w+) (\w+) *: (\w+) (\w+)")
     sg_regexp = re.compile(r"^SG\_ (\w+) : (\d+)\|(\d+)@(\d+)([\+|\-]) \(([0-9.+\-eE]+),([0-9.+\-eE]+)\) \[([0-9.+\-eE]+)\|([0-9.+\-eE]+)\] \"(.*)\" (.*)")
@@ -40,9 +107,6 @@ class dbc():
     # A dictionary which maps message ids to a list of tuples (signal name, definition value pairs)
     self.def_vals = defaultdict(list)
 
-    # lookup to bit reverse each byte
-    self.bits_index = [(i & ~0b111) + ((-i-1) & 0b111) for i in range(64)]
-
     for l in self.txt:
       l = l.strip()
 
@@ -110,11 +174,6 @@ class dbc():
     for msg in self.msgs.values():
       msg[1].sort(key=lambda x: x.start_bit)
 
-    self.msg_name_to_address = {}
-    for address, m in self.msgs.items():
-      name = m[0][0]
-      self.msg_name_to_address[name] = address
-
   def lookup_msg_id(self, msg_id):
     if not isinstance(msg_id, numbers.Number):
       msg_id = self.msg_name_to_address[msg_id]
@@ -172,6 +231,57 @@ class dbc():
     result = struct.pack('>Q', result)
     return result[:size]
 
+  def _encode_plan(self, msg_id):
+    # per signal: the shift and mask that place it in the big endian 64 bit message
+    plan = self._encode_plans.get(msg_id)
+    if plan is None:
+      plan = []
+      for s in self.msgs[msg_id][1]:
+        if s.is_little_endian:
+          shift = s.start_bit
+        else:
+          b1 = (s.start_bit // 8) * 8 + (-s.start_bit - 1) % 8
+          shift = 64 - (b1 + s.size)
+        mask = ((1 << s.size) - 1) << shift
+        if s.is_little_endian:
+          mask = self.reverse_bytes(mask)
+        plan.append((s, np.uint64((1 << s.size) - 1), np.uint64(shift), np.uint64(mask)))
+      self._encode_plans[msg_id] = plan
+    return plan
+
+  def encode_batch(self, msg_id, dd):
+    """Encode N frames of a CAN message using the dbc, like encode.
+
+       Inputs:
+        msg_id: The message ID.
+        dd: A dictionary mapping signal name to an array of N values, or to a
+            single value used for every frame.
+
+       Returns:
+        An (N, size) array of uint8 with the data of every frame.
+    """
+    msg_id = self.lookup_msg_id(msg_id)
+    size = self.msgs[msg_id][0][1]
+
+    columns = {name: np.asarray(v, dtype=np.float64) for name, v in dd.items()}
+    n = max((len(v) for v in columns.values() if v.ndim > 0), default=1)
+
+    result = np.zeros(n, dtype=np.uint64)
+    for s, size_mask, shift, mask in self._encode_plan(msg_id):
+      v = columns.get(s.name)
+      if v is None:
+        continue
+
+      ival = np.round(v / s.factor - s.offset).astype(np.int64)
+      dat = (np.broadcast_to(ival, (n,)).view(np.uint64) & size_mask) << shift
+      if s.is_little_endian:
+        dat = dat.byteswap()
+
+      result &= ~mask
+      result |= dat
+
+    return result.astype('>u8').view(np.uint8).reshape(n, 8)[:, :size].copy()
+
   def decode(self, x, arr=None, debug=False):
     """Decode a CAN message using the dbc.
 
@@ -250,6 +360,45 @@ class dbc():
         out[arr.index(s[0])] = tmp
     return name, out
 
+  def decode_batch(self, msg_id, dat, arr=None):
+    """Decode N frames of a CAN message using the dbc, like decode.
+
+       Inputs:
+        msg_id: The message ID.
+        dat: An (N, size) array of uint8 with the data of every frame, up to 8 bytes.
+        arr: Optional list of signals which should be decoded and returned.
+
+       Returns:
+        A dictionary mapping signal name to an array of N values.
+    """
+    msg_id = self.lookup_msg_id(msg_id)
+
+    dat = np.asarray(dat, dtype=np.uint8)
+    frames = np.zeros((dat.shape[0], 8), dtype=np.uint8)
+    frames[:, :dat.shape[1]] = dat
+    le, be = frames.view('<u8')[:, 0], frames.view('>u8')[:, 0]
+
+    out = {}
+    for s in self.msgs[msg_id][1]:
+      if arr is not None and s.name not in arr:
+        continue
+
+      if s.is_little_endian:
+        tmp, shift_amount = le, s.start_bit
+      else:
+        b1 = (s.start_bit // 8) * 8 + (-s.start_bit - 1) % 8
+        tmp, shift_amount = be, 64 - (b1 + s.size)
+
+      if shift_amount < 0:
+        continue
+
+      tmp = ((tmp >> np.uint64(shift_amount)) & np.uint64((1 << s.size) - 1)).astype(np.int64)
+      if s.is_signed:
+        tmp -= (tmp >> (s.size - 1)) << s.size
+
+      out[s.name] = tmp * s.factor + s.offset
+    return out
+
   def get_signals(self, msg):
     msg = self.lookup_msg_id(msg)
     return [sgs.name for sgs in self.msgs[msg][1]]
@@ -33,6 +33,33 @@ uint64_t set_value(uint64_t ret, Signal sig, int64_t ival){
   return ret;
 }
 
+uint64_t set_signal_value(uint64_t ret, const Signal &sig, double value) {
+  int64_t ival = (int64_t)(round((value - sig.offset) / sig.factor));
+  if (ival < 0) {
+    ival = (1ULL << sig.b2) + ival;
+  }
+  return set_value(ret, sig, ival);
+}
+
+uint64_t set_checksum(uint64_t ret, const Signal &sig, uint32_t address, unsigned int size) {
+  if (sig.type == SignalType::HONDA_CHECKSUM) {
+    unsigned int chksm = honda_checksum(address, ret, size);
+    ret = set_value(ret, sig, chksm);
+  } else if (sig.type == SignalType::TOYOTA_CHECKSUM) {
+    unsigned int chksm = toyota_checksum(address, ret, size);
+    ret = set_value(ret, sig, chksm);
+  } else if (sig.type == SignalType::VOLKSWAGEN_CHECKSUM) {
+    // FIXME: Hackish fix for an endianness issue. The message is in reverse byte order
+    // until later in the pack process. Checksums can be run backwards, CRCs not so much.
+    // The correct fix is unclear but this works for the moment.
+    unsigned int chksm = volkswagen_crc(address, ReverseBytes(ret), size);
+    ret = set_value(ret, sig, chksm);
+  } else {
+    //WARN("CHECKSUM signal type not valid\n");
+  }
+  return ret;
+}
+
 CANPacker::CANPacker(const std::string& dbc_name) {
   dbc = dbc_lookup(dbc_name);
   assert(dbc);
@@ -59,14 +86,7 @@ uint64_t CANPacker::pack(uint32_t address, const std::vector<SignalPackValue> &s
       WARN("undefined signal %s - %d\n", name.c_str(), address);
       continue;
     }
-    auto sig = sig_it->second;
-
-    int64_t ival = (int64_t)(round((value - sig.offset) / sig.factor));
-    if (ival < 0) {
-      ival = (1ULL << sig.b2) + ival;
-    }
-
-    ret = set_value(ret, sig, ival);
+    ret = set_signal_value(ret, sig_it->second, value);
   }
 
   if (counter >= 0){
@@ -86,22 +106,73 @@ uint64_t CANPacker::pack(uint32_t address, const std::vector<SignalPackValue> &s
 
   auto sig_it_checksum = signal_lookup.find(std::make_pair(address, "CHECKSUM"));
   if (sig_it_checksum != signal_lookup.end()) {
-    auto sig = sig_it_checksum->second;
-    if (sig.type == SignalType::HONDA_CHECKSUM) {
-      unsigned int chksm = honda_checksum(address, ret, message_lookup[address].size);
-      ret = set_value(ret, sig, chksm);
-    } else if (sig.type == SignalType::TOYOTA_CHECKSUM) {
-      unsigned int chksm = toyota_checksum(address, ret, message_lookup[address].size);
-      ret = set_value(ret, sig, chksm);
-    } else if (sig.type == SignalType::VOLKSWAGEN_CHECKSUM) {
-      // FIXME: Hackish fix for an endianness issue. The message is in reverse byte order
-      // until later in the pack process. Checksums can be run backwards, CRCs not so much.
-      // The correct fix is unclear but this works for the moment.
-      unsigned int chksm = volkswagen_crc(address, ReverseBytes(ret), message_lookup[address].size);
-      ret = set_value(ret, sig, chksm);
-    } else {
-      //WARN("CHECKSUM signal type not valid\n");
+    ret = set_checksum(ret, sig_it_checksum->second, address, message_lookup[address].size);
+  }
+
+  return ret;
+}
+
+int CANPacker::prepare(uint32_t address, const std::vector<std::string> &signal_names) {
+  auto msg_it = message_lookup.find(address);
+  if (msg_it == message_lookup.end()) {
+    WARN("undefined message %d\n", address);
+    return -1;
+  }
+
+  PreparedMsg msg = {};
+  msg.address = address;
+  msg.size = msg_it->second.size;
+
+  for (const auto& name : signal_names) {
+    auto sig_it = signal_lookup.find(std::make_pair(address, name));
+    if (sig_it == signal_lookup.end()) {
+      WARN("undefined signal %s - %d\n", name.c_str(), address);
+      return -1;
     }
+    msg.sigs.push_back(sig_it->second);
+  }
+
+  auto counter_it = signal_lookup.find(std::make_pair(address, "COUNTER"));
+  if (counter_it != signal_lookup.end()) {
+    msg.has_counter = true;
+    msg.counter = counter_it->second;
+  }
+
+  auto checksum_it = signal_lookup.find(std::make_pair(address, "CHECKSUM"));
+  if (checksum_it != signal_lookup.end()) {
+    msg.has_checksum = true;
+    msg.checksum = checksum_it->second;
+  }
+
+  prepared.push_back(msg);
+  return prepared.size() - 1;
+}
+
+uint64_t CANPacker::pack_prepared(int handle, const double *values, int counter) {
+  if (handle < 0 || handle >= (int)prepared.size()) {
+    WARN("undefined prepared message %d\n", handle);
+    return 0;
+  }
+  const PreparedMsg &msg = prepared[handle];
+
+  uint64_t ret = 0;
+  for (int i = 0; i < msg.sigs.size(); i++) {
+    ret = set_signal_value(ret, msg.sigs[i], values[i]);
+  }
+
+  if (counter >= 0) {
+    if (!msg.has_counter) {
+      WARN("COUNTER not defined\n");
+      return ret;
+    }
+    if ((msg.counter.type != SignalType::HONDA_COUNTER) && (msg.counter.type != SignalType::VOLKSWAGEN_COUNTER)) {
+      WARN("COUNTER signal type not valid\n");
+    }
+    ret = set_value(ret, msg.counter, counter);
+  }
+
+  if (msg.has_checksum) {
+    ret = set_checksum(ret, msg.checksum, msg.address, msg.size);
   }
 
   return ret;
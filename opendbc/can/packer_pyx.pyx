@@ -6,18 +6,34 @@ from libcpp.vector cimport vector
 from libcpp.map cimport map
 from libcpp.string cimport string
 from libcpp cimport bool
+from libc.stdlib cimport malloc, free
 from posix.dlfcn cimport dlopen, dlsym, RTLD_LAZY
 
 from common cimport CANPacker as cpp_CANPacker
 from common cimport dbc_lookup, SignalPackValue, DBC
 
 
+cdef class PreparedMsg:
+  """A message with its signals resolved by CANPacker.prepare, packed from
+  values given in the same order as the signal names."""
+  cdef readonly:
+    int handle
+    int address
+    int size
+    tuple signal_names
+  # the handle is only valid for the packer that prepared the message
+  cdef object packer
+
+
 cdef class CANPacker:
   cdef:
     cpp_CANPacker *packer
     const DBC *dbc
     map[string, (int, int)] name_to_address_and_size
     map[int, int] address_to_size
+    dict prepared
+    double *values_buf
+    size_t values_buf_len
 
   def __init__(self, dbc_name):
     self.packer = new cpp_CANPacker(dbc_name)
@@ -29,6 +45,13 @@ cdef class CANPacker:
       self.name_to_address_and_size[string(msg.name)] = (msg.address, msg.size)
       self.address_to_size[msg.address] = msg.size
 
+    self.prepared = {}
+    self.values_buf = NULL
+    self.values_buf_len = 0
+
+  def __dealloc__(self):
+    free(self.values_buf)
+
   cdef uint64_t pack(self, addr, values, counter):
     cdef vector[SignalPackValue] values_thing
     cdef SignalPackValue spv
@@ -55,13 +78,69 @@ cdef class CANPacker:
            ((x & 0x000000000000ff00ull) << 40) |
            ((x & 0x00000000000000ffull) << 56))
 
-  cpdef make_can_msg(self, name_or_addr, bus, values, counter=-1):
-    cdef int addr, size
+  cdef lookup(self, name_or_addr):
     if type(name_or_addr) == int:
-      addr = name_or_addr
-      size = self.address_to_size[name_or_addr]
+      return name_or_addr, self.address_to_size[name_or_addr]
     else:
-      addr, size = self.name_to_address_and_size[name_or_addr.encode('utf8')]
+      return self.name_to_address_and_size[name_or_addr.encode('utf8')]
+
+  cpdef make_can_msg(self, name_or_addr, bus, values, counter=-1):
+    cdef int addr, size
+    addr, size = self.lookup(name_or_addr)
     cdef uint64_t val = self.pack(addr, values, counter)
     val = self.ReverseBytes(val)
     return [addr, 0, (<char *>&val)[:size], bus]
+
+  def prepare(self, name_or_addr, signal_names):
+    """Resolves the signals of a message once, so it can be packed from a
+    sequence of values in signal_names order with make_prepared_msg."""
+    signal_names = tuple(signal_names)
+    key = (name_or_addr, signal_names)
+    if key in self.prepared:
+      return self.prepared[key]
+
+    cdef int addr, size
+    addr, size = self.lookup(name_or_addr)
+    cdef vector[string] names = [name.encode('utf8') for name in signal_names]
+    handle = self.packer.prepare(addr, names)
+    if handle < 0:
+      raise ValueError("undefined signal in %s: %s" % (name_or_addr, signal_names))
+
+    if len(signal_names) > self.values_buf_len:
+      free(self.values_buf)
+      self.values_buf = <double *>malloc(len(signal_names) * sizeof(double))
+      if self.values_buf == NULL:
+        self.values_buf_len = 0
+        raise MemoryError()
+      self.values_buf_len = len(signal_names)
+
+    cdef PreparedMsg msg = PreparedMsg()
+    msg.packer = self
+    msg.handle = handle
+    msg.address = addr
+    msg.size = size
+    msg.signal_names = signal_names
+    self.prepared[key] = msg
+    return msg
+
+  cpdef make_prepared_msg(self, PreparedMsg prepared, bus, values, int counter=-1):
+    if prepared.packer is not self:
+      raise ValueError("%s was prepared by another packer" % (prepared.signal_names,))
+    if len(values) != len(prepared.signal_names):
+      raise ValueError("expected %d values for %s" % (len(prepared.signal_names), prepared.signal_names))
+
+    cdef int i
+    for i in range(len(values)):
+      self.values_buf[i] = values[i]
+
+    cdef uint64_t val = self.packer.pack_prepared(prepared.handle, self.values_buf, counter)
+    val = self.ReverseBytes(val)
+    return [prepared.address, 0, (<char *>&val)[:prepared.size], bus]
+
+  def make_can_msgs(self, msgs):
+    """Packs (prepared, bus, values, counter) tuples, where counter is optional,
+    into a list ready for can_list_to_can_capnp."""
+    ret = []
+    for msg in msgs:
+      ret.append(self.make_prepared_msg(*msg))
+    return ret
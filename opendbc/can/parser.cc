@@ -14,23 +14,19 @@
 #define INFO printf
 
 
+static inline int64_t decode_raw(const SignalDecode &d, uint64_t dat_le, uint64_t dat_be) {
+  int64_t tmp = ((d.is_little_endian ? dat_le : dat_be) >> d.shift) & d.mask;
+  return (tmp ^ d.sign) - d.sign;
+}
+
 bool MessageState::parse(uint64_t sec, uint16_t ts_, uint8_t * dat) {
   uint64_t dat_le = read_u64_le(dat);
   uint64_t dat_be = read_u64_be(dat);
 
-  for (int i=0; i < parse_sigs.size(); i++) {
+  // the message is dropped if any check fails, before any value is updated
+  for (size_t i : check_sigs) {
     auto& sig = parse_sigs[i];
-    int64_t tmp;
-
-    if (sig.is_little_endian){
-      tmp = (dat_le >> sig.b1) & ((1ULL << sig.b2)-1);
-    } else {
-      tmp = (dat_be >> sig.bo) & ((1ULL << sig.b2)-1);
-    }
-
-    if (sig.is_signed) {
-      tmp -= (tmp >> (sig.b2-1)) ? (1ULL << sig.b2) : 0; //signed
-    }
+    int64_t tmp = decode_raw(decode[i], dat_le, dat_be);
 
     DEBUG("parse 0x%X %s -> %lld\n", address, sig.name, tmp);
 
@@ -67,8 +63,12 @@ bool MessageState::parse(uint64_t sec, uint16_t ts_, uint8_t * dat) {
         return false;
       }
     }
+  }
 
-    vals[i] = tmp * sig.factor + sig.offset;
+  for (size_t i = 0; i < decode.size(); i++) {
+    const SignalDecode &d = decode[i];
+    vals[i] = decode_raw(d, dat_le, dat_be) * d.factor + d.offset;
+    vals_ts[i] = ts_;
   }
   ts = ts_;
   seen = sec;
@@ -77,6 +77,15 @@ bool MessageState::parse(uint64_t sec, uint16_t ts_, uint8_t * dat) {
 }
 
 
+static void parse_can_msg(MessageState &state, uint64_t sec, const cereal::CanData::Reader &cmsg) {
+  if (cmsg.getDat().size() > 8) return; //shouldnt ever happen
+  uint8_t dat[8] = {0};
+  memcpy(dat, cmsg.getDat().begin(), cmsg.getDat().size());
+
+  state.parse(sec, cmsg.getBusTime(), dat);
+}
+
+
 bool MessageState::update_counter_generic(int64_t v, int cnt_size) {
   uint8_t old_counter = counter;
   counter = v;
@@ -104,6 +113,8 @@ CANParser::CANParser(int abus, const std::string& dbc_name,
   assert(dbc);
   init_crc_lookup_tables();
 
+  std::vector<double> defaults;
+
   for (const auto& op : options) {
     MessageState state = {
       .address = op.address,
@@ -134,8 +145,9 @@ CANParser::CANParser(int abus, const std::string& dbc_name,
     for (int i=0; i<msg->num_sigs; i++) {
       const Signal *sig = &msg->sigs[i];
       if (sig->type != SignalType::DEFAULT) {
+        state.check_sigs.push_back(state.parse_sigs.size());
         state.parse_sigs.push_back(*sig);
-        state.vals.push_back(0);
+        defaults.push_back(0);
       }
     }
 
@@ -148,15 +160,36 @@ CANParser::CANParser(int abus, const std::string& dbc_name,
         if (strcmp(sig->name, sigop.name) == 0
             && sig->type == SignalType::DEFAULT) {
           state.parse_sigs.push_back(*sig);
-          state.vals.push_back(sigop.default_value);
+          defaults.push_back(sigop.default_value);
           break;
         }
       }
 
     }
 
+    for (const auto& sig : state.parse_sigs) {
+      state.decode.push_back((SignalDecode){
+        .mask = (1ULL << sig.b2) - 1,
+        .sign = sig.is_signed ? (1ULL << (sig.b2 - 1)) : 0,
+        .factor = sig.factor,
+        .offset = sig.offset,
+        .shift = (uint8_t)(sig.is_little_endian ? sig.b1 : sig.bo),
+        .is_little_endian = sig.is_little_endian,
+      });
+    }
+
+    state.index = values.size();
+    values.insert(values.end(), defaults.end() - state.parse_sigs.size(), defaults.end());
+    values_ts.resize(values.size(), 0);
+
     message_states[state.address] = state;
   }
+
+  // the values are not resized after this, every state writes straight into them
+  for (auto& kv : message_states) {
+    kv.second.vals = values.data() + kv.second.index;
+    kv.second.vals_ts = values_ts.data() + kv.second.index;
+  }
 }
 
 void CANParser::UpdateCans(uint64_t sec, const capnp::List<cereal::CanData>::Reader& cans) {
@@ -178,11 +211,7 @@ void CANParser::UpdateCans(uint64_t sec, const capnp::List<cereal::CanData>::Rea
         continue;
       }
 
-      if (cmsg.getDat().size() > 8) continue; //shouldnt ever happen
-      uint8_t dat[8] = {0};
-      memcpy(dat, cmsg.getDat().begin(), cmsg.getDat().size());
-
-      state_it->second.parse(sec, cmsg.getBusTime(), dat);
+      parse_can_msg(state_it->second, sec, cmsg);
     }
 }
 
@@ -237,3 +266,74 @@ std::vector<SignalValue> CANParser::query_latest() {
 
   return ret;
 }
+
+std::vector<uint32_t> CANParser::query_updated() {
+  std::vector<uint32_t> ret;
+
+  for (const auto& kv : message_states) {
+    const auto& state = kv.second;
+    if (last_sec != 0 && state.seen != last_sec) continue;
+    if (state.parse_sigs.empty()) continue;
+    ret.push_back(state.address);
+  }
+
+  return ret;
+}
+
+std::vector<SignalSlot> CANParser::signal_slots() {
+  std::vector<SignalSlot> ret;
+
+  for (const auto& kv : message_states) {
+    const auto& state = kv.second;
+    for (int i=0; i<state.parse_sigs.size(); i++) {
+      ret.push_back((SignalSlot){
+        .address = state.address,
+        .name = state.parse_sigs[i].name,
+        .index = state.index + i,
+      });
+    }
+  }
+
+  return ret;
+}
+
+
+static inline uint64_t route_key(uint32_t bus, uint32_t address) {
+  return ((uint64_t)bus << 32) | address;
+}
+
+void CANDemux::add(CANParser *parser) {
+  parsers.push_back(parser);
+
+  // message_states is never modified after the parser is built, so the states stay put
+  for (auto& kv : parser->message_states) {
+    routes[route_key(parser->bus, kv.first)].push_back(&kv.second);
+  }
+}
+
+void CANDemux::update_string(const std::string &data, bool sendcan) {
+  // format for board, make copy due to alignment issues, will be freed on out of scope
+  auto amsg = kj::heapArray<capnp::word>((data.length() / sizeof(capnp::word)) + 1);
+  memcpy(amsg.begin(), data.data(), data.length());
+
+  capnp::FlatArrayMessageReader cmsg(amsg);
+  cereal::Event::Reader event = cmsg.getRoot<cereal::Event>();
+
+  uint64_t sec = event.getLogMonoTime();
+
+  auto cans = sendcan? event.getSendcan() : event.getCan();
+  for (auto can : cans) {
+    auto route = routes.find(route_key(can.getSrc(), can.getAddress()));
+    if (route == routes.end()) {
+      continue;
+    }
+    for (auto state : route->second) {
+      parse_can_msg(*state, sec, can);
+    }
+  }
+
+  for (auto parser : parsers) {
+    parser->last_sec = sec;
+    parser->UpdateValid(sec);
+  }
+}
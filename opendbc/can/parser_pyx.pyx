@@ -11,12 +11,14 @@ from libcpp.map cimport map
 from collections import defaultdict
 
 from common cimport CANParser as cpp_CANParser
-from common cimport SignalParseOptions, MessageParseOptions, dbc_lookup, SignalValue, DBC
+from common cimport CANDemux as cpp_CANDemux
+from common cimport SignalParseOptions, MessageParseOptions, dbc_lookup, SignalValue, SignalSlot, DBC
 
 
 from libcpp cimport bool
 import os
 import numbers
+import numpy as np
 
 cdef int CAN_INVALID_CNT = 5
 
@@ -29,6 +31,7 @@ cdef class CANParser:
     map[uint32_t, string] address_to_msg_name
     vector[SignalValue] can_values
     bool test_mode_enabled
+    dict message_slots
 
   cdef public:
     string dbc_name
@@ -36,8 +39,17 @@ cdef class CANParser:
     dict ts
     bool can_valid
     int can_invalid_cnt
+    bool track_vl
+    object values
+    dict signal_index
 
-  def __init__(self, dbc_name, signals, checks=None, bus=0):
+  def __init__(self, dbc_name, signals, checks=None, bus=0, track_vl=True):
+    """Parses the signals of the given bus into values, a read-only array kept
+    up to date by every update, where signal_index maps (message name or address,
+    signal name) to the position of a signal.
+
+    Unless track_vl is False, the latest values and bus times are also copied to
+    vl and ts by message name or address and signal name after every update."""
     if checks is None:
       checks = []
 
@@ -56,10 +68,9 @@ cdef class CANParser:
 
       self.msg_name_to_address[name] = msg.address
       self.address_to_msg_name[msg.address] = name
-      self.vl[msg.address] = {}
-      self.vl[name] = {}
-      self.ts[msg.address] = {}
-      self.ts[name] = {}
+      # the same dicts are looked up by address and by name
+      self.vl[msg.address] = self.vl[name] = {}
+      self.ts[msg.address] = self.ts[name] = {}
 
     # Convert message names into addresses
     for i in range(len(signals)):
@@ -95,13 +106,44 @@ cdef class CANParser:
       message_options_v.push_back(mpo)
 
     self.can = new cpp_CANParser(bus, dbc_name, message_options_v, signal_options_v)
+    self.track_vl = track_vl
+    self.init_slots()
     self.update_vl()
 
+  cdef init_slots(self):
+    cdef SignalSlot slot
+    msg_sigs = defaultdict(list)
+    self.signal_index = {}
+
+    for slot in self.can.signal_slots():
+      sig_name = <unicode>slot.name
+      msg_name = <unicode>self.address_to_msg_name[slot.address].c_str()
+      msg_sigs[slot.address].append((slot.index, sig_name))
+      self.signal_index[(slot.address, sig_name)] = slot.index
+      self.signal_index[(msg_name, sig_name)] = slot.index
+
+    # first value and signal names of every message, with the dicts they are copied to
+    self.message_slots = {}
+    for address, sigs in msg_sigs.items():
+      sigs.sort()
+      self.message_slots[address] = (sigs[0][0], tuple(sig_name for _, sig_name in sigs),
+                                     self.vl[address], self.ts[address])
+
+    # the parser values never move, so they are viewed rather than copied
+    cdef size_t num_values = self.can.values.size()
+    if num_values > 0:
+      self.values = np.asarray(<double[:num_values]> self.can.values.data())
+    else:
+      self.values = np.zeros(0)
+    self.values.flags.writeable = False
+
   cdef unordered_set[uint32_t] update_vl(self):
-    cdef string sig_name
     cdef unordered_set[uint32_t] updated_val
+    cdef size_t index
+    cdef double *values = self.can.values.data()
+    cdef uint16_t *values_ts = self.can.values_ts.data()
 
-    can_values = self.can.query_latest()
+    updated = self.can.query_updated()
     valid = self.can.can_valid
 
     # Update invalid flag
@@ -111,18 +153,16 @@ cdef class CANParser:
     self.can_valid = self.can_invalid_cnt < CAN_INVALID_CNT
 
 
-    for cv in can_values:
-      # Cast char * directly to unicde
-      name = <unicode>self.address_to_msg_name[cv.address].c_str()
-      cv_name = <unicode>cv.name
-
-      self.vl[cv.address][cv_name] = cv.value
-      self.ts[cv.address][cv_name] = cv.ts
+    for address in updated:
+      updated_val.insert(address)
+      if not self.track_vl:
+        continue
 
-      self.vl[name][cv_name] = cv.value
-      self.ts[name][cv_name] = cv.ts
-
-      updated_val.insert(cv.address)
+      index, sig_names, vl, ts = self.message_slots[address]
+      for sig_name in sig_names:
+        vl[sig_name] = values[index]
+        ts[sig_name] = values_ts[index]
+        index += 1
 
     return updated_val
 
@@ -139,6 +179,42 @@ cdef class CANParser:
 
     return updated_vals
 
+cdef class CANDemux:
+  """Updates several CANParsers from the same events, decoding each event once
+  and only handing the parsers the messages they track."""
+  cdef:
+    cpp_CANDemux demux
+    list parsers
+
+  def __init__(self, parsers=None):
+    self.parsers = []
+    for parser in parsers or []:
+      self.add(parser)
+
+  def add(self, CANParser parser):
+    self.demux.add(parser.can)
+    self.parsers.append(parser)
+
+  def update_string(self, dat, sendcan=False):
+    cdef CANParser parser
+    self.demux.update_string(dat, sendcan)
+
+    ret = []
+    for parser in self.parsers:
+      ret.append(parser.update_vl())
+    return ret
+
+  def update_strings(self, strings, sendcan=False):
+    """Returns the addresses updated by the strings for every parser, in the
+    order they were added."""
+    updated_vals = [set() for _ in self.parsers]
+
+    for s in strings:
+      for updated_val, updated in zip(updated_vals, self.update_string(s, sendcan)):
+        updated_val.update(updated)
+
+    return updated_vals
+
 cdef class CANDefine():
   cdef:
     const DBC *dbc
@@ -6,16 +6,22 @@ import sys
 import jinja2
 
 from collections import Counter
+from functools import lru_cache
 from opendbc.can.dbc import dbc
 
+@lru_cache(maxsize=None)
+def load_template():
+  # compiled once for all the DBCs processed by a build
+  template_fn = os.path.join(os.path.dirname(__file__), "dbc_template.cc")
+
+  with open(template_fn, "r") as template_f:
+    return jinja2.Template(template_f.read(), trim_blocks=True, lstrip_blocks=True)
+
 def process(in_fn, out_fn):
   dbc_name = os.path.split(out_fn)[-1].replace('.cc', '')
   #print("processing %s: %s -> %s" % (dbc_name, in_fn, out_fn))
 
-  template_fn = os.path.join(os.path.dirname(__file__), "dbc_template.cc")
-
-  with open(template_fn, "r") as template_f:
-    template = jinja2.Template(template_f.read(), trim_blocks=True, lstrip_blocks=True)
+  template = load_template()
 
   can_dbc = dbc(in_fn)
 
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+import os
+import glob
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from unittest import mock
+
+from opendbc import DBC_PATH
+from opendbc.can import dbc as dbc_module
+from opendbc.can.dbc import dbc, dbc_cache_path
+
+
+class TestDBCCache(unittest.TestCase):
+  def setUp(self):
+    self.cache_dir = tempfile.mkdtemp()
+    patcher = mock.patch.object(dbc_module, "DBC_CACHE_DIR", self.cache_dir)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+    self.addCleanup(shutil.rmtree, self.cache_dir)
+
+  def _assert_same(self, a, b):
+    self.assertEqual(a.msgs, b.msgs)
+    self.assertEqual(dict(a.def_vals), dict(b.def_vals))
+    self.assertEqual(a.msg_name_to_address, b.msg_name_to_address)
+
+  def test_cached(self):
+    # parsed, cached and loaded DBCs are the same
+    for fn in glob.glob(os.path.join(DBC_PATH, "*.dbc")):
+      parsed = dbc(fn, use_cache=False)
+      cached = dbc(fn)
+      loaded = dbc(fn)
+      self._assert_same(parsed, cached)
+      self._assert_same(parsed, loaded)
+
+      with open(fn, "rb") as f:
+        self.assertTrue(os.path.isfile(dbc_cache_path(parsed.name, f.read())))
+
+  def test_invalid_cache(self):
+    fn = os.path.join(DBC_PATH, "toyota_prius_2017_pt_generated.dbc")
+    parsed = dbc(fn, use_cache=False)
+    with open(fn, "rb") as f:
+      path = dbc_cache_path(parsed.name, f.read())
+
+    # truncated, corrupted, malformed or from another version, the cache is parsed again and rewritten
+    for dat in [b"", b"{", b"\x80\x04garbage", b"[]", b'{"version": 2}', b'{"version": 2, "msgs": [[1]], "def_vals": []}',
+                b'{"version": 1, "msgs": [], "def_vals": []}']:
+      with open(path, "wb") as f:
+        f.write(dat)
+      self._assert_same(parsed, dbc(fn))
+      self._assert_same(parsed, dbc(fn))
+
+  def test_changed_dbc(self):
+    # an edited DBC has a different hash, so it never loads the old cache
+    fn = os.path.join(self.cache_dir, "test.dbc")
+    with open(os.path.join(DBC_PATH, "toyota_prius_2017_pt_generated.dbc"), "rb") as f:
+      txt = f.read()
+
+    with open(fn, "wb") as f:
+      f.write(txt)
+    self.assertIn(0x25, dbc(fn).msgs)
+
+    with open(fn, "wb") as f:
+      f.write(txt.replace(b"BO_ 37 STEER_ANGLE_SENSOR", b"BO_ 38 STEER_ANGLE_SENSOR"))
+    d = dbc(fn)
+    self.assertNotIn(0x25, d.msgs)
+    self.assertEqual(d.msg_name_to_address["STEER_ANGLE_SENSOR"], 0x26)
+
+
+class TestDBCBatch(unittest.TestCase):
+  def test_encode_batch(self):
+    # every frame of a batch matches encode, for big and little endian, signed and scaled signals
+    rng = np.random.RandomState(0)
+    n = 50
+    for dbc_name in ["toyota_prius_2017_pt_generated", "honda_civic_touring_2016_can_generated",
+                     "vw_mqb_2010", "subaru_global_2017"]:
+      d = dbc(os.path.join(DBC_PATH, dbc_name + ".dbc"))
+      for address, ((name, size), sigs) in d.msgs.items():
+        sigs = [s for s in sigs if s.size <= 32]
+        if not sigs:
+          continue
+
+        # raw values cover the whole range, the negative ones too
+        dd = {}
+        for s in sigs:
+          raw = rng.randint(-(1 << (s.size - 1)), 1 << s.size, n)
+          dd[s.name] = (raw + s.offset) * s.factor
+        # a single value is used for every frame
+        if len(sigs) > 1:
+          dd[sigs[0].name] = dd[sigs[0].name][0]
+
+        frames = d.encode_batch(name, dd)
+        self.assertEqual(frames.shape, (n, size))
+        for i in range(n):
+          values = {k: v if np.ndim(v) == 0 else v[i] for k, v in dd.items()}
+          self.assertEqual(bytes(frames[i]), d.encode(address, values), "%s %s" % (dbc_name, name))
+
+  def test_decode_batch(self):
+    rng = np.random.RandomState(0)
+    n = 50
+    for dbc_name in ["toyota_prius_2017_pt_generated", "vw_mqb_2010", "subaru_global_2017"]:
+      d = dbc(os.path.join(DBC_PATH, dbc_name + ".dbc"))
+      for address, ((name, size), sigs) in d.msgs.items():
+        dat = rng.randint(0, 256, (n, size)).astype(np.uint8)
+        values = d.decode_batch(name, dat)
+        for i in range(n):
+          _, expected = d.decode((address, 0, bytes(dat[i])))
+          self.assertEqual({k: v[i] for k, v in values.items()}, expected, "%s %s" % (dbc_name, name))
+
+      # only the requested signals are decoded
+      sig_names = d.get_signals(name)[:1]
+      self.assertEqual(list(d.decode_batch(name, dat, sig_names)), sig_names)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+import io
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from contextlib import redirect_stdout
+
+from opendbc.generator import generator
+
+
+class TestGenerator(unittest.TestCase):
+  def setUp(self):
+    # generator layout: brand directories in generator/, outputs one level up
+    self.root = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.root)
+    self.gen_path = os.path.join(self.root, "generator")
+    os.makedirs(os.path.join(self.gen_path, "brand"))
+    for name, dat in [("_common.dbc", 'BO_ 1 COMMON: 8 XXX\n'),
+                      ("with_import.dbc", 'CM_ "IMPORT _common.dbc"\nBO_ 2 A: 8 XXX\n'),
+                      ("without_import.dbc", 'BO_ 3 B: 8 XXX\n')]:
+      self.write(name, dat)
+
+    # the generator script is a dependency of every output too
+    script = os.path.join(self.root, "generator.py")
+    open(script, "w").close()
+
+    for patch in [mock.patch.object(generator, "cur_path", self.gen_path),
+                  mock.patch.object(generator, "generator_path", self.root),
+                  mock.patch.object(generator, "__file__", script)]:
+      patch.start()
+      self.addCleanup(patch.stop)
+
+    self.assertEqual(self.generate(), {"with_import.dbc": "generated", "without_import.dbc": "generated"})
+
+    # explicit mtimes, so the tests don't depend on the timestamp resolution of the filesystem
+    self.t = time.time()
+    for dir_name, _, filenames in os.walk(self.root):
+      for fn in filenames:
+        mtime = self.t - (10 if fn.endswith("_generated.dbc") else 20)
+        os.utime(os.path.join(dir_name, fn), (mtime, mtime))
+
+  def write(self, name, dat, mtime=None):
+    fn = os.path.join(self.gen_path, "brand", name)
+    with open(fn, "w") as f:
+      f.write(dat)
+    if mtime is not None:
+      os.utime(fn, (mtime, mtime))
+
+  def output(self, name):
+    with open(os.path.join(self.root, name.replace(".dbc", "_generated.dbc"))) as f:
+      return f.read()
+
+  def generate(self, *args):
+    out = io.StringIO()
+    with mock.patch.object(sys, "argv", ["generator.py", "-j", "1"] + list(args)), redirect_stdout(out):
+      generator.main()
+    return {filename: status for status, filename in (l.split() for l in out.getvalue().splitlines())}
+
+  def test_up_to_date(self):
+    self.assertEqual(self.generate(), {})
+    self.assertEqual(len(self.generate("--force")), 2)
+
+  def test_edited_import(self):
+    # only the outputs that import the edited DBC are regenerated
+    self.write("_common.dbc", 'BO_ 1 COMMON_EDITED: 8 XXX\n', mtime=self.t - 5)
+    self.assertEqual(self.generate(), {"with_import.dbc": "generated"})
+    self.assertIn("COMMON_EDITED", self.output("with_import.dbc"))
+    self.assertNotIn("COMMON", self.output("without_import.dbc"))
+    self.assertEqual(self.generate(), {})
+
+  def test_touched_import(self):
+    # a newer but identical DBC regenerates to the same output, which is only touched
+    self.write("_common.dbc", 'BO_ 1 COMMON: 8 XXX\n', mtime=self.t - 5)
+    self.assertEqual(self.generate(), {"with_import.dbc": "unchanged"})
+    self.assertEqual(self.generate(), {})
+
+  def test_edited_script(self):
+    os.utime(generator.__file__, (self.t - 5, self.t - 5))
+    self.assertEqual(self.generate(), {"with_import.dbc": "unchanged", "without_import.dbc": "unchanged"})
+
+  def test_missing_output(self):
+    os.unlink(os.path.join(self.root, "without_import_generated.dbc"))
+    self.assertEqual(self.generate(), {"without_import.dbc": "generated"})
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -3,7 +3,7 @@
 cd ../../generator/
 
 # run generator
-./generator.py
+./generator.py --force
 
 if [ -n "$(git status --untracked-files=no --porcelain)" ]; then
   echo "Unexpected changes after running generator.py";
@@ -2,7 +2,7 @@
 
 import unittest
 
-from opendbc.can.parser import CANParser
+from opendbc.can.parser import CANParser, CANDemux
 from opendbc.can.packer import CANPacker
 import cereal.messaging as messaging
 
@@ -100,6 +100,101 @@ class TestCanParserPacker(unittest.TestCase):
 
         idx += 1
 
+  def test_values(self):
+    # the values array tracks vl, and is updated without vl when it is not tracked
+    dbc_file = "honda_civic_touring_2016_can_generated"
+
+    signals = [
+      ("STEER_TORQUE", "STEERING_CONTROL", 3),
+      ("STEER_TORQUE_REQUEST", "STEERING_CONTROL", 0),
+    ]
+
+    parser = CANParser(dbc_file, list(signals), [], 0)
+    plan = CANParser(dbc_file, list(signals), [], 0, track_vl=False)
+    packer = CANPacker(dbc_file)
+
+    steer_idx = plan.signal_index[("STEERING_CONTROL", "STEER_TORQUE")]
+    self.assertEqual(plan.signal_index[(0xe4, "STEER_TORQUE")], steer_idx)
+    self.assertEqual(plan.values[steer_idx], 3)
+    self.assertEqual(plan.vl["STEERING_CONTROL"], {})
+
+    for idx, steer in enumerate(range(-256, 255)):
+      msgs = packer.make_can_msg("STEERING_CONTROL", 0, {"STEER_TORQUE": steer, "STEER_TORQUE_REQUEST": 1}, idx)
+      bts = can_list_to_can_capnp([msgs])
+
+      self.assertEqual(plan.update_string(bts), parser.update_string(bts))
+      self.assertEqual(plan.values[steer_idx], steer)
+      for (msg, sig), i in parser.signal_index.items():
+        self.assertEqual(parser.vl[msg][sig], parser.values[i])
+
+    self.assertIs(parser.vl["STEERING_CONTROL"], parser.vl[0xe4])
+    self.assertEqual(plan.vl["STEERING_CONTROL"], {})
+
+  def test_prepared(self):
+    # prepared and batched packing match make_can_msg, with counters and checksums
+    cases = [
+      ("honda_civic_touring_2016_can_generated", "STEERING_CONTROL", ["STEER_TORQUE", "STEER_TORQUE_REQUEST"],
+       lambda idx, steer: [steer, idx % 2], True),
+      ("toyota_prius_2017_pt_generated", "STEERING_LKA", ["STEER_REQUEST", "STEER_TORQUE_CMD", "SET_ME_1", "COUNTER"],
+       lambda idx, steer: [idx % 2, steer, 1, idx % 64], False),
+      ("subaru_global_2017", "ES_LKAS", ["Counter", "LKAS_Output", "LKAS_Request", "SET_1"],
+       lambda idx, steer: [idx % 16, steer, idx % 2, 1], False),
+    ]
+
+    for dbc_file, msg, names, make_values, use_counter in cases:
+      packer = CANPacker(dbc_file)
+      prepared = packer.prepare(msg, names)
+      self.assertIs(packer.prepare(msg, tuple(names)), prepared)
+
+      batch, expected = [], []
+      for idx, steer in enumerate(range(-256, 255)):
+        values = make_values(idx, steer)
+        counter = idx if use_counter else -1
+        expected.append(packer.make_can_msg(msg, 0, dict(zip(names, values)), counter))
+        batch.append((prepared, 0, values, counter))
+        self.assertEqual(packer.make_prepared_msg(*batch[-1]), expected[-1])
+
+      self.assertEqual(packer.make_can_msgs(batch), expected)
+
+    with self.assertRaises(ValueError):
+      packer.prepare("ES_LKAS", ["NOT_A_SIGNAL"])
+    with self.assertRaises(ValueError):
+      packer.make_prepared_msg(prepared, 0, [1])
+    with self.assertRaises(ValueError):
+      CANPacker(dbc_file).make_prepared_msg(prepared, 0, [0, 0, 0, 1])
+
+  def test_demux(self):
+    # parsers updated through a demux match parsers updated on their own
+    dbc_file = "honda_civic_touring_2016_can_generated"
+
+    signals = [
+      ("STEER_TORQUE", "STEERING_CONTROL", 0),
+      ("STEER_TORQUE_REQUEST", "STEERING_CONTROL", 0),
+    ]
+    checks = [("STEERING_CONTROL", 100)]
+
+    parsers = [CANParser(dbc_file, list(signals), list(checks), bus) for bus in [0, 2]]
+    demuxed = [CANParser(dbc_file, list(signals), list(checks), bus) for bus in [0, 2]]
+    demux = CANDemux(demuxed)
+    packer = CANPacker(dbc_file)
+
+    for idx, steer in enumerate(range(-256, 255)):
+      # the bus 2 parsers get nothing for a while
+      buses = [0, 1] if 100 <= idx < 200 else [0, 1, 2]
+      msgs = [packer.make_can_msg("STEERING_CONTROL", bus, {"STEER_TORQUE": steer + bus, "STEER_TORQUE_REQUEST": 1}, idx)
+              for bus in buses]
+      bts = can_list_to_can_capnp(msgs)
+
+      expected = [parser.update_strings([bts]) for parser in parsers]
+      self.assertEqual(demux.update_strings([bts]), expected)
+
+      for parser, d in zip(parsers, demuxed):
+        self.assertEqual(parser.vl["STEERING_CONTROL"], d.vl["STEERING_CONTROL"])
+        self.assertEqual(parser.can_valid, d.can_valid)
+
+    self.assertAlmostEqual(demuxed[0].vl["STEERING_CONTROL"]["STEER_TORQUE"], 254)
+    self.assertAlmostEqual(demuxed[1].vl["STEERING_CONTROL"]["STEER_TORQUE"], 256)
+
 
 if __name__ == "__main__":
   unittest.main()
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 import os
 import re
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 cur_path = os.path.dirname(os.path.realpath(__file__))
 generator_path = os.path.join(cur_path, '../')
@@ -12,38 +14,89 @@ def read_dbc(dir_name, filename):
         return file_in.read()
 
 
+def output_path(filename):
+    return os.path.join(generator_path, filename.replace('.dbc', '_generated.dbc'))
+
+
+def dependencies(dir_name, filename):
+    """The files an output is generated from: the DBC, the DBCs it imports and this script."""
+    includes = include_pattern.findall(read_dbc(dir_name, filename))
+    return [os.path.join(dir_name, f) for f in [filename] + includes] + [os.path.realpath(__file__)]
+
+
+def is_stale(dir_name, filename):
+    try:
+        out_mtime = os.path.getmtime(output_path(filename))
+    except OSError:
+        return True
+    return any(os.path.getmtime(dep) > out_mtime for dep in dependencies(dir_name, filename))
+
+
 def create_dbc(dir_name, filename):
     dbc_file_in = read_dbc(dir_name, filename)
 
     includes = include_pattern.findall(dbc_file_in)
 
-    output_filename = filename.replace('.dbc', '_generated.dbc')
-    output_file_location = os.path.join(generator_path, output_filename)
+    output_file_location = output_path(filename)
+
+    dbc_file_out = ['CM_ "AUTOGENERATED FILE, DO NOT EDIT"\n']
 
-    with open(output_file_location, 'w') as dbc_file_out:
-        dbc_file_out.write('CM_ "AUTOGENERATED FILE, DO NOT EDIT"\n')
+    for include_filename in reversed(includes):
+        include_file_header = '\n\nCM_ "Imported file %s starts here"\n' % include_filename
+        dbc_file_out.append(include_file_header)
 
-        for include_filename in reversed(includes):
-            include_file_header = '\n\nCM_ "Imported file %s starts here"\n' % include_filename
-            dbc_file_out.write(include_file_header)
+        include_file = read_dbc(dir_name, include_filename)
+        dbc_file_out.append(include_file)
 
-            include_file = read_dbc(dir_name, include_filename)
-            dbc_file_out.write(include_file)
+    dbc_file_out.append('\nCM_ "%s starts here"\n' % filename)
 
-        dbc_file_out.write('\nCM_ "%s starts here"\n' % filename)
+    core_dbc = include_pattern.sub('', dbc_file_in)
+    dbc_file_out.append(core_dbc)
+    dbc_file_out = ''.join(dbc_file_out)
 
-        core_dbc = include_pattern.sub('', dbc_file_in)
-        dbc_file_out.write(core_dbc)
+    # unchanged outputs are only touched, so nothing downstream rebuilds
+    try:
+        with open(output_file_location) as f:
+            unchanged = f.read() == dbc_file_out
+    except OSError:
+        unchanged = False
 
+    if unchanged:
+        os.utime(output_file_location)
+    else:
+        with open(output_file_location, 'w') as f:
+            f.write(dbc_file_out)
+    return filename, not unchanged
 
-for dir_name, _, filenames in os.walk(cur_path):
-    if dir_name == cur_path:
-        continue
 
-    print(dir_name)
-    for filename in filenames:
-        if filename.startswith('_'):
+def main():
+    parser = argparse.ArgumentParser(description='Generate the *_generated.dbc files from the DBCs and the files they import')
+    parser.add_argument('--force', action='store_true', help='regenerate every output, not only the stale ones')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help='number of DBCs generated in parallel')
+    args = parser.parse_args()
+
+    jobs = []
+    for dir_name, _, filenames in os.walk(cur_path):
+        if dir_name == cur_path:
             continue
 
-        print(filename)
-        create_dbc(dir_name, filename)
+        for filename in sorted(filenames):
+            if filename.startswith('_'):
+                continue
+
+            if args.force or is_stale(dir_name, filename):
+                jobs.append((dir_name, filename))
+
+    # the DBCs are independent, only spawn workers when there is more than one to generate
+    if args.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            results = list(executor.map(create_dbc, *zip(*jobs)))
+    else:
+        results = [create_dbc(*job) for job in jobs]
+
+    for filename, changed in results:
+        print('%s %s' % ('generated' if changed else 'unchanged', filename))
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,7 @@ import hashlib
 import socket
 import usb1
 import os
+import numpy as np
 import time
 import traceback
 import subprocess
@@ -33,22 +34,67 @@ def build_st(target, mkfile="Makefile", clean=True):
   except subprocess.CalledProcessError:
     raise
 
+# CAN messages are exchanged over USB as 16 byte records
+CAN_RECORD = np.dtype([('rir', '<u4'), ('info', '<u4'), ('dat', 'u1', (8,))])
+CAN_MSG = np.dtype([('address', '<u4'), ('busTime', '<u2'), ('src', 'u1'), ('len', 'u1'), ('dat', 'u1', (8,))])
+CAN_RECV_SIZE = 0x10*256
+
+def parse_can_array(dat):
+  """Parse a buffer of USB CAN records into a CAN_MSG array in one pass."""
+  rec = np.frombuffer(dat, dtype=CAN_RECORD, count=len(dat) // CAN_RECORD.itemsize)
+  ret = np.empty(len(rec), dtype=CAN_MSG)
+  extended = 4
+  ret['address'] = np.where(rec['rir'] & extended, rec['rir'] >> 3, rec['rir'] >> 21)
+  ret['busTime'] = rec['info'] >> 16
+  ret['src'] = (rec['info'] >> 4) & 0xFF
+  # a corrupt length can't index past the 8 data bytes
+  ret['len'] = np.minimum(rec['info'] & 0xF, 8)
+  ret['dat'] = rec['dat']
+  return ret
+
 def parse_can_buffer(dat):
-  ret = []
-  for j in range(0, len(dat), 0x10):
-    ddat = dat[j:j+0x10]
-    f1, f2 = struct.unpack("II", ddat[0:8])
-    extended = 4
-    if f1 & extended:
-      address = f1 >> 3
-    else:
-      address = f1 >> 21
-    dddat = ddat[8:8+(f2&0xF)]
-    if DEBUG:
+  msgs = parse_can_array(dat)
+  dat = bytes(dat)
+  dats = [dat[j:j+l] for j, l in zip(range(8, len(dat), 0x10), msgs['len'].tolist())]
+  ret = list(zip(msgs['address'].tolist(), msgs['busTime'].tolist(), dats, msgs['src'].tolist()))
+  if DEBUG:
+    for address, _, dddat, _ in ret:
       print("  R %x: %s" % (address, binascii.hexlify(dddat)))
-    ret.append((address, f2>>16, dddat, (f2>>4)&0xFF))
   return ret
 
+def pack_can_buffer(arr):
+  """Pack (addr, _, dat, bus) messages into USB CAN records in one pass."""
+  if len(arr) == 0:
+    return b''
+  addrs, _, dats, buses = zip(*arr)
+  addr = np.array(addrs, dtype=np.uint32)
+  length = np.fromiter(map(len, dats), dtype=np.uint32, count=len(dats))
+  assert np.all(length <= 8)
+  assert np.all(addr < 1 << 29)
+
+  transmit = 1
+  extended = 4
+  rec = np.empty(len(arr), dtype=CAN_RECORD)
+  rec['rir'] = np.where(addr >= 0x800, (addr << 3) | transmit | extended, (addr << 21) | transmit)
+  rec['info'] = length | (np.array(buses, dtype=np.uint32) << 4)
+  rec['dat'] = np.frombuffer(b''.join([d.ljust(8, b'\x00') for d in dats]), dtype=np.uint8).reshape(-1, 8)
+
+  if DEBUG:
+    for addr, _, dat, _ in arr:
+      print("  W %x: %s" % (addr, binascii.hexlify(dat)))
+  return rec.tobytes()
+
+def pack_can_array(msgs):
+  """Pack a CAN_MSG array into USB CAN records."""
+  transmit = 1
+  extended = 4
+  rec = np.empty(len(msgs), dtype=CAN_RECORD)
+  addr = msgs['address']
+  rec['rir'] = np.where(addr >= 0x800, (addr << 3) | transmit | extended, (addr << 21) | transmit)
+  rec['info'] = msgs['len'].astype(np.uint32) | (msgs['src'].astype(np.uint32) << 4)
+  rec['dat'] = msgs['dat']
+  return rec.tobytes()
+
 class PandaWifiStreaming(object):
   def __init__(self, ip="192.168.0.10", port=1338):
     self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -476,29 +522,17 @@ class Panda(object):
   # ******************* can *******************
 
   def can_send_many(self, arr):
-    snds = []
-    transmit = 1
-    extended = 4
-    for addr, _, dat, bus in arr:
-      assert len(dat) <= 8
-      if DEBUG:
-        print("  W %x: %s" % (addr, binascii.hexlify(dat)))
-      if addr >= 0x800:
-        rir = (addr << 3) | transmit | extended
-      else:
-        rir = (addr << 21) | transmit
-      snd = struct.pack("II", rir, len(dat) | (bus << 4)) + dat
-      snd = snd.ljust(0x10, b'\x00')
-      snds.append(snd)
+    # arr is a list of (addr, _, dat, bus) or a CAN_MSG array
+    snds = pack_can_array(arr) if isinstance(arr, np.ndarray) else pack_can_buffer(arr)
 
     while True:
       try:
-        #print("DAT: %s"%b''.join(snds).__repr__())
+        #print("DAT: %s"%snds.__repr__())
         if self.wifi:
-          for s in snds:
-            self._handle.bulkWrite(3, s)
+          for i in range(0, len(snds), 0x10):
+            self._handle.bulkWrite(3, snds[i:i+0x10])
         else:
-          self._handle.bulkWrite(3, b''.join(snds))
+          self._handle.bulkWrite(3, snds)
         break
       except (usb1.USBErrorIO, usb1.USBErrorOverflow):
         print("CAN: BAD SEND MANY, RETRYING")
@@ -506,16 +540,20 @@ class Panda(object):
   def can_send(self, addr, dat, bus):
     self.can_send_many([[addr, None, dat, bus]])
 
-  def can_recv(self):
-    dat = bytearray()
+  def _can_read(self):
     while True:
       try:
-        dat = self._handle.bulkRead(1, 0x10*256)
-        break
+        return self._handle.bulkRead(1, CAN_RECV_SIZE)
       except (usb1.USBErrorIO, usb1.USBErrorOverflow):
         print("CAN: BAD RECV, RETRYING")
         time.sleep(0.1)
-    return parse_can_buffer(dat)
+
+  def can_recv(self):
+    return parse_can_buffer(self._can_read())
+
+  def can_recv_array(self):
+    """Same as can_recv, but returns the messages as a CAN_MSG array."""
+    return parse_can_array(self._can_read())
 
   def can_clear(self, bus):
     """Clears all messages from the specified internal CAN ringbuffer as
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import time
 import struct
+from collections import defaultdict, deque
 from typing import Callable, NamedTuple, Tuple, List
 from enum import IntEnum
 
@@ -335,24 +336,43 @@ class CanClient():
       first = False
 
 
+def st_min_to_seconds(st_min: int) -> float:
+  # 0x00-0x7F are milliseconds, 0xF1-0xF9 100-900 microseconds and the rest is reserved
+  if st_min <= 0x7F:
+    return st_min / 1000.
+  if 0xF1 <= st_min <= 0xF9:
+    return (st_min - 0xF0) / 10000.
+  return 0.127
+
 class IsoTpMessage():
   def __init__(self, can_client: CanClient, timeout: float=1, debug: bool=False, max_len: int=8):
     self._can_client = can_client
     self.timeout = timeout
     self.debug = debug
     self.max_len = max_len
+    # reassembly buffer, reused between messages and only grown for longer ones
+    self._rx_buf = bytearray(0x100)
+    # frames received after a complete message, e.g. the response following a response pending
+    self._rx_queue = deque()
 
   def send(self, dat: bytes) -> None:
     # throw away any stale data
     self._can_client.recv(drain=True)
+    self._rx_queue.clear()
 
     self.tx_dat = dat
     self.tx_len = len(dat)
+    self.tx_pos = 0
     self.tx_idx = 0
     self.tx_done = False
+    # consecutive frames up to tx_block_end may be sent, one every tx_delay seconds
+    self.tx_block_end = 0
+    self.tx_delay = 0.
+    self.tx_next = 0.
 
     self.rx_dat = b""
     self.rx_len = 0
+    self.rx_pos = 0
     self.rx_idx = 0
     self.rx_done = False
 
@@ -360,23 +380,54 @@ class IsoTpMessage():
     self._tx_first_frame()
 
   def _tx_first_frame(self) -> None:
-    if self.tx_len < 8:
+    if self.tx_len < self.max_len:
       # single frame (send all bytes)
       if self.debug: print("ISO-TP: TX - single frame")
       msg = (bytes([self.tx_len]) + self.tx_dat).ljust(self.max_len, b"\x00")
+      self.tx_pos = self.tx_len
       self.tx_done = True
     else:
-      # first frame (send first 6 bytes)
+      # first frame (send as many bytes as fit after the length)
       if self.debug: print("ISO-TP: TX - first frame")
-      msg = (struct.pack("!H", 0x1000 | self.tx_len) + self.tx_dat[:6]).ljust(self.max_len, b"\x00")
+      if self.tx_len <= 0xFFF:
+        header = struct.pack("!H", 0x1000 | self.tx_len)
+      else:
+        # escape sequence for messages over 4095 bytes
+        header = struct.pack("!HI", 0x1000, self.tx_len)
+      self.tx_pos = self.max_len - len(header)
+      msg = header + self.tx_dat[:self.tx_pos]
     self._can_client.send([msg])
 
+  def _tx_consecutive_frames(self) -> None:
+    # send the consecutive frames that are due, the separation time is kept by
+    # scheduling the next frame instead of sleeping
+    if self.tx_pos >= self.tx_block_end or time.monotonic() < self.tx_next:
+      return
+
+    num_bytes = self.max_len - 1
+    tx_msgs = []
+    while self.tx_pos < self.tx_block_end:
+      self.tx_idx += 1
+      msg = bytes([0x20 | (self.tx_idx & 0xF)]) + self.tx_dat[self.tx_pos:self.tx_pos+num_bytes]
+      tx_msgs.append(msg.ljust(self.max_len, b"\x00"))
+      self.tx_pos = min(self.tx_pos + num_bytes, self.tx_len)
+      if self.tx_delay > 0:
+        break
+
+    self._can_client.send(tx_msgs)
+    self.tx_next = time.monotonic() + self.tx_delay
+    if self.tx_pos >= self.tx_len:
+      self.tx_done = True
+    if self.debug: print(f"ISO-TP: TX - consecutive frame - idx={self.tx_idx} done={self.tx_done}")
+
   def recv(self) -> bytes:
     start_time = time.time()
     try:
       while True:
-        for msg in self._can_client.recv():
-          self._isotp_rx_next(msg)
+        self._tx_consecutive_frames()
+        self._rx_queue.extend(self._can_client.recv())
+        while len(self._rx_queue):
+          self._isotp_rx_next(self._rx_queue.popleft())
           if self.tx_done and self.rx_done:
             return self.rx_dat
         # no timeout indicates non-blocking
@@ -400,7 +451,16 @@ class IsoTpMessage():
     # first rx_frame
     if rx_data[0] >> 4 == 0x1:
       self.rx_len = ((rx_data[0] & 0x0F) << 8) + rx_data[1]
-      self.rx_dat = rx_data[2:]
+      start = 2
+      if self.rx_len == 0:
+        # escape sequence for messages over 4095 bytes
+        self.rx_len = struct.unpack("!I", rx_data[2:6])[0]
+        start = 6
+      if len(self._rx_buf) < self.rx_len:
+        self._rx_buf = bytearray(self.rx_len)
+      self.rx_pos = min(len(rx_data) - start, self.rx_len)
+      self._rx_buf[:self.rx_pos] = rx_data[start:start+self.rx_pos]
+      self.rx_dat = b""
       self.rx_idx = 0
       self.rx_done = False
       if self.debug: print(f"ISO-TP: RX - first frame - idx={self.rx_idx} done={self.rx_done}")
@@ -415,9 +475,11 @@ class IsoTpMessage():
       assert self.rx_done == False, "isotp - rx: consecutive frame with no active frame"
       self.rx_idx += 1
       assert self.rx_idx & 0xF == rx_data[0] & 0xF, "isotp - rx: invalid consecutive frame index"
-      rx_size = self.rx_len - len(self.rx_dat)
-      self.rx_dat += rx_data[1:1+rx_size]
-      if self.rx_len == len(self.rx_dat):
+      rx_size = min(len(rx_data) - 1, self.rx_len - self.rx_pos)
+      self._rx_buf[self.rx_pos:self.rx_pos+rx_size] = rx_data[1:1+rx_size]
+      self.rx_pos += rx_size
+      if self.rx_len == self.rx_pos:
+        self.rx_dat = bytes(self._rx_buf[:self.rx_len])
         self.rx_done = True
       if self.debug: print(f"ISO-TP: RX - consecutive frame - idx={self.rx_idx} done={self.rx_done}")
       return
@@ -429,31 +491,18 @@ class IsoTpMessage():
       assert rx_data[0] == 0x30 or rx_data[0] == 0x31, "isotp - rx: flow-control transfer state indicator invalid"
       if rx_data[0] == 0x30:
         if self.debug: print("ISO-TP: RX - flow control continue")
-        delay_ts = rx_data[2] & 0x7F
-        # scale is 1 milliseconds if first bit == 0, 100 micro seconds if first bit == 1
-        delay_div = 1000. if rx_data[2] & 0x80 == 0 else 10000.
-        delay_sec = delay_ts / delay_div
-
-        # first frame = 6 bytes, each consecutive frame = 7 bytes
+        # block size of 0 sends everything, otherwise wait for flow control after every block
+        block_size = rx_data[1]
         num_bytes = self.max_len - 1
-        start = 6 + self.tx_idx * num_bytes
-        count = rx_data[1]
-        end = start + count * num_bytes if count > 0 else self.tx_len
-        tx_msgs = []
-        for i in range(start, end, num_bytes):
-          self.tx_idx += 1
-          # consecutive tx messages
-          msg = (bytes([0x20 | (self.tx_idx & 0xF)]) + self.tx_dat[i:i+num_bytes]).ljust(self.max_len, b"\x00")
-          tx_msgs.append(msg)
-        # send consecutive tx messages
-        self._can_client.send(tx_msgs, delay=delay_sec)
-        if end >= self.tx_len:
-          self.tx_done = True
-        if self.debug: print(f"ISO-TP: TX - consecutive frame - idx={self.tx_idx} done={self.tx_done}")
+        self.tx_block_end = self.tx_len if block_size == 0 else min(self.tx_pos + block_size * num_bytes, self.tx_len)
+        # the separation time also holds across blocks
+        self.tx_delay = st_min_to_seconds(rx_data[2])
+        self._tx_consecutive_frames()
       elif rx_data[0] == 0x31:
         # wait (do nothing until next flow control message)
         if self.debug: print("ISO-TP: TX - flow control wait")
 
+
 FUNCTIONAL_ADDRS = [0x7DF, 0x18DB33F1]
 
 def get_rx_addr_for_tx_addr(tx_addr):
@@ -471,6 +520,141 @@ def get_rx_addr_for_tx_addr(tx_addr):
   raise ValueError("invalid tx_addr: {}".format(tx_addr))
 
 
+def _uds_request_bytes(service_type: SERVICE_TYPE, subfunction: int=None, data: bytes=None) -> bytes:
+  req = bytes([service_type])
+  if subfunction is not None:
+    req += bytes([subfunction])
+  if data is not None:
+    req += data
+  return req
+
+def _uds_response(service_type: SERVICE_TYPE, subfunction: int, resp: bytes, debug: bool=False) -> bytes:
+  """Check a response, returns its data or None when the ECU signalled the response is pending"""
+  resp_sid = resp[0] if len(resp) > 0 else None
+
+  # negative response
+  if resp_sid == 0x7F:
+    service_id = resp[1] if len(resp) > 1 else -1
+    try:
+      service_desc = SERVICE_TYPE(service_id).name
+    except BaseException:
+      service_desc = 'NON_STANDARD_SERVICE'
+    error_code = resp[2] if len(resp) > 2 else -1
+    try:
+      error_desc = _negative_response_codes[error_code]
+    except BaseException:
+      error_desc = resp[3:]
+    # wait for another message if response pending
+    if error_code == 0x78:
+      if debug: print("UDS-RX: response pending")
+      return None
+    raise NegativeResponseError('{} - {}'.format(service_desc, error_desc), service_id, error_code)
+
+  # positive response
+  if service_type+0x40 != resp_sid:
+    resp_sid_hex = hex(resp_sid) if resp_sid is not None else None
+    raise InvalidServiceIdError('invalid response service id: {}'.format(resp_sid_hex))
+
+  if subfunction is not None:
+    resp_sfn = resp[1] if len(resp) > 1 else None
+    if subfunction != resp_sfn:
+      resp_sfn_hex = hex(resp_sfn) if resp_sfn is not None else None
+      raise InvalidSubFunctioneError('invalid response subfunction: {}'.format(hex(resp_sfn_hex)))
+
+  # return data (exclude service id and sub-function id)
+  return resp[(1 if subfunction is None else 2):]
+
+
+class UdsRequestMultiplexer():
+  """Keeps UDS requests to many ECUs in flight at once on one panda.
+
+  Requests to the same ECU are sent one after the other, requests to different
+  ECUs at the same time. Every loop reads the panda once and routes the frames
+  to the ISO-TP transport of the ECU they came from, so no request blocks the
+  others while waiting for a response or for the separation time between its
+  consecutive frames."""
+
+  def __init__(self, panda, bus: int=0, timeout: float=1, debug: bool=False):
+    self.panda = panda
+    self.bus = bus
+    self.timeout = timeout
+    self.debug = debug
+
+    self._queues = defaultdict(deque)
+    self._msg_buffer = defaultdict(list)
+    self._transports = {}
+    self._next_id = 0
+
+  def request(self, tx_addr: int, service_type: SERVICE_TYPE, subfunction: int=None, data: bytes=None, rx_addr: int=None, sub_addr: int=None) -> int:
+    """Queue a request, returns the id its result is stored under by run"""
+    rx_addr = rx_addr if rx_addr is not None else get_rx_addr_for_tx_addr(tx_addr)
+    req_id = self._next_id
+    self._next_id += 1
+    self._queues[(rx_addr, sub_addr)].append((req_id, tx_addr, service_type, subfunction, _uds_request_bytes(service_type, subfunction, data)))
+    return req_id
+
+  def _transport(self, key, tx_addr):
+    # one transport per ECU, so its reassembly buffer is reused between requests
+    rx_addr, sub_addr = key
+    if (key, tx_addr) not in self._transports:
+      can_client = CanClient(self.panda.can_send, lambda: self._msg_buffer.pop(key, []), tx_addr, rx_addr, self.bus, sub_addr=sub_addr, debug=self.debug)
+      self._transports[(key, tx_addr)] = IsoTpMessage(can_client, timeout=0, debug=self.debug, max_len=8 if sub_addr is None else 7)
+    return self._transports[(key, tx_addr)]
+
+  def _rx(self, active) -> None:
+    for msg in self.panda.can_recv():
+      addr, dat, bus = msg[0], msg[2], msg[3]
+      if bus != self.bus:
+        continue
+      if (addr, None) in active:
+        self._msg_buffer[(addr, None)].append(msg)
+      elif len(dat) and (addr, dat[0]) in active:
+        self._msg_buffer[(addr, dat[0])].append(msg)
+
+  def run(self) -> dict:
+    """Send all queued requests. Returns the response data of every request by
+    id, or the exception the request failed with."""
+    results = {}
+    # (rx addr, sub addr) -> [request, transport, deadline]
+    active = {}
+
+    def start_next(key):
+      if len(self._queues[key]):
+        req = self._queues[key].popleft()
+        isotp_msg = self._transport(key, req[1])
+        isotp_msg.send(req[4])
+        active[key] = [req, isotp_msg, time.monotonic() + self.timeout]
+
+    for key in list(self._queues):
+      start_next(key)
+
+    while len(active):
+      self._rx(active)
+
+      t = time.monotonic()
+      for key, (req, isotp_msg, deadline) in list(active.items()):
+        req_id, _, service_type, subfunction, _ = req
+        try:
+          resp = isotp_msg.recv()
+          if resp is None:
+            if t > deadline:
+              raise MessageTimeoutError("timeout waiting for response")
+            continue
+
+          resp = _uds_response(service_type, subfunction, resp, self.debug)
+          if resp is None:
+            active[key][2] = t + self.timeout
+            continue
+          results[req_id] = resp
+        except Exception as e:
+          results[req_id] = e
+
+        del active[key]
+        start_next(key)
+
+    return results
+
+
 class UdsClient():
   def __init__(self, panda, tx_addr: int, rx_addr: int=None, bus: int=0, timeout: float=1, debug: bool=False):
     self.bus = bus
@@ -479,53 +663,20 @@ class UdsClient():
     self.timeout = timeout
     self.debug = debug
     self._can_client = CanClient(panda.can_send, panda.can_recv, self.tx_addr, self.rx_addr, self.bus, debug=self.debug)
+    self._isotp_msg = IsoTpMessage(self._can_client, self.timeout, self.debug)
 
   # generic uds request
   def _uds_request(self, service_type: SERVICE_TYPE, subfunction: int=None, data: bytes=None) -> bytes:
-    req = bytes([service_type])
-    if subfunction is not None:
-      req += bytes([subfunction])
-    if data is not None:
-      req += data
+    req = _uds_request_bytes(service_type, subfunction, data)
 
     # send request, wait for response
-    isotp_msg = IsoTpMessage(self._can_client, self.timeout, self.debug)
+    isotp_msg = self._isotp_msg
+    isotp_msg.timeout = self.timeout
     isotp_msg.send(req)
     while True:
-      resp = isotp_msg.recv()
-      resp_sid = resp[0] if len(resp) > 0 else None
-
-      # negative response
-      if resp_sid == 0x7F:
-        service_id = resp[1] if len(resp) > 1 else -1
-        try:
-          service_desc = SERVICE_TYPE(service_id).name
-        except BaseException:
-          service_desc = 'NON_STANDARD_SERVICE'
-        error_code = resp[2] if len(resp) > 2 else -1
-        try:
-          error_desc = _negative_response_codes[error_code]
-        except BaseException:
-          error_desc = resp[3:]
-        # wait for another message if response pending
-        if error_code == 0x78:
-          if self.debug: print("UDS-RX: response pending")
-          continue
-        raise NegativeResponseError('{} - {}'.format(service_desc, error_desc), service_id, error_code)
-
-      # positive response
-      if service_type+0x40 != resp_sid:
-        resp_sid_hex = hex(resp_sid) if resp_sid is not None else None
-        raise InvalidServiceIdError('invalid response service id: {}'.format(resp_sid_hex))
-
-      if subfunction is not None:
-        resp_sfn = resp[1] if len(resp) > 1 else None
-        if subfunction != resp_sfn:
-          resp_sfn_hex = hex(resp_sfn) if resp_sfn is not None else None
-          raise InvalidSubFunctioneError('invalid response subfunction: {}'.format(hex(resp_sfn_hex)))
-
-      # return data (exclude service id and sub-function id)
-      return resp[(1 if subfunction is None else 2):]
+      resp = _uds_response(service_type, subfunction, isotp_msg.recv(), self.debug)
+      if resp is not None:
+        return resp
 
   # services
   def diagnostic_session_control(self, session_type: SESSION_TYPE):
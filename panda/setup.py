@@ -47,6 +47,7 @@ setup(
   license='MIT',
   install_requires=[
     'libusb1 == 1.6.6',
+    'numpy',
     'hexdump >= 3.3',
     'pycrypto >= 2.6.1',
     'tqdm >= 4.14.0',
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import random
+import struct
+import unittest
+
+import numpy as np
+
+from panda.python import CAN_MSG, parse_can_array, parse_can_buffer, pack_can_buffer, pack_can_array
+
+
+def parse_can_buffer_struct(dat):
+  # the per message struct parsing parse_can_buffer replaced
+  ret = []
+  for j in range(0, len(dat), 0x10):
+    ddat = dat[j:j+0x10]
+    f1, f2 = struct.unpack("II", ddat[0:8])
+    extended = 4
+    if f1 & extended:
+      address = f1 >> 3
+    else:
+      address = f1 >> 21
+    ret.append((address, f2>>16, ddat[8:8+(f2&0xF)], (f2>>4)&0xFF))
+  return ret
+
+def random_msgs(n):
+  msgs = []
+  for _ in range(n):
+    addr = random.randrange(0x800) if random.random() < 0.5 else random.randrange(0x800, 1 << 29)
+    dat = bytes(random.randrange(256) for _ in range(random.randrange(9)))
+    msgs.append((addr, 0, dat, random.randrange(3)))
+  return msgs
+
+
+class TestCanBuffer(unittest.TestCase):
+  def test_parse_random_records(self):
+    random.seed(0)
+    for _ in range(100):
+      # any rir, info and data, including extended addresses and lengths over 8
+      dat = bytes(random.randrange(256) for _ in range(0x10 * random.randrange(64)))
+      self.assertEqual(parse_can_buffer(dat), parse_can_buffer_struct(dat))
+
+  def test_pack_buffer(self):
+    random.seed(0)
+    msgs = random_msgs(200)
+    buf = pack_can_buffer(msgs)
+    self.assertEqual(len(buf), 0x10 * len(msgs))
+    self.assertEqual(parse_can_buffer(buf), msgs)
+
+    ret = parse_can_array(buf)
+    self.assertEqual(ret['address'].tolist(), [m[0] for m in msgs])
+    self.assertEqual(ret['src'].tolist(), [m[3] for m in msgs])
+    self.assertEqual([bytes(d[:l]) for d, l in zip(ret['dat'], ret['len'])], [m[2] for m in msgs])
+
+  def test_pack_array(self):
+    random.seed(0)
+    msgs = parse_can_array(pack_can_buffer(random_msgs(200)))
+    buf = pack_can_array(msgs)
+    self.assertEqual(buf, pack_can_buffer(parse_can_buffer(buf)))
+    np.testing.assert_array_equal(parse_can_array(buf), msgs)
+
+  def test_empty(self):
+    self.assertEqual(pack_can_buffer([]), b'')
+    self.assertEqual(pack_can_array(np.empty(0, dtype=CAN_MSG)), b'')
+    self.assertEqual(parse_can_buffer(b''), [])
+    self.assertEqual(len(parse_can_array(b'')), 0)
+
+  def test_invalid(self):
+    with self.assertRaises(AssertionError):
+      pack_can_buffer([(0x100, 0, b'\x00' * 9, 0)])
+    with self.assertRaises(AssertionError):
+      pack_can_buffer([(1 << 29, 0, b'', 0)])
+
+
+if __name__ == "__main__":
+  unittest.main()
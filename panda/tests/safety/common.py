@@ -1,7 +1,15 @@
+import numpy as np
 from panda.tests.safety import libpandasafety_py
+from panda.tests.safety.torque_model import SAMPLE_SIZE, FRAME_TS, generate_torque_sequences, limit_torque_sequences, registers_to_dat, \
+                                           torque_bounds
 
 MAX_WRONG_COUNTERS = 5
 
+# hooks for safety_hooks_batch
+HOOK_RX = 0
+HOOK_TX = 1
+HOOK_FWD = 2
+
 def make_msg(bus, addr, length=8):
   to_send = libpandasafety_py.ffi.new('CAN_FIFOMailBox_TypeDef *')
   if addr >= 0x800:
@@ -13,6 +21,58 @@ def make_msg(bus, addr, length=8):
 
   return to_send
 
+def run_hooks_batch(safety, hook, addr, bus, length=8, dat=None, ts=None):
+  # runs all messages through the safety hooks with a single call into libpandasafety,
+  # scalar arguments are broadcast. Returns the hook results and controls_allowed after each msg
+  addr = np.ascontiguousarray(addr, dtype=np.uint32)
+  n = len(addr)
+  hook = np.ascontiguousarray(np.broadcast_to(hook, n), dtype=np.uint8)
+  bus = np.ascontiguousarray(np.broadcast_to(bus, n), dtype=np.uint8)
+  length = np.ascontiguousarray(np.broadcast_to(length, n), dtype=np.uint8)
+  if dat is None:
+    dat = np.zeros((n, 8), dtype=np.uint8)
+  dat = np.ascontiguousarray(dat, dtype=np.uint8)
+
+  ret = np.zeros(n, dtype=np.intc)
+  controls_allowed = np.zeros(n, dtype=np.uint8)
+
+  ffi = libpandasafety_py.ffi
+  ts_ptr = ffi.NULL
+  if ts is not None:
+    ts = np.ascontiguousarray(np.broadcast_to(ts, n), dtype=np.uint32)
+    ts_ptr = ffi.from_buffer("uint32_t[]", ts)
+
+  safety.safety_hooks_batch(n, ffi.from_buffer("uint8_t[]", hook), ts_ptr,
+                            ffi.from_buffer("uint32_t[]", addr), ffi.from_buffer("uint8_t[]", bus),
+                            ffi.from_buffer("uint8_t[]", length), ffi.from_buffer("uint8_t[]", dat),
+                            ffi.from_buffer("int[]", ret), ffi.from_buffer("uint8_t[]", controls_allowed))
+  return ret, controls_allowed.astype(bool)
+
+class MsgBatch():
+  """Collects messages to be run through the safety hooks in one batched call."""
+  def __init__(self):
+    self.hook = []
+    self.ts = []
+    self.addr = []
+    self.bus = []
+    self.len = []
+    self.dat = bytearray()
+
+  def __len__(self):
+    return len(self.addr)
+
+  def add(self, hook, addr, bus, dat, ts=0):
+    self.hook.append(hook)
+    self.ts.append(ts)
+    self.addr.append(addr)
+    self.bus.append(bus)
+    self.len.append(len(dat))
+    self.dat += dat.ljust(8, b'\x00')
+
+  def run(self, safety):
+    dat = np.frombuffer(bytes(self.dat), dtype=np.uint8).reshape(-1, 8)
+    return run_hooks_batch(safety, self.hook, self.addr, self.bus, self.len, dat, self.ts)
+
 def test_relay_malfunction(test, addr):
   # input is a test class and the address that, if seen on bus 0, triggers
   # the relay_malfunction protection logic: both tx_hook and fwd_hook are
@@ -20,10 +80,11 @@ def test_relay_malfunction(test, addr):
   test.assertFalse(test.safety.get_relay_malfunction())
   test.safety.safety_rx_hook(make_msg(0, addr, 8))
   test.assertTrue(test.safety.get_relay_malfunction())
-  for a in range(1, 0x800):
-    for b in range(0, 3):
-      test.assertFalse(test.safety.safety_tx_hook(make_msg(b, a, 8)))
-      test.assertEqual(-1, test.safety.safety_fwd_hook(b, make_msg(b, a, 8)))
+  addrs, buses = [a.ravel() for a in np.meshgrid(np.arange(1, 0x800), np.arange(0, 3), indexing='ij')]
+  tx, _ = run_hooks_batch(test.safety, HOOK_TX, addrs, buses)
+  fwd, _ = run_hooks_batch(test.safety, HOOK_FWD, addrs, buses)
+  test.assertFalse(np.any(tx), "tx allowed for %s" % list(zip(addrs[tx != 0], buses[tx != 0])))
+  test.assertTrue(np.all(fwd == -1), "fwd allowed for %s" % list(zip(addrs[fwd != -1], buses[fwd != -1])))
 
 def test_manually_enable_controls_allowed(test):
   test.safety.set_controls_allowed(1)
@@ -32,7 +93,57 @@ def test_manually_enable_controls_allowed(test):
   test.assertFalse(test.safety.get_controls_allowed())
 
 def test_spam_can_buses(test, TX_MSGS):
-  for addr in range(1, 0x800):
-    for bus in range(0, 4):
-      if all(addr != m[0] or bus != m[1] for m in TX_MSGS):
-        test.assertFalse(test.safety.safety_tx_hook(make_msg(bus, addr, 8)))
+  tx_msgs = set(tuple(m) for m in TX_MSGS)
+  msgs = [(addr, bus) for addr in range(1, 0x800) for bus in range(0, 4) if (addr, bus) not in tx_msgs]
+  addrs, buses = np.array(msgs).T
+  tx, _ = run_hooks_batch(test.safety, HOOK_TX, addrs, buses)
+  test.assertFalse(np.any(tx), "tx allowed for %s" % list(zip(addrs[tx != 0], buses[tx != 0])))
+
+def test_torque_model(test, brand, n=200, steps=400, seed=0):
+  # input is a test class and a torque_model brand. Random drives are limited by the
+  # openpilot torque limiter model and replayed through the safety hooks, every
+  # command openpilot would send is expected to be allowed. At a random frame of every
+  # drive, torques just past the limits of the model are expected to be blocked
+  rng = np.random.RandomState(seed)
+  desired, meas = generate_torque_sequences(brand, n, steps, rng)
+  torque = limit_torque_sequences(brand, desired, meas)
+
+  # the measured torque is received before every frame, the first one fills the sample window
+  hook = np.concatenate([np.full(SAMPLE_SIZE, HOOK_RX), np.tile([HOOK_RX, HOOK_TX], steps)])
+  addr = np.concatenate([np.full(SAMPLE_SIZE, brand.meas_addr), np.tile([brand.meas_addr, brand.torque_addr], steps)])
+  ts = np.concatenate([np.zeros(SAMPLE_SIZE), np.repeat(np.arange(steps) * brand.steer_step * FRAME_TS, 2)])
+  meas_dat = registers_to_dat(*brand.meas_msg(meas.ravel())).reshape(n, steps, 8)
+  torque_dat = registers_to_dat(*brand.torque_msg(torque.ravel())).reshape(n, steps, 8)
+  frames = np.stack([meas_dat, torque_dat], axis=2).reshape(n, 2 * steps, 8)
+
+  for i in range(n):
+    getattr(test.safety, brand.init)()
+    test.safety.set_controls_allowed(1)
+    dat = np.concatenate([np.repeat(meas_dat[i, :1], SAMPLE_SIZE, axis=0), frames[i]])
+    ret, controls_allowed = run_hooks_batch(test.safety, hook, addr, 0, 8, dat, ts)
+
+    tx = ret[SAMPLE_SIZE + 1::2]
+    if not np.all(tx) or not np.all(controls_allowed):
+      j = np.argmin(tx & controls_allowed[SAMPLE_SIZE + 1::2])
+      last = torque[i, j - 1] if j > 0 else 0
+      test.fail("drive %d frame %d: torque %d blocked, last %d, measured %d, desired %.1f, controls allowed %d" %
+                (i, j, torque[i, j], last, meas[i, j], desired[i, j], controls_allowed[SAMPLE_SIZE + 1 + 2 * j]))
+
+  # the safety code limits against the measured torques in its sample window
+  padded = np.concatenate([np.repeat(meas[:, :1], SAMPLE_SIZE - 1, axis=1), meas], axis=1)
+  window = np.stack([padded[:, k:k + steps] for k in range(SAMPLE_SIZE)])
+  last = np.concatenate([np.zeros((n, 1), dtype=np.int64), torque[:, :-1]], axis=1)
+  lo, hi = torque_bounds(brand, last, window.min(axis=0), window.max(axis=0))
+
+  for i, j in enumerate(rng.randint(steps, size=n)):
+    # replay up to the measured torque of frame j, then send the torque out of bounds
+    k = SAMPLE_SIZE + 2 * j + 1
+    for over in (lo[i, j] - 1, hi[i, j] + 1):
+      getattr(test.safety, brand.init)()
+      test.safety.set_controls_allowed(1)
+      over_dat = registers_to_dat(*brand.torque_msg(np.array([over])))
+      dat = np.concatenate([np.repeat(meas_dat[i, :1], SAMPLE_SIZE, axis=0), frames[i, :2 * j + 1], over_dat])
+      ret, _ = run_hooks_batch(test.safety, hook[:k + 1], addr[:k + 1], 0, 8, dat, ts[:k + 1])
+      if ret[-1]:
+        test.fail("drive %d frame %d: torque %d allowed, last %d, measured %d to %d" %
+                  (i, j, over, last[i, j], window[:, i, j].min(), window[:, i, j].max()))
@@ -46,6 +46,10 @@ int safety_tx_hook(CAN_FIFOMailBox_TypeDef *to_push);
 int safety_fwd_hook(int bus_num, CAN_FIFOMailBox_TypeDef *to_fwd);
 int set_safety_hooks(uint16_t  mode, int16_t param);
 
+void safety_hooks_batch(int n, const uint8_t *hook, const uint32_t *ts, const uint32_t *addr,
+                        const uint8_t *bus, const uint8_t *len, const uint8_t *dat,
+                        int *ret, uint8_t *controls_allowed_out);
+
 void init_tests_toyota(void);
 int get_toyota_torque_meas_min(void);
 int get_toyota_torque_meas_max(void);
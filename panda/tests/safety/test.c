@@ -256,6 +256,46 @@ void set_honda_fwd_brake(bool c){
   honda_fwd_brake = c;
 }
 
+// batched hook evaluation, runs a whole array of messages through the hooks in one call
+#define SAFETY_HOOK_RX 0U
+#define SAFETY_HOOK_TX 1U
+#define SAFETY_HOOK_FWD 2U
+
+void safety_hooks_batch(int n, const uint8_t *hook, const uint32_t *ts, const uint32_t *addr,
+                        const uint8_t *bus, const uint8_t *len, const uint8_t *dat,
+                        int *ret, uint8_t *controls_allowed_out){
+  CAN_FIFOMailBox_TypeDef msg;
+  for (int i = 0; i < n; i++) {
+    // ts is optional, the timer is left alone without it
+    if (ts != NULL) {
+      set_timer(ts[i]);
+    }
+
+    if (addr[i] >= 0x800U) {
+      msg.RIR = (addr[i] << 3) | 5U;
+    } else {
+      msg.RIR = (addr[i] << 21) | 1U;
+    }
+    msg.RDTR = len[i] | ((uint32_t)bus[i] << 4);
+
+    const uint8_t *d = &dat[8 * i];
+    msg.RDLR = d[0] | (d[1] << 8) | (d[2] << 16) | ((uint32_t)d[3] << 24);
+    msg.RDHR = d[4] | (d[5] << 8) | (d[6] << 16) | ((uint32_t)d[7] << 24);
+
+    if (hook[i] == SAFETY_HOOK_RX) {
+      ret[i] = safety_rx_hook(&msg);
+    } else if (hook[i] == SAFETY_HOOK_TX) {
+      ret[i] = safety_tx_hook(&msg);
+    } else {
+      ret[i] = safety_fwd_hook(bus[i], &msg);
+    }
+
+    if (controls_allowed_out != NULL) {
+      controls_allowed_out[i] = controls_allowed;
+    }
+  }
+}
+
 void init_tests(void){
   // get HW_TYPE from env variable set in test.sh
   hw_type = atoi(getenv("HW_TYPE"));
@@ -3,7 +3,8 @@ import unittest
 import numpy as np
 from panda import Panda
 from panda.tests.safety import libpandasafety_py
-from panda.tests.safety.common import test_relay_malfunction, make_msg, test_manually_enable_controls_allowed, test_spam_can_buses
+from panda.tests.safety.common import test_relay_malfunction, make_msg, test_manually_enable_controls_allowed, test_spam_can_buses, test_torque_model
+from panda.tests.safety.torque_model import BRANDS
 
 MAX_RATE_UP = 3
 MAX_RATE_DOWN = 3
@@ -49,6 +50,9 @@ class TestChryslerSafety(unittest.TestCase):
   def test_relay_malfunction(self):
     test_relay_malfunction(self, 0x292)
 
+  def test_torque_model(self):
+    test_torque_model(self, BRANDS['chrysler'])
+
   def test_default_controls_not_allowed(self):
     self.assertFalse(self.safety.get_controls_allowed())
 
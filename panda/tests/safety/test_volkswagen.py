@@ -3,7 +3,8 @@ import unittest
 import numpy as np
 from panda import Panda
 from panda.tests.safety import libpandasafety_py
-from panda.tests.safety.common import test_relay_malfunction, make_msg, test_manually_enable_controls_allowed, test_spam_can_buses
+from panda.tests.safety.common import test_relay_malfunction, make_msg, test_manually_enable_controls_allowed, test_spam_can_buses, test_torque_model
+from panda.tests.safety.torque_model import BRANDS
 
 MAX_RATE_UP = 4
 MAX_RATE_DOWN = 10
@@ -66,6 +67,9 @@ class TestVolkswagenSafety(unittest.TestCase):
   def test_relay_malfunction(self):
     test_relay_malfunction(self, 0x126)
 
+  def test_torque_model(self):
+    test_torque_model(self, BRANDS['volkswagen'])
+
   def test_prev_gas(self):
     for g in range(0, 256):
       self.safety.safety_rx_hook(self._gas_msg(g))
@@ -0,0 +1,170 @@
+import numpy as np
+from collections import namedtuple
+from panda import Panda
+
+# Model of the openpilot steering torque limiters, used to check that everything openpilot
+# can command is allowed by the safety code. Limits mirror the carcontroller params in
+# openpilot, where selfdrive/car/tests/test_steer_limits.py keeps them in sync.
+
+SAMPLE_SIZE = 6  # driver and motor torque samples the safety code keeps, see sample_t
+FRAME_TS = 10000  # us between carcontroller frames
+
+SteerLimits = namedtuple('SteerLimits', ['STEER_MAX', 'STEER_DELTA_UP', 'STEER_DELTA_DOWN',
+                                         'STEER_DRIVER_ALLOWANCE', 'STEER_DRIVER_MULTIPLIER',
+                                         'STEER_DRIVER_FACTOR', 'STEER_ERROR_MAX'],
+                         defaults=[0, 1, 1, 0])
+
+# limiter is 'std' for limits against driver torque and 'toyota' for limits against motor torque,
+# steer_step is the number of frames between steering messages. The message functions return
+# the RDLR and RDHR registers for an array of torques, like the _torque_msg test helpers.
+# meas_tolerance is how far the safety code widens the measured torque samples for rounding
+TorqueBrand = namedtuple('TorqueBrand', ['safety_mode', 'safety_param', 'init', 'limiter', 'limits', 'steer_step',
+                                         'torque_addr', 'torque_msg', 'meas_addr', 'meas_msg', 'meas_max',
+                                         'meas_tolerance'], defaults=[0])
+
+
+def twos_comp(val, bits):
+  return val & ((1 << bits) - 1)
+
+def sign_magnitude(val, bits, sign_bit):
+  return (np.abs(val) & ((1 << bits) - 1)) | ((val < 0).astype(np.int64) << sign_bit)
+
+def toyota_checksum(addr, rdlr, rdhr):
+  # sum of the address, length and the first 7 bytes, in the last byte
+  dat = np.stack([rdlr >> s for s in (0, 8, 16, 24)] + [rdhr >> s for s in (0, 8, 16)]) & 0xFF
+  return (np.sum(dat, axis=0) + (addr & 0xFF) + (addr >> 8) + 8) & 0xFF
+
+def _zeros(t):
+  return np.zeros_like(t)
+
+def _toyota_meas_msg(t):
+  t = twos_comp(t, 16)
+  rdhr = (t & 0xFF00) | ((t & 0xFF) << 16)
+  return _zeros(t), rdhr | (toyota_checksum(0x260, _zeros(t), rdhr) << 24)
+
+def _chrysler_msg(t):
+  t = t + 1024
+  return (t >> 8) + ((t & 0xFF) << 8)
+
+
+BRANDS = {
+  'toyota': TorqueBrand(
+    Panda.SAFETY_TOYOTA, 100, 'init_tests_toyota', 'toyota',
+    SteerLimits(STEER_MAX=1500, STEER_DELTA_UP=10, STEER_DELTA_DOWN=25, STEER_ERROR_MAX=350), 1,
+    0x2E4, lambda t: (twos_comp(t, 16) | ((t & 0xFF) << 16), _zeros(t)),
+    0x260, _toyota_meas_msg, 2200, 1),
+  'chrysler': TorqueBrand(
+    Panda.SAFETY_CHRYSLER, 0, 'init_tests_chrysler', 'toyota',
+    SteerLimits(STEER_MAX=261, STEER_DELTA_UP=3, STEER_DELTA_DOWN=3, STEER_ERROR_MAX=80), 1,
+    0x292, lambda t: (_chrysler_msg(t), _zeros(t)),
+    544, lambda t: (_zeros(t), _chrysler_msg(t)), 400),
+  'hyundai': TorqueBrand(
+    Panda.SAFETY_HYUNDAI, 0, 'init_tests_hyundai', 'std',
+    SteerLimits(STEER_MAX=255, STEER_DELTA_UP=3, STEER_DELTA_DOWN=7, STEER_DRIVER_ALLOWANCE=50,
+                STEER_DRIVER_MULTIPLIER=2, STEER_DRIVER_FACTOR=1), 1,
+    832, lambda t: ((t + 1024) << 16, _zeros(t)),
+    897, lambda t: ((t + 2048) << 11, _zeros(t)), 270),
+  'gm': TorqueBrand(
+    Panda.SAFETY_GM, 0, 'init_tests_gm', 'std',
+    SteerLimits(STEER_MAX=300, STEER_DELTA_UP=7, STEER_DELTA_DOWN=17, STEER_DRIVER_ALLOWANCE=50,
+                STEER_DRIVER_MULTIPLIER=4, STEER_DRIVER_FACTOR=100), 2,
+    384, lambda t: (((twos_comp(t, 11) >> 8) & 0x7) | ((t & 0xFF) << 8), _zeros(t)),
+    388, lambda t: (_zeros(t), (((twos_comp(t, 11) >> 8) & 0x7) << 16) | ((t & 0xFF) << 24)), 190),
+  'subaru': TorqueBrand(
+    Panda.SAFETY_SUBARU, 0, 'init_tests_subaru', 'std',
+    SteerLimits(STEER_MAX=2047, STEER_DELTA_UP=50, STEER_DELTA_DOWN=70, STEER_DRIVER_ALLOWANCE=60,
+                STEER_DRIVER_MULTIPLIER=10, STEER_DRIVER_FACTOR=1), 2,
+    0x122, lambda t: (twos_comp(t, 13) << 16, _zeros(t)),
+    0x119, lambda t: (twos_comp(t, 11) << 16, _zeros(t)), 400),
+  'volkswagen': TorqueBrand(
+    Panda.SAFETY_VOLKSWAGEN, 0, 'init_tests_volkswagen', 'std',
+    SteerLimits(STEER_MAX=250, STEER_DELTA_UP=4, STEER_DELTA_DOWN=10, STEER_DRIVER_ALLOWANCE=80,
+                STEER_DRIVER_MULTIPLIER=3, STEER_DRIVER_FACTOR=1), 2,
+    0x126, lambda t: (sign_magnitude(t, 12, 15) << 16, _zeros(t)),
+    0x9F, lambda t: (_zeros(t), sign_magnitude(t, 13, 15) << 8), 250),
+}
+
+
+def _rate_limit(apply_torque, apply_torque_last, LIMITS):
+  # slow rate if steer torque increases in magnitude
+  pos = apply_torque_last > 0
+  lo = np.where(pos, np.maximum(apply_torque_last - LIMITS.STEER_DELTA_DOWN, -LIMITS.STEER_DELTA_UP),
+                apply_torque_last - LIMITS.STEER_DELTA_UP)
+  hi = np.where(pos, apply_torque_last + LIMITS.STEER_DELTA_UP,
+                np.minimum(apply_torque_last + LIMITS.STEER_DELTA_DOWN, LIMITS.STEER_DELTA_UP))
+  return np.clip(apply_torque, lo, hi)
+
+def std_steer_torque_limits(apply_torque, apply_torque_last, driver_torque, LIMITS):
+  """apply_std_steer_torque_limits from openpilot over arrays of torques."""
+  driver_max_torque = LIMITS.STEER_MAX + (LIMITS.STEER_DRIVER_ALLOWANCE + driver_torque * LIMITS.STEER_DRIVER_FACTOR) * LIMITS.STEER_DRIVER_MULTIPLIER
+  driver_min_torque = -LIMITS.STEER_MAX + (-LIMITS.STEER_DRIVER_ALLOWANCE + driver_torque * LIMITS.STEER_DRIVER_FACTOR) * LIMITS.STEER_DRIVER_MULTIPLIER
+  max_steer_allowed = np.maximum(np.minimum(LIMITS.STEER_MAX, driver_max_torque), 0)
+  min_steer_allowed = np.minimum(np.maximum(-LIMITS.STEER_MAX, driver_min_torque), 0)
+  apply_torque = np.clip(apply_torque, min_steer_allowed, max_steer_allowed)
+  return np.round(_rate_limit(apply_torque, apply_torque_last, LIMITS)).astype(np.int64)
+
+def toyota_steer_torque_limits(apply_torque, apply_torque_last, motor_torque, LIMITS):
+  """apply_toyota_steer_torque_limits from openpilot over arrays of torques."""
+  max_lim = np.minimum(np.maximum(motor_torque + LIMITS.STEER_ERROR_MAX, LIMITS.STEER_ERROR_MAX), LIMITS.STEER_MAX)
+  min_lim = np.maximum(np.minimum(motor_torque - LIMITS.STEER_ERROR_MAX, -LIMITS.STEER_ERROR_MAX), -LIMITS.STEER_MAX)
+  apply_torque = np.clip(apply_torque, min_lim, max_lim)
+  return np.round(_rate_limit(apply_torque, apply_torque_last, LIMITS)).astype(np.int64)
+
+
+def torque_bounds(brand, last, meas_min, meas_max):
+  """Lowest and highest torque that may follow last with the measured torque anywhere in
+  [meas_min, meas_max], e.g. the safety code's sample window. These are the limits the
+  openpilot limiter and the safety code share: max torque, rate up from last and rate
+  down once past the limit against the driver or motor torque. Everything outside has to
+  be blocked."""
+  LIMITS = brand.limits
+  meas_min, meas_max = meas_min - brand.meas_tolerance, meas_max + brand.meas_tolerance
+  if brand.limiter == 'std':
+    meas_hi = LIMITS.STEER_MAX + (LIMITS.STEER_DRIVER_ALLOWANCE + meas_max) * LIMITS.STEER_DRIVER_MULTIPLIER
+    meas_lo = -LIMITS.STEER_MAX + (-LIMITS.STEER_DRIVER_ALLOWANCE + meas_min) * LIMITS.STEER_DRIVER_MULTIPLIER
+  else:
+    meas_hi = np.maximum(meas_max, 0) + LIMITS.STEER_ERROR_MAX
+    meas_lo = np.minimum(meas_min, 0) - LIMITS.STEER_ERROR_MAX
+
+  hi = np.minimum(np.maximum(last, 0) + LIMITS.STEER_DELTA_UP, np.maximum(last - LIMITS.STEER_DELTA_DOWN, np.maximum(meas_hi, 0)))
+  lo = np.maximum(np.minimum(last, 0) - LIMITS.STEER_DELTA_UP, np.minimum(last + LIMITS.STEER_DELTA_DOWN, np.minimum(meas_lo, 0)))
+  return np.maximum(lo, -LIMITS.STEER_MAX), np.minimum(hi, LIMITS.STEER_MAX)
+
+def generate_torque_sequences(brand, n, steps, rng):
+  """Random steering frames for n drives: the torque openpilot asks for and the driver or
+  motor torque measured before each frame, in CAN units."""
+  steer_max = brand.limits.STEER_MAX
+
+  # requests hold for a while and jump to new targets, up to past the max torque. Some
+  # drives hold long enough to ramp all the way up, others change every few frames
+  jump_rate = 10 ** rng.uniform(-2.7, -1, (n, 1))
+  jumps = rng.random_sample((n, steps)) < jump_rate
+  jumps[:, 0] = True
+  held = np.maximum.accumulate(np.where(jumps, np.arange(steps), 0), axis=1)
+  targets = rng.uniform(-1.3, 1.3, (n, steps)) * steer_max
+  desired = targets[np.arange(n)[:, None], held] + rng.normal(0., 0.02 * steer_max, (n, steps))
+
+  # measured torque wanders over the whole range, at a different pace in every drive
+  step_max = np.maximum(brand.meas_max // rng.randint(5, 100, (n, 1)), 1)
+  meas = np.cumsum(np.round(rng.uniform(-1, 1, (n, steps)) * step_max).astype(np.int64), axis=1)
+  meas += rng.randint(-brand.meas_max, brand.meas_max + 1, (n, 1))
+  meas = np.clip(meas, -brand.meas_max, brand.meas_max)
+  return desired, meas
+
+def limit_torque_sequences(brand, desired, meas):
+  """Run the requests through the openpilot limiter of the brand, one frame at a time for
+  all drives at once. Returns the commanded torques."""
+  if brand.limiter == 'std':
+    limiter, meas = std_steer_torque_limits, meas / brand.limits.STEER_DRIVER_FACTOR
+  else:
+    limiter = toyota_steer_torque_limits
+
+  torque = np.zeros(desired.shape, dtype=np.int64)
+  last = np.zeros(desired.shape[0], dtype=np.int64)
+  for i in range(desired.shape[1]):
+    last = torque[:, i] = limiter(desired[:, i], last, meas[:, i], brand.limits)
+  return torque
+
+def registers_to_dat(rdlr, rdhr):
+  regs = np.stack([rdlr, rdhr], axis=-1).astype(np.int64) & 0xFFFFFFFF
+  return regs.astype('<u4').view(np.uint8).reshape(-1, 8)
@@ -2,67 +2,105 @@
 
 import os
 import sys
+import numpy as np
 from panda.tests.safety import libpandasafety_py
-from panda.tests.safety_replay.helpers import package_can_msg, init_segment
+from panda.tests.safety.common import MsgBatch, HOOK_RX, HOOK_TX
+from panda.tests.safety_replay.helpers import init_segment
 from tools.lib.logreader import LogReader  # pylint: disable=import-error
 
-# replay a drive to check for safety violations
-def replay_drive(lr, safety_mode, param):
+# msgs run through the safety hooks per call into libpandasafety
+BATCH_SIZE = 50000
+
+# replay a drive through the safety hooks and count rx/tx results
+def replay_drive_stats(lr, safety_mode, param):
   safety = libpandasafety_py.libpandasafety
 
   err = safety.set_safety_hooks(safety_mode, param)
   assert err == 0, "invalid safety mode: %d" % safety_mode
 
   if "SEGMENT" in os.environ:
-    init_segment(safety, lr, mode)
+    init_segment(safety, lr, safety_mode)
 
   rx_tot, rx_invalid, tx_tot, tx_blocked, tx_controls, tx_controls_blocked = 0, 0, 0, 0, 0, 0
   blocked_addrs = set()
   invalid_addrs = set()
   start_t = None
 
+  batch, batch_t = MsgBatch(), []
+  def run_batch():
+    nonlocal rx_tot, rx_invalid, tx_tot, tx_blocked, tx_controls, tx_controls_blocked
+    ret, controls_allowed = batch.run(safety)
+    hook, addr, t = np.array(batch.hook), np.array(batch.addr), np.array(batch_t)
+
+    tx, rx = hook == HOOK_TX, hook == HOOK_RX
+    blocked, invalid = tx & (ret == 0), rx & (ret == 0)
+    tx_tot += np.count_nonzero(tx)
+    tx_blocked += np.count_nonzero(blocked)
+    tx_controls += np.count_nonzero(tx & controls_allowed)
+    tx_controls_blocked += np.count_nonzero(blocked & controls_allowed)
+    blocked_addrs.update(addr[blocked].tolist())
+    rx_tot += np.count_nonzero(rx)
+    rx_invalid += np.count_nonzero(invalid)
+    invalid_addrs.update(addr[invalid].tolist())
+
+    if "DEBUG" in os.environ:
+      for i in np.flatnonzero(blocked):
+        print("blocked bus %d msg %d at %f" % (batch.bus[i], addr[i], (t[i] - start_t)/(1e9)))
+
   for msg in lr:
     if start_t is None:
       start_t = msg.logMonoTime
-    safety.set_timer(((msg.logMonoTime // 1000))  % 0xFFFFFFFF)
+    ts = ((msg.logMonoTime // 1000))  % 0xFFFFFFFF
 
     if msg.which() == 'sendcan':
-     for canmsg in msg.sendcan:
-        to_send = package_can_msg(canmsg)
-        sent = safety.safety_tx_hook(to_send)
-        if not sent:
-          tx_blocked += 1
-          tx_controls_blocked += safety.get_controls_allowed()
-          blocked_addrs.add(canmsg.address)
-
-          if "DEBUG" in os.environ:
-            print("blocked bus %d msg %d at %f" % (canmsg.src, canmsg.address, (msg.logMonoTime - start_t)/(1e9)))
-        tx_controls += safety.get_controls_allowed()
-        tx_tot += 1
+      for canmsg in msg.sendcan:
+        batch.add(HOOK_TX, canmsg.address, canmsg.src & 0xF, canmsg.dat, ts)
+        batch_t.append(msg.logMonoTime)
     elif msg.which() == 'can':
       for canmsg in msg.can:
         # ignore msgs we sent
         if canmsg.src >= 128:
           continue
-        to_push = package_can_msg(canmsg)
-        recv = safety.safety_rx_hook(to_push)
-        if not recv:
-          rx_invalid += 1
-          invalid_addrs.add(canmsg.address)
-        rx_tot += 1
+        batch.add(HOOK_RX, canmsg.address, canmsg.src & 0xF, canmsg.dat, ts)
+        batch_t.append(msg.logMonoTime)
+
+    if len(batch) >= BATCH_SIZE:
+      run_batch()
+      batch, batch_t = MsgBatch(), []
+
+  if len(batch):
+    run_batch()
+
+  return {
+    'rx_tot': rx_tot,
+    'rx_invalid': rx_invalid,
+    'invalid_addrs': invalid_addrs,
+    'tx_tot': tx_tot,
+    'tx_controls': tx_controls,
+    'tx_blocked': tx_blocked,
+    'tx_controls_blocked': tx_controls_blocked,
+    'blocked_addrs': blocked_addrs,
+  }
+
+def replay_passed(stats):
+  return stats['tx_controls_blocked'] == 0 and stats['rx_invalid'] == 0
+
+# replay a drive to check for safety violations
+def replay_drive(lr, safety_mode, param):
+  stats = replay_drive_stats(lr, safety_mode, param)
 
   print("\nRX")
-  print("total rx msgs:", rx_tot)
-  print("invalid rx msgs:", rx_invalid)
-  print("invalid addrs:", invalid_addrs)
+  print("total rx msgs:", stats['rx_tot'])
+  print("invalid rx msgs:", stats['rx_invalid'])
+  print("invalid addrs:", stats['invalid_addrs'])
   print("\nTX")
-  print("total openpilot msgs:", tx_tot)
-  print("total msgs with controls allowed:", tx_controls)
-  print("blocked msgs:", tx_blocked)
-  print("blocked with controls allowed:", tx_controls_blocked)
-  print("blocked addrs:", blocked_addrs)
+  print("total openpilot msgs:", stats['tx_tot'])
+  print("total msgs with controls allowed:", stats['tx_controls'])
+  print("blocked msgs:", stats['tx_blocked'])
+  print("blocked with controls allowed:", stats['tx_controls_blocked'])
+  print("blocked addrs:", stats['blocked_addrs'])
 
-  return tx_controls_blocked == 0 and rx_invalid == 0
+  return replay_passed(stats)
 
 if __name__ == "__main__":
   mode = int(sys.argv[2])
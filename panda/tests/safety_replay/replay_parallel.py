@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+import os
+import bz2
+import sys
+import json
+import time
+import struct
+import argparse
+import multiprocessing
+from collections import defaultdict
+
+from panda.tests.safety_replay.replay_drive import replay_drive_stats, replay_passed
+
+CHUNK_SIZE = 1024 * 1024
+
+class LogStream():
+  """Iterates over the events of a raw or bz2 compressed log without loading
+  the whole log, reopening the file on every iteration."""
+
+  def __init__(self, fn):
+    self.fn = fn
+
+  def __iter__(self):
+    from cereal import log as capnp_log  # pylint: disable=import-error
+
+    f = bz2.open(self.fn, "rb") if self.fn.endswith(".bz2") else open(self.fn, "rb")
+    with f:
+      buf = b""
+      while True:
+        chunk = f.read(CHUNK_SIZE)
+        buf += chunk
+
+        # split complete capnp messages off the front of the buffer
+        offset = 0
+        while True:
+          size = message_size(buf, offset)
+          if size is None:
+            break
+          yield capnp_log.Event.from_bytes(buf[offset:offset + size])
+          offset += size
+        buf = buf[offset:]
+
+        if not chunk:
+          break
+
+def message_size(buf, offset):
+  # capnp stream framing: segment count - 1, the size of each segment in words,
+  # padded to a whole word, followed by the segments
+  if len(buf) - offset < 4:
+    return None
+  num_segments = struct.unpack_from("<I", buf, offset)[0] + 1
+  header_size = (4 + 4 * num_segments + 7) & ~7
+  if len(buf) - offset < header_size:
+    return None
+  size = header_size + 8 * sum(struct.unpack_from("<%dI" % num_segments, buf, offset + 4))
+  return size if len(buf) - offset >= size else None
+
+def replay_job(job):
+  route, mode, param = job
+  start = time.time()
+  try:
+    stats = replay_drive_stats(LogStream(route), mode, param)
+    error = None
+  except Exception as e:
+    stats, error = None, repr(e)
+
+  ret = {
+    'route': route,
+    'mode': mode,
+    'param': param,
+    'time': time.time() - start,
+    'error': error,
+    'passed': stats is not None and replay_passed(stats),
+  }
+  if stats is not None:
+    ret.update(stats)
+    ret['invalid_addrs'] = sorted(stats['invalid_addrs'])
+    ret['blocked_addrs'] = sorted(stats['blocked_addrs'])
+  return ret
+
+def aggregate(results):
+  modes = defaultdict(lambda: {'routes': 0, 'failed': 0, 'time': 0., 'rx_tot': 0, 'rx_invalid': 0,
+                               'tx_tot': 0, 'tx_blocked': 0, 'tx_controls_blocked': 0,
+                               'invalid_addrs': set(), 'blocked_addrs': set()})
+  for r in results:
+    m = modes[r['mode']]
+    m['routes'] += 1
+    m['failed'] += not r['passed']
+    m['time'] += r['time']
+    if r['error'] is None:
+      for k in ['rx_tot', 'rx_invalid', 'tx_tot', 'tx_blocked', 'tx_controls_blocked']:
+        m[k] += r[k]
+      m['invalid_addrs'].update(r['invalid_addrs'])
+      m['blocked_addrs'].update(r['blocked_addrs'])
+
+  for m in modes.values():
+    m['invalid_addrs'] = sorted(m['invalid_addrs'])
+    m['blocked_addrs'] = sorted(m['blocked_addrs'])
+
+  return {
+    'passed': all(r['passed'] for r in results),
+    'failed_routes': [r['route'] for r in results if not r['passed']],
+    'modes': {str(k): v for k, v in modes.items()},
+    'routes': results,
+  }
+
+def replay_routes(jobs, processes=None):
+  # each job runs in a fresh worker so it gets a pristine copy of the safety state
+  with multiprocessing.Pool(processes, maxtasksperchild=1) as pool:
+    results = []
+    for r in pool.imap_unordered(replay_job, jobs):
+      print("%s %s with safety mode %d and param %d in %.1fs" % ("passed" if r['passed'] else "FAILED",
+            r['route'], r['mode'], r['param'], r['time']))
+      results.append(r)
+  return aggregate(results)
+
+def parse_job(s):
+  # route:mode[:param]
+  fields = s.split(':')
+  route, mode = fields[0], int(fields[1])
+  param = int(fields[2]) if len(fields) > 2 else 0
+  return route, mode, param
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Replay many drives through the panda safety hooks in parallel")
+  parser.add_argument("jobs", nargs="+", help="route:mode[:param]")
+  parser.add_argument("-j", "--processes", type=int, default=os.cpu_count())
+  parser.add_argument("--report", help="write the aggregate json report to this file")
+  args = parser.parse_args()
+
+  report = replay_routes([parse_job(j) for j in args.jobs], args.processes)
+
+  if args.report:
+    with open(args.report, "w") as f:
+      json.dump(report, f, indent=2)
+  else:
+    print(json.dumps({k: v for k, v in report.items() if k != 'routes'}, indent=2))
+
+  sys.exit(0 if report['passed'] else 1)
@@ -4,8 +4,7 @@ import os
 import requests
 
 from panda import Panda
-from replay_drive import replay_drive
-from tools.lib.logreader import LogReader  # pylint: disable=import-error
+from replay_parallel import replay_routes
 
 BASE_URL = "https://commadataci.blob.core.windows.net/openpilotci/"
 
@@ -27,15 +26,8 @@ if __name__ == "__main__":
       with open(route, "wb") as f:
         f.write(requests.get(BASE_URL + route).content)
 
-  failed = []
-  for route, mode, param in logs:
-    lr = LogReader(route)
-
-    print("\nreplaying %s with safety mode %d and param %s" % (route, mode, param))
-    if not replay_drive(lr, mode, int(param)):
-      failed.append(route)
-
-    for f in failed:
-      print("\n**** failed on %s ****" % f)
-    assert len(failed) == 0, "\nfailed on %d logs" % len(failed)
+  report = replay_routes(logs)
 
+  for f in report['failed_routes']:
+    print("\n**** failed on %s ****" % f)
+  assert report['passed'], "\nfailed on %d logs" % len(report['failed_routes'])
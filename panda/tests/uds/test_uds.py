@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+import time
+import struct
+import unittest
+
+from panda.python.uds import UdsClient, UdsRequestMultiplexer, IsoTpMessage, CanClient, SERVICE_TYPE, \
+                             MessageTimeoutError, NegativeResponseError, get_rx_addr_for_tx_addr, st_min_to_seconds
+
+RDBI = bytes([SERVICE_TYPE.READ_DATA_BY_IDENTIFIER])
+WDBI = bytes([SERVICE_TYPE.WRITE_DATA_BY_IDENTIFIER])
+
+
+class SimulatedEcu():
+  """ISO-TP server with canned responses, asking for the given block size and
+  separation time when receiving multi frame requests."""
+
+  def __init__(self, addr, responses, block_size=0, st_min=0, pending=0):
+    self.addr = addr
+    self.tx_addr = get_rx_addr_for_tx_addr(addr)
+    self.responses = responses
+    self.block_size = block_size
+    self.st_min = st_min
+    self.pending = pending
+
+    self.requests = []
+    self.cf_times = []
+    self.tx_frames = []
+    self.deferred = []
+
+  def _fc(self):
+    return (b"\x30" + bytes([self.block_size, self.st_min])).ljust(8, b"\x00")
+
+  def _respond(self, req):
+    self.requests.append(req)
+    resp = self.responses.get(req)
+    if resp is None:
+      return []
+
+    if self.pending:
+      # answer on the next read
+      self.pending -= 1
+      self.deferred = self._encode(resp)
+      return self._encode(bytes([0x7f, req[0], 0x78]))
+    return self._encode(resp)
+
+  def _encode(self, resp):
+    if len(resp) < 8:
+      return [(bytes([len(resp)]) + resp).ljust(8, b"\x00")]
+
+    header = struct.pack("!H", 0x1000 | len(resp)) if len(resp) <= 0xFFF else struct.pack("!HI", 0x1000, len(resp))
+    first = 8 - len(header)
+    self.tx_frames = [(bytes([0x20 | ((i + 1) & 0xF)]) + resp[j:j + 7]).ljust(8, b"\x00")
+                      for i, j in enumerate(range(first, len(resp), 7))]
+    return [header + resp[:first]]
+
+  def handle(self, dat):
+    frame_type = dat[0] >> 4
+    if frame_type == 0x0:
+      return self._respond(dat[1:1 + dat[0]])
+    if frame_type == 0x1:
+      self.rx_len = ((dat[0] & 0xF) << 8) + dat[1]
+      self.rx_dat = dat[2:]
+      self.cf_count = 0
+      return [self._fc()]
+    if frame_type == 0x2:
+      self.cf_times.append(time.monotonic())
+      self.rx_dat += dat[1:]
+      self.cf_count += 1
+      if len(self.rx_dat) >= self.rx_len:
+        return self._respond(self.rx_dat[:self.rx_len])
+      if self.block_size and self.cf_count % self.block_size == 0:
+        return [self._fc()]
+      return []
+    if frame_type == 0x3:
+      frames, self.tx_frames = self.tx_frames, []
+      return frames
+    return []
+
+  def poll(self):
+    frames, self.deferred = self.deferred, []
+    return frames
+
+
+class FakePanda():
+  def __init__(self, ecus, bus=0):
+    self.ecus = {ecu.addr: ecu for ecu in ecus}
+    self.bus = bus
+    self.rx = []
+    self.reads = 0
+
+  def can_send(self, addr, dat, bus):
+    ecu = self.ecus.get(addr)
+    if bus == self.bus and ecu is not None:
+      self.rx += [(ecu.tx_addr, 0, f, bus) for f in ecu.handle(dat)]
+
+  def can_recv(self):
+    self.reads += 1
+    ret, self.rx = self.rx, []
+    for ecu in self.ecus.values():
+      ret += [(ecu.tx_addr, 0, f, self.bus) for f in ecu.poll()]
+    return ret
+
+
+class TestIsoTp(unittest.TestCase):
+  def test_st_min(self):
+    self.assertEqual(st_min_to_seconds(0), 0.)
+    self.assertAlmostEqual(st_min_to_seconds(0x7f), 0.127)
+    self.assertAlmostEqual(st_min_to_seconds(0xf1), 0.0001)
+    self.assertAlmostEqual(st_min_to_seconds(0xf9), 0.0009)
+    self.assertAlmostEqual(st_min_to_seconds(0x80), 0.127)
+
+  def test_long_response(self):
+    for length in [7, 8, 100, 0xfff, 0x1000, 10000]:
+      resp = bytes(i & 0xff for i in range(length))
+      panda = FakePanda([SimulatedEcu(0x7e0, {RDBI + b'\xf1\x90': b'\x62\xf1\x90' + resp})])
+      self.assertEqual(UdsClient(panda, 0x7e0).read_data_by_identifier(0xf190), resp)
+
+  def test_long_request(self):
+    record = bytes(range(200))
+    ecu = SimulatedEcu(0x7e0, {WDBI + b'\xf1\x90' + record: b'\x6e\xf1\x90'}, block_size=4, st_min=5)
+    panda = FakePanda([ecu])
+    UdsClient(panda, 0x7e0).write_data_by_identifier(0xf190, record)
+
+    self.assertEqual(ecu.requests, [WDBI + b'\xf1\x90' + record])
+    gaps = [b - a for a, b in zip(ecu.cf_times, ecu.cf_times[1:])]
+    self.assertGreaterEqual(min(gaps), 0.005)
+
+  def test_sub_addr_request(self):
+    # 7 byte frames leave room for the subaddress
+    sent = []
+    client = CanClient(lambda addr, dat, bus: sent.append(dat), lambda: [], 0x750, 0x758, 0, sub_addr=0xf)
+    msg = IsoTpMessage(client, timeout=0, max_len=7)
+    msg.send(bytes(6))
+    msg.send(bytes(20))
+    self.assertEqual([len(d) for d in sent], [8, 8])
+    self.assertEqual(sent[1][:3], b'\x0f\x10\x14')
+
+
+class TestUdsRequestMultiplexer(unittest.TestCase):
+  def test_requests_in_flight(self):
+    slow_record = bytes(100)
+    slow = SimulatedEcu(0x7e0, {WDBI + b'\xf1\x90' + slow_record: b'\x6e\xf1\x90'}, block_size=1, st_min=10)
+    fast = SimulatedEcu(0x7e1, {RDBI + b'\xf1\x90': b'\x62\xf1\x90fast', RDBI + b'\xf1\x91': b'\x62\xf1\x91' + bytes(50)})
+    panda = FakePanda([slow, fast])
+
+    mux = UdsRequestMultiplexer(panda)
+    slow_id = mux.request(0x7e0, SERVICE_TYPE.WRITE_DATA_BY_IDENTIFIER, data=b'\xf1\x90' + slow_record)
+    fast_ids = [mux.request(0x7e1, SERVICE_TYPE.READ_DATA_BY_IDENTIFIER, data=did) for did in [b'\xf1\x90', b'\xf1\x91']]
+    t = time.monotonic()
+    results = mux.run()
+
+    self.assertEqual(results, {slow_id: b'\xf1\x90', fast_ids[0]: b'\xf1\x90fast', fast_ids[1]: b'\xf1\x91' + bytes(50)})
+    # 14 consecutive frames, 10ms apart
+    self.assertGreaterEqual(time.monotonic() - t, 0.13)
+    # the fast ECU got both its requests while the slow one was still receiving
+    self.assertEqual(len(fast.requests), 2)
+    self.assertEqual(len(slow.cf_times), 14)
+
+  def test_errors(self):
+    ecu = SimulatedEcu(0x7e0, {RDBI + b'\xf1\x90': b'\x7f\x22\x31', RDBI + b'\xf1\x91': b'\x62\xf1\x91ok'}, pending=1)
+    mux = UdsRequestMultiplexer(FakePanda([ecu]), timeout=0.05)
+    negative = mux.request(0x7e0, SERVICE_TYPE.READ_DATA_BY_IDENTIFIER, data=b'\xf1\x90')
+    ok = mux.request(0x7e0, SERVICE_TYPE.READ_DATA_BY_IDENTIFIER, data=b'\xf1\x91')
+    missing = mux.request(0x7e2, SERVICE_TYPE.READ_DATA_BY_IDENTIFIER, data=b'\xf1\x90')
+    results = mux.run()
+
+    self.assertIsInstance(results[negative], NegativeResponseError)
+    self.assertEqual(results[ok], b'\xf1\x91ok')
+    self.assertIsInstance(results[missing], MessageTimeoutError)
+
+
+if __name__ == "__main__":
+  unittest.main()
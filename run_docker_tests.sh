@@ -12,6 +12,7 @@ $RUN 'cd /tmp/openpilot/ && pylint --disable=R,C,W $(find . -iname "*.py" | grep
 $RUN "$SETUP python -m unittest discover common"
 $RUN "$SETUP python -m unittest discover opendbc/can"
 $RUN "$SETUP python -m unittest discover selfdrive/boardd"
+$RUN "$SETUP python -m unittest discover selfdrive/car"
 $RUN "$SETUP python -m unittest discover selfdrive/controls"
 $RUN "$SETUP python -m unittest discover selfdrive/loggerd"
 $RUN "$SETUP cd /tmp/openpilot/selfdrive/test/longitudinal_maneuvers && OPTEST=1 ./test_longitudinal.py"
@@ -16,6 +16,7 @@ from functools import partial
 from jsonrpc import JSONRPCResponseManager, dispatcher
 from websocket import create_connection, WebSocketTimeoutException, ABNF
 from selfdrive.loggerd.config import ROOT
+from selfdrive.loggerd.manifest import DataManifest
 
 import cereal.messaging as messaging
 from common import android
@@ -27,6 +28,8 @@ from selfdrive.swaglog import cloudlog
 ATHENA_HOST = os.getenv('ATHENA_HOST', 'wss://athena.comma.ai')
 HANDLER_THREADS = os.getenv('HANDLER_THREADS', 4)
 LOCAL_PORT_WHITELIST = set([8022])
+# the uploader and deleter update the manifest as they go, the periodic refresh keeps listing new segments cheap
+MANIFEST_REFRESH_INTERVAL = 30.
 
 dispatcher["echo"] = lambda s: s
 payload_queue = queue.Queue()
@@ -41,7 +44,8 @@ def handle_long_poll(ws):
   threads = [
     threading.Thread(target=ws_recv, args=(ws, end_event)),
     threading.Thread(target=ws_send, args=(ws, end_event)),
-    threading.Thread(target=upload_handler, args=(end_event,))
+    threading.Thread(target=upload_handler, args=(end_event,)),
+    threading.Thread(target=manifest_handler, args=(end_event,))
   ] + [
     threading.Thread(target=jsonrpc_handler, args=(end_event,))
     for x in range(HANDLER_THREADS)
@@ -85,6 +89,15 @@ def upload_handler(end_event):
     except Exception:
       cloudlog.exception("athena.upload_handler.exception")
 
+def manifest_handler(end_event):
+  manifest = DataManifest(ROOT)
+  while not end_event.is_set():
+    try:
+      manifest.refresh()
+    except Exception:
+      cloudlog.exception("athena.manifest_handler.exception")
+    end_event.wait(MANIFEST_REFRESH_INTERVAL)
+
 def _do_upload(upload_item):
   with open(upload_item.path, "rb") as f:
     size = os.fstat(f.fileno()).st_size
@@ -108,9 +121,15 @@ def getMessage(service=None, timeout=1000):
   return ret.to_dict()
 
 @dispatcher.add_method
-def listDataDirectory():
-  files = [os.path.relpath(os.path.join(dp, f), ROOT) for dp, dn, fn in os.walk(ROOT) for f in fn]
-  return files
+def listDataDirectory(prefix='', start_after=None, limit=None, details=False):
+  # only rescans the segments that changed since the last refresh
+  manifest = DataManifest(ROOT)
+  manifest.refresh()
+  files = manifest.list_files(prefix=prefix, start_after=start_after, limit=limit)
+  if details:
+    return [{'path': path, 'size': size, 'mtime': mtime, 'upload_state': upload_state}
+            for path, size, mtime, upload_state in files]
+  return [f[0] for f in files]
 
 @dispatcher.add_method
 def reboot():
@@ -6,6 +6,7 @@ import tempfile
 import time
 import threading
 import queue
+import shutil
 import unittest
 
 from multiprocessing import Process
@@ -17,6 +18,7 @@ from websocket._exceptions import WebSocketConnectionClosedException
 from selfdrive.athena import athenad
 from selfdrive.athena.athenad import dispatcher
 from selfdrive.athena.test_helpers import MockWebsocket, MockParams, MockApi, EchoSocket, with_http_server
+from selfdrive.loggerd.manifest import get_manifest_path
 from cereal import messaging
 
 class TestAthenadMethods(unittest.TestCase):
@@ -28,6 +30,12 @@ class TestAthenadMethods(unittest.TestCase):
     athenad.Api = MockApi
     athenad.LOCAL_PORT_WHITELIST = set([cls.SOCKET_PORT])
 
+  @classmethod
+  def tearDownClass(cls):
+    shutil.rmtree(athenad.ROOT, ignore_errors=True)
+    if os.path.exists(get_manifest_path(athenad.ROOT)):
+      os.unlink(get_manifest_path(athenad.ROOT))
+
   def test_echo(self):
     assert dispatcher["echo"]("bob") == "bob"
 
@@ -56,7 +64,33 @@ class TestAthenadMethods(unittest.TestCase):
       p.terminate()
 
   def test_listDataDirectory(self):
-    print(dispatcher["listDataDirectory"]())
+    route = '2019-04-18--12-52-54'
+    fns = [f'{route}--{i}/{f}' for i in range(3) for f in ['qlog.bz2', 'rlog.bz2']]
+    for fn in fns:
+      os.makedirs(os.path.dirname(os.path.join(athenad.ROOT, fn)), exist_ok=True)
+      Path(os.path.join(athenad.ROOT, fn)).touch()
+
+    try:
+      self.assertEqual(dispatcher["listDataDirectory"](), fns)
+
+      page = dispatcher["listDataDirectory"](limit=4)
+      page += dispatcher["listDataDirectory"](start_after=page[-1], limit=4)
+      self.assertEqual(page, fns)
+
+      self.assertEqual(dispatcher["listDataDirectory"](prefix=f'{route}--1/'), fns[2:4])
+
+      files = dispatcher["listDataDirectory"](prefix=fns[0], details=True)
+      self.assertEqual([f['path'] for f in files], fns[:1])
+      self.assertEqual(files[0]['size'], 0)
+
+      # segments written after the last listing are listed too
+      fns.append(f'{route}--3/qlog.bz2')
+      os.makedirs(os.path.dirname(os.path.join(athenad.ROOT, fns[-1])))
+      Path(os.path.join(athenad.ROOT, fns[-1])).touch()
+      self.assertEqual(dispatcher["listDataDirectory"](), fns)
+    finally:
+      for fn in fns:
+        os.unlink(os.path.join(athenad.ROOT, fn))
 
   @with_http_server
   def test_do_upload(self, host):
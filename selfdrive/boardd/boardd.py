@@ -1,7 +1,7 @@
 # pylint: skip-file
 
 # Cython, now uses scons to build
-from selfdrive.boardd.boardd_api_impl import can_list_to_can_capnp
+from selfdrive.boardd.boardd_api_impl import can_list_to_can_capnp, can_capnp_to_can_buffer
 assert can_list_to_can_capnp
 
 def can_capnp_to_can_list(can, src_filter=None):
@@ -10,3 +10,10 @@ def can_capnp_to_can_list(can, src_filter=None):
     if src_filter is None or msg.src in src_filter:
       ret.append((msg.address, msg.busTime, msg.dat, msg.src))
   return ret
+
+def can_bytes_to_can_array(dat, src_filter=None):
+  """Decode a serialized can or sendcan event into a panda CAN_MSG array,
+  without going through python capnp readers."""
+  import numpy as np
+  from panda.python import CAN_MSG
+  return np.frombuffer(can_capnp_to_can_buffer(dat, src_filter), dtype=CAN_MSG)
@@ -11,6 +11,7 @@ cdef struct can_frame:
   long src
 
 cdef extern void can_list_to_can_capnp_cpp(const vector[can_frame] &can_list, string &out, bool sendCan, bool valid)
+cdef extern int can_capnp_to_can_records_cpp(const string &dat, string &out, const bool *src_filter)
 
 def can_list_to_can_capnp(can_msgs, msgtype='can', valid=True):
   cdef vector[can_frame] can_list
@@ -24,3 +25,21 @@ def can_list_to_can_capnp(can_msgs, msgtype='can', valid=True):
   cdef string out
   can_list_to_can_capnp_cpp(can_list, out, msgtype == 'sendcan', valid)
   return out
+
+def can_capnp_to_can_buffer(dat, src_filter=None):
+  """Decode a serialized can or sendcan event into packed panda CAN_MSG records,
+  keeping the messages with a src in src_filter."""
+  cdef bool mask[256]
+  cdef bool *mask_ptr = NULL
+  if src_filter is not None:
+    for i in range(256):
+      mask[i] = False
+    for src in src_filter:
+      if 0 <= src < 256:
+        mask[src] = True
+    mask_ptr = mask
+
+  cdef string out
+  if can_capnp_to_can_records_cpp(dat, out, mask_ptr) < 0:
+    raise ValueError("not a can or sendcan event")
+  return out
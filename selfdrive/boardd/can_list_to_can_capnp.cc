@@ -1,6 +1,7 @@
 #include <vector>
 #include <tuple>
 #include <string>
+#include <cstring>
 #include "common/timing.h"
 #include <capnp/serialize.h>
 #include "cereal/gen/cpp/log.capnp.h"
@@ -13,6 +14,15 @@ typedef struct {
 	long src;
 } can_frame;
 
+// same layout as CAN_MSG in the panda python library
+typedef struct {
+  uint32_t address;
+  uint16_t busTime;
+  uint8_t src;
+  uint8_t len;
+  uint8_t dat[8];
+} can_msg_record;
+
 extern "C" {
 
 void can_list_to_can_capnp_cpp(const std::vector<can_frame> &can_list, std::string &out, bool sendCan, bool valid) {
@@ -34,4 +44,43 @@ void can_list_to_can_capnp_cpp(const std::vector<can_frame> &can_list, std::stri
   out.append((const char *)bytes.begin(), bytes.size());
 }
 
+int can_capnp_to_can_records_cpp(const std::string &dat, std::string &out, const bool *src_filter) {
+  // the reader needs word aligned memory
+  auto words = kj::heapArray<capnp::word>((dat.size() / sizeof(capnp::word)) + 1);
+  memcpy(words.begin(), dat.data(), dat.size());
+
+  capnp::FlatArrayMessageReader msg(words);
+  cereal::Event::Reader event = msg.getRoot<cereal::Event>();
+
+  capnp::List<cereal::CanData>::Reader canData;
+  if (event.which() == cereal::Event::CAN) {
+    canData = event.getCan();
+  } else if (event.which() == cereal::Event::SENDCAN) {
+    canData = event.getSendcan();
+  } else {
+    return -1;
+  }
+
+  out.resize(canData.size() * sizeof(can_msg_record));
+  can_msg_record *records = (can_msg_record *)&out[0];
+  int n = 0;
+  for (auto cmsg : canData) {
+    uint8_t src = cmsg.getSrc();
+    if (src_filter != NULL && !src_filter[src]) {
+      continue;
+    }
+
+    auto cdat = cmsg.getDat();
+    can_msg_record &r = records[n++];
+    memset(&r, 0, sizeof(r));
+    r.address = cmsg.getAddress();
+    r.busTime = cmsg.getBusTime();
+    r.src = src;
+    r.len = cdat.size() < sizeof(r.dat) ? cdat.size() : sizeof(r.dat);
+    memcpy(r.dat, cdat.begin(), r.len);
+  }
+  out.resize(n * sizeof(can_msg_record));
+  return n;
+}
+
 }
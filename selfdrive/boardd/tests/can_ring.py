@@ -0,0 +1,85 @@
+import mmap
+import numpy as np
+from panda.python import CAN_MSG
+
+RING_CAPACITY = 1 << 16  # messages
+
+# header: published head, then the head the producer is writing up to
+HEAD = 0
+RESERVED = 1
+HEADER_SIZE = 16
+
+
+class CanRing():
+  """Ring of panda CAN_MSG records in shared memory, with a single producer
+  and any number of consumers.
+
+  The memory is an anonymous shared mapping, so the ring has to be created
+  before the consumer processes are forked. Every consumer reads through its
+  own CanRingReader and skips whatever was overwritten before it got to it.
+  """
+
+  def __init__(self, capacity=RING_CAPACITY):
+    self.capacity = capacity
+    self.buf = mmap.mmap(-1, HEADER_SIZE + capacity * CAN_MSG.itemsize)
+    self.header = np.frombuffer(self.buf, dtype=np.uint64, count=2)
+    self.records = np.frombuffer(self.buf, dtype=CAN_MSG, count=capacity, offset=HEADER_SIZE)
+
+  @property
+  def head(self):
+    return int(self.header[HEAD])
+
+  def write(self, msgs):
+    n = len(msgs)
+    if n == 0:
+      return
+
+    head = self.head
+    # readers treat everything up to the reserved head as possibly overwritten
+    self.header[RESERVED] = head + n
+
+    # only the newest messages fit, the others count as dropped for the readers
+    skip = max(n - self.capacity, 0)
+    msgs = msgs[skip:]
+    start = (head + skip) % self.capacity
+    first = min(len(msgs), self.capacity - start)
+    self.records[start:start + first] = msgs[:first]
+    self.records[:len(msgs) - first] = msgs[first:]
+
+    self.header[HEAD] = head + n
+
+  def reader(self):
+    return CanRingReader(self)
+
+
+class CanRingReader():
+  def __init__(self, ring):
+    self.ring = ring
+    self.tail = ring.head
+    self.dropped = 0
+
+  def read(self, max_msgs=None):
+    """Returns the messages written since the last read as a CAN_MSG array,
+    at most max_msgs of them."""
+    ring = self.ring
+    head = ring.head
+    if head - self.tail > ring.capacity:
+      self.dropped += head - ring.capacity - self.tail
+      self.tail = head - ring.capacity
+
+    n = head - self.tail
+    if max_msgs is not None:
+      n = min(n, max_msgs)
+
+    start = self.tail % ring.capacity
+    first = min(n, ring.capacity - start)
+    ret = np.concatenate([ring.records[start:start + first], ring.records[:n - first]])
+
+    # drop what the producer overwrote while it was being copied
+    lost = min(int(ring.header[RESERVED]) - ring.capacity - self.tail, n)
+    if lost > 0:
+      ret = ret[lost:]
+      self.dropped += lost
+
+    self.tail += n
+    return ret
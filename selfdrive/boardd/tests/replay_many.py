@@ -5,22 +5,24 @@ import time
 import signal
 import traceback
 from panda import Panda
-from multiprocessing import Pool
+from multiprocessing import Process
 
 jungle = "JUNGLE" in os.environ
 if jungle:
   from panda_jungle import PandaJungle # pylint: disable=import-error
 
 import cereal.messaging as messaging
-from selfdrive.boardd.boardd import can_capnp_to_can_list
+from selfdrive.boardd.boardd import can_bytes_to_can_array
+from selfdrive.boardd.tests.can_ring import CanRing
 
-def initializer():
-  """Ignore CTRL+C in the worker process.
-  source: https://stackoverflow.com/a/44869451 """
-  signal.signal(signal.SIGINT, signal.SIG_IGN)
+SEND_BUSES = [0, 1, 2]
+MAX_SEND = 256  # messages per USB transfer
 
-def send_thread(sender_serial):
+def send_thread(sender_serial, ring):
   global jungle
+  # Ignore CTRL+C in the sender, main terminates it
+  signal.signal(signal.SIGINT, signal.SIG_IGN)
+
   try:
     if jungle:
       sender = PandaJungle(sender_serial)
@@ -29,20 +31,32 @@ def send_thread(sender_serial):
       sender.set_safety_mode(Panda.SAFETY_ALLOUTPUT)
     sender.set_can_loopback(False)
 
-    can_sock = messaging.sub_sock('can')
+    reader = ring.reader()
+    dropped = 0
 
     while True:
-      # Send messages one bus 0 and 1
-      tsc = messaging.recv_one(can_sock)
-      snd = can_capnp_to_can_list(tsc.can)
-      snd = list(filter(lambda x: x[-1] <= 2, snd))
-      sender.can_send_many(snd)
+      snd = reader.read(MAX_SEND)
+      if len(snd):
+        sender.can_send_many(snd)
+      else:
+        time.sleep(0.001)
+
+      if reader.dropped != dropped:
+        print("%s: dropped %d messages" % (sender_serial, reader.dropped - dropped))
+        dropped = reader.dropped
 
       # Drain panda message buffer
       sender.can_recv()
   except Exception:
     traceback.print_exc()
 
+def bridge_thread(ring):
+  # every can event is decoded once into the ring the senders read from
+  can_sock = messaging.sub_sock('can')
+  while True:
+    for dat in messaging.drain_sock_raw(can_sock, wait_for_one=True):
+      ring.write(can_bytes_to_can_array(dat, src_filter=SEND_BUSES))
+
 if __name__ == "__main__":
   if jungle:
     serials = PandaJungle.list()
@@ -56,13 +70,16 @@ if __name__ == "__main__":
   else:
     print("%d senders found. Starting broadcast" % num_senders)
 
-  pool = Pool(num_senders, initializer=initializer)
-  pool.map_async(send_thread, serials)
+  # the ring is shared with the senders when they are forked
+  ring = CanRing()
+  senders = [Process(target=send_thread, args=(serial, ring), daemon=True) for serial in serials]
+  for p in senders:
+    p.start()
 
-  while True:
-    try:
-      time.sleep(10)
-    except KeyboardInterrupt:
-      pool.terminate()
-      pool.join()
-      raise
+  try:
+    bridge_thread(ring)
+  except KeyboardInterrupt:
+    for p in senders:
+      p.terminate()
+      p.join()
+    raise
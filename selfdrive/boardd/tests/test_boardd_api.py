@@ -3,6 +3,7 @@ import numpy as np
 
 import selfdrive.boardd.tests.boardd_old as boardd_old
 import selfdrive.boardd.boardd as boardd
+from selfdrive.boardd.boardd import can_bytes_to_can_array
 
 from common.realtime import sec_since_boot
 from cereal import log
@@ -53,6 +54,20 @@ class TestBoarddApiMethods(unittest.TestCase):
         for attr in attrs:
           self.assertEqual(getattr(ev.can[i], attr, 'new'), getattr(ev_old.can[i], attr, 'old'))
 
+  def test_can_array(self):
+    for i in range(100):
+      can_list, _ = generate_random_can_data_list()
+      can_bytes = boardd.can_list_to_can_capnp(can_list, 'can')
+      ev = log.Event.from_bytes(can_bytes)
+
+      for src_filter in [None, list(range(0, 128, 2))]:
+        expected = boardd.can_capnp_to_can_list(ev.can, src_filter=src_filter)
+        arr = can_bytes_to_can_array(can_bytes, src_filter=src_filter)
+        self.assertEqual(len(arr), len(expected))
+        for m, (address, busTime, dat, src) in zip(arr, expected):
+          self.assertEqual((m['address'], m['busTime'], m['src']), (address, busTime, src))
+          self.assertEqual(m['dat'][:m['len']].tobytes(), dat)
+
   def test_performance(self):
     can_list, cnt = generate_random_can_data_list()
     recursions = 1000
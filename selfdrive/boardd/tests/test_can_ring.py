@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+import unittest
+import numpy as np
+from multiprocessing import Process, Queue
+
+from panda.python import CAN_MSG
+from selfdrive.boardd.tests.can_ring import CanRing
+
+
+def make_msgs(start, n):
+  msgs = np.zeros(n, dtype=CAN_MSG)
+  msgs['address'] = np.arange(start, start + n)
+  msgs['src'] = np.arange(start, start + n) % 3
+  msgs['len'] = 8
+  msgs['dat'] = np.frombuffer(np.arange(start, start + n, dtype='<u8').tobytes(), dtype=np.uint8).reshape(-1, 8)
+  return msgs
+
+def consume(reader, total, q):
+  received = []
+  while len(received) + reader.dropped < total:
+    received += reader.read(100)['address'].tolist()
+  q.put((received, reader.dropped))
+
+
+class TestCanRing(unittest.TestCase):
+  def test_wrap(self):
+    ring = CanRing(capacity=100)
+    reader = ring.reader()
+    for start in range(0, 1000, 30):
+      ring.write(make_msgs(start, 30))
+      msgs = reader.read()
+      self.assertEqual(msgs['address'].tolist(), list(range(start, start + 30)))
+      self.assertTrue(np.array_equal(msgs, make_msgs(start, 30)))
+    self.assertEqual(reader.dropped, 0)
+
+  def test_max_msgs(self):
+    ring = CanRing(capacity=100)
+    reader = ring.reader()
+    ring.write(make_msgs(0, 50))
+    self.assertEqual(reader.read(20)['address'].tolist(), list(range(20)))
+    self.assertEqual(reader.read()['address'].tolist(), list(range(20, 50)))
+    self.assertEqual(len(reader.read()), 0)
+
+  def test_overrun(self):
+    ring = CanRing(capacity=100)
+    reader = ring.reader()
+    ring.write(make_msgs(0, 80))
+    ring.write(make_msgs(80, 80))
+    self.assertEqual(reader.read()['address'].tolist(), list(range(60, 160)))
+    self.assertEqual(reader.dropped, 60)
+
+    # a write bigger than the ring keeps the newest messages
+    ring.write(make_msgs(160, 150))
+    self.assertEqual(reader.read()['address'].tolist(), list(range(210, 310)))
+    self.assertEqual(reader.dropped, 110)
+
+  def test_consumers(self):
+    ring = CanRing(capacity=1000)
+    q = Queue()
+    total = 20000
+    procs = [Process(target=consume, args=(ring.reader(), total, q)) for _ in range(4)]
+    for p in procs:
+      p.start()
+
+    for start in range(0, total, 50):
+      ring.write(make_msgs(start, 50))
+
+    for _ in procs:
+      received, dropped = q.get(timeout=10)
+      # every consumer sees all messages in order, except for the ones it was too slow for
+      self.assertEqual(len(received) + dropped, total)
+      self.assertEqual(received, sorted(received))
+      self.assertEqual(received[-1], total - 1)
+    for p in procs:
+      p.join()
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -1,4 +1,5 @@
 import os
+import time
 from common.params import Params
 from common.basedir import BASEDIR
 from selfdrive.car.fingerprints import eliminate_incompatible_cars, all_known_cars
@@ -48,8 +49,18 @@ def _get_interface_names():
   return brand_names
 
 
-# imports from directory selfdrive/car/<name>/
-interfaces = load_interfaces(_get_interface_names())
+interface_names = _get_interface_names()
+_interfaces = {}
+
+def get_interface(candidate):
+  # imports from directory selfdrive/car/<name>/, only done for the
+  # brand the fingerprint picked instead of every brand at import time
+  if candidate not in _interfaces:
+    for brand_name, model_names in interface_names.items():
+      if candidate in model_names:
+        _interfaces.update(load_interfaces({brand_name: model_names}))
+        break
+  return _interfaces[candidate]
 
 def only_toyota_left(candidate_cars):
   return all(("TOYOTA" in c or "LEXUS" in c) for c in candidate_cars) and len(candidate_cars) > 0
@@ -61,7 +72,7 @@ def fingerprint(logcan, sendcan, has_relay):
     # Vin query only reliably works thorugh OBDII
     bus = 1
     addr, vin = get_vin(logcan, sendcan, bus)
-    _, car_fw = get_fw_versions(logcan, sendcan, bus)
+    _, car_fw = get_fw_versions(logcan, sendcan, bus, vin=vin, params=Params())
   else:
     vin = VIN_UNKNOWN
     _, car_fw = set(), []
@@ -115,15 +126,19 @@ def fingerprint(logcan, sendcan, has_relay):
 
 
 def get_car(logcan, sendcan, has_relay=False):
+  t = time.time()
   candidate, fingerprints, vin, car_fw = fingerprint(logcan, sendcan, has_relay)
+  fingerprint_time = time.time() - t
 
   if candidate is None:
     cloudlog.warning("car doesn't match any fingerprints: %r", fingerprints)
     candidate = "mock"
 
-  CarInterface, CarController = interfaces[candidate]
+  t = time.time()
+  CarInterface, CarController = get_interface(candidate)
   car_params = CarInterface.get_params(candidate, fingerprints, has_relay, car_fw)
   car_params.carVin = vin
   car_params.carFw = car_fw
+  cloudlog.event("car_helpers.get_car_timing", fingerprint=fingerprint_time, interface=time.time() - t)
 
   return CarInterface(car_params, CarController), car_params
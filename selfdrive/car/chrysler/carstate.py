@@ -86,6 +86,7 @@ class CarState():
 
     # initialize can parser
     self.car_fingerprint = CP.carFingerprint
+    self.min_steer_speed = CP.minSteerSpeed
 
     # vEgo kalman filter
     dt = 0.01
@@ -145,7 +146,7 @@ class CarState():
     self.steer_torque_motor = cp.vl["EPS_STATUS"]["TORQUE_MOTOR"]
     self.steer_override = abs(self.steer_torque_driver) > STEER_THRESHOLD
     steer_state = cp.vl["EPS_STATUS"]["LKAS_STATE"]
-    self.steer_error = steer_state == 4 or (steer_state == 0 and self.v_ego > self.CP.minSteerSpeed)
+    self.steer_error = steer_state == 4 or (steer_state == 0 and self.v_ego > self.min_steer_speed)
 
     self.user_brake = 0
     self.brake_lights = self.brake_pressed
@@ -3,6 +3,7 @@ from cereal import car
 from selfdrive.config import Conversions as CV
 from selfdrive.controls.lib.drive_helpers import EventTypes as ET, create_event
 from selfdrive.controls.lib.vehicle_model import VehicleModel
+from opendbc.can.parser import CANDemux
 from selfdrive.car.chrysler.carstate import CarState, get_can_parser, get_camera_parser
 from selfdrive.car.chrysler.values import ECU, ECU_FINGERPRINT, CAR, FINGERPRINTS
 from selfdrive.car import STD_CARGO_KG, scale_rot_inertia, scale_tire_stiffness, is_ecu_disconnected, gen_empty_fingerprint
@@ -25,6 +26,7 @@ class CarInterface(CarInterfaceBase):
     self.CS = CarState(CP)
     self.cp = get_can_parser(CP)
     self.cp_cam = get_camera_parser(CP)
+    self.can_demux = CANDemux([self.cp, self.cp_cam])
 
     self.CC = None
     if CarController is not None:
@@ -110,8 +112,7 @@ class CarInterface(CarInterfaceBase):
   # returns a car.CarState
   def update(self, c, can_strings):
     # ******************* do can recv *******************
-    self.cp.update_strings(can_strings)
-    self.cp_cam.update_strings(can_strings)
+    self.can_demux.update_strings(can_strings)
 
     self.CS.update(self.cp, self.cp_cam)
 
@@ -179,7 +180,7 @@ class CarInterface(CarInterfaceBase):
 
     ret.doorOpen = not self.CS.door_all_closed
     ret.seatbeltUnlatched = not self.CS.seatbelt
-    self.low_speed_alert = (ret.vEgo < self.CP.minSteerSpeed)
+    self.low_speed_alert = (ret.vEgo < self.CS.min_steer_speed)
 
     ret.genericToggle = self.CS.generic_toggle
     #ret.lkasCounter = self.CS.lkas_counter
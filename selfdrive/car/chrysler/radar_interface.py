@@ -1,8 +1,7 @@
 #!/usr/bin/env python3
 import os
 from opendbc.can.parser import CANParser
-from cereal import car
-from selfdrive.car.interfaces import RadarInterfaceBase
+from selfdrive.car.interfaces import RadarInterfaceBase, RadarFrame
 
 RADAR_MSGS_C = list(range(0x2c2, 0x2d4+2, 2))  # c_ messages 706,...,724
 RADAR_MSGS_D = list(range(0x2a2, 0x2b4+2, 2))  # d_ messages
@@ -61,33 +60,25 @@ class RadarInterface(RadarInterfaceBase):
     if self.trigger_msg not in self.updated_messages:
       return None
 
-    ret = car.RadarData.new_message()
     errors = []
     if not self.rcp.can_valid:
       errors.append("canError")
-    ret.errors = errors
 
     for ii in self.updated_messages:  # ii should be the message ID as a number
       cpt = self.rcp.vl[ii]
       trackId = _address_to_track(ii)
 
-      if trackId not in self.pts:
-        self.pts[trackId] = car.RadarData.RadarPoint.new_message()
-        self.pts[trackId].trackId = trackId
-        self.pts[trackId].aRel = float('nan')
-        self.pts[trackId].yvRel = float('nan')
-        self.pts[trackId].measured = True
+      _, d_rel, y_rel, v_rel, measured = self.pts.get(trackId, (trackId, 0., 0., 0., True))
 
       if 'LONG_DIST' in cpt:  # c_* message
-        self.pts[trackId].dRel = cpt['LONG_DIST']  # from front of car
+        d_rel = cpt['LONG_DIST']  # from front of car
         # our lat_dist is positive to the right in car's frame.
         # TODO what does yRel want?
-        self.pts[trackId].yRel = cpt['LAT_DIST']  # in car frame's y axis, left is positive
+        y_rel = cpt['LAT_DIST']  # in car frame's y axis, left is positive
       else:  # d_* message
-        self.pts[trackId].vRel = cpt['REL_SPEED']
-
-    # We want a list, not a dictionary. Filter out LONG_DIST==0 because that means it's not valid.
-    ret.points = [x for x in self.pts.values() if x.dRel != 0]
+        v_rel = cpt['REL_SPEED']
+      self.pts[trackId] = (trackId, d_rel, y_rel, v_rel, measured)
 
+    # Filter out LONG_DIST==0 because that means it's not valid.
     self.updated_messages.clear()
-    return ret
+    return RadarFrame((pt for pt in self.pts.values() if pt[1] != 0), errors)
@@ -1,9 +1,8 @@
 #!/usr/bin/env python3
-from cereal import car
 from opendbc.can.parser import CANParser
 from selfdrive.car.ford.values import DBC
 from selfdrive.config import Conversions as CV
-from selfdrive.car.interfaces import RadarInterfaceBase
+from selfdrive.car.interfaces import RadarInterfaceBase, RadarFrame
 
 RADAR_MSGS = list(range(0x500, 0x540))
 
@@ -38,11 +37,9 @@ class RadarInterface(RadarInterfaceBase):
       return None
 
 
-    ret = car.RadarData.new_message()
     errors = []
     if not self.rcp.can_valid:
       errors.append("canError")
-    ret.errors = errors
 
     for ii in sorted(self.updated_messages):
       cpt = self.rcp.vl[ii]
@@ -59,19 +56,18 @@ class RadarInterface(RadarInterfaceBase):
       # radar point only valid if there have been enough valid measurements
       if self.validCnt[ii] > 0:
         if ii not in self.pts:
-          self.pts[ii] = car.RadarData.RadarPoint.new_message()
-          self.pts[ii].trackId = self.track_id
+          track_id = self.track_id
           self.track_id += 1
-        self.pts[ii].dRel = cpt['X_Rel']  # from front of car
-        self.pts[ii].yRel = cpt['X_Rel'] * cpt['Angle'] * CV.DEG_TO_RAD  # in car frame's y axis, left is positive
-        self.pts[ii].vRel = cpt['V_Rel']
-        self.pts[ii].aRel = float('nan')
-        self.pts[ii].yvRel = float('nan')
-        self.pts[ii].measured = True
+        else:
+          track_id = self.pts[ii][0]
+        self.pts[ii] = (track_id,
+                        cpt['X_Rel'],  # from front of car
+                        cpt['X_Rel'] * cpt['Angle'] * CV.DEG_TO_RAD,  # in car frame's y axis, left is positive
+                        cpt['V_Rel'],
+                        True)
       else:
         if ii in self.pts:
           del self.pts[ii]
 
-    ret.points = list(self.pts.values())
     self.updated_messages.clear()
-    return ret
+    return RadarFrame(self.pts.values(), errors)
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
+import json
 import traceback
 import struct
+from collections import defaultdict
 from tqdm import tqdm
 
 from selfdrive.car.isotp_parallel_query import IsoTpParallelQuery
+from selfdrive.car.vin import VIN_UNKNOWN
 from selfdrive.swaglog import cloudlog
 from selfdrive.car.fingerprints import FW_VERSIONS
 import panda.python.uds as uds
@@ -41,6 +44,9 @@ TOYOTA_VERSION_RESPONSE = b'\x5a\x88\x01'
 OBD_VERSION_REQUEST = b'\x09\x04'
 OBD_VERSION_RESPONSE = b'\x49\x04'
 
+# last responses, keyed by VIN
+FW_CACHE_PARAM = "CarFirmwareCache"
+
 
 REQUESTS = [
   # Honda
@@ -67,69 +73,184 @@ def chunks(l, n=128):
   for i in range(0, len(l), n):
     yield l[i:i + n]
 
-def match_fw_to_car(fw_versions):
-  candidates = FW_VERSIONS
-  invalid = []
-
-  for candidate, fws in candidates.items():
-    for ecu, expected_versions in fws.items():
-      ecu_type = ecu[0]
-      addr = ecu[1:]
+# ECUs that are allowed to not respond
+OPTIONAL_ECUS = [Ecu.unknown, Ecu.dsu]
+
+MATCH_EXACT = "exact"
+MATCH_PARTIAL = "partial"
+MATCH_FUZZY = "fuzzy"
+
+
+class FwVersionIndex():
+  """Index from (ecu, addr, subaddr, version) to the cars with that version.
+
+  Built once, after which matching a set of found versions is a handful of set
+  operations per known ECU instead of a list lookup per car and ECU."""
+
+  def __init__(self, versions):
+    self.cars = frozenset(versions)
+    self.ecu_cars = defaultdict(set)       # (ecu, addr, subaddr) -> cars listing the ECU
+    self.required_cars = defaultdict(set)  # (ecu, addr, subaddr) -> cars that need the ECU to respond
+    self.version_cars = defaultdict(set)   # (ecu, addr, subaddr, version) -> cars
+
+    for candidate, fws in versions.items():
+      for ecu, expected_versions in fws.items():
+        self.ecu_cars[ecu].add(candidate)
+        if ecu[0] not in OPTIONAL_ECUS:
+          self.required_cars[ecu].add(candidate)
+        for version in expected_versions:
+          self.version_cars[ecu + (version,)].add(candidate)
+
+  def match(self, fw_versions, mode=MATCH_EXACT):
+    """Match the found versions, {(addr, subaddr): version}, to cars.
+
+    exact: every ECU of the car responded with a known version, except
+      optional ECUs that may not respond at all.
+    partial: every ECU of the car that responded has a known version, and at
+      least one of them responded.
+    fuzzy: the cars that ECUs responded with a version unique to, if they
+      all agree on one car.
+
+    Returns the candidates and the ECUs that decided the match, in exact and
+    partial mode mapped to the cars they ruled out, in fuzzy mode to the car
+    they identified."""
+    decided = {}
+
+    if mode == MATCH_FUZZY:
+      for ecu in self.ecu_cars:
+        found_version = fw_versions.get(ecu[1:])
+        cars = self.version_cars.get(ecu + (found_version,), ())
+        if found_version is not None and len(cars) == 1:
+          decided[ecu] = set(cars)
+      candidates = set.union(set(), *decided.values())
+      return (candidates if len(candidates) == 1 else set()), decided
+
+    candidates = set(self.cars)
+    responded = set()
+    for ecu, cars in self.ecu_cars.items():
+      found_version = fw_versions.get(ecu[1:])
+      if found_version is None:
+        invalid = self.required_cars[ecu] if mode == MATCH_EXACT else set()
+      else:
+        invalid = cars - self.version_cars.get(ecu + (found_version,), set())
+        responded |= cars
 
-      found_version = fw_versions.get(addr, None)
+      invalid = invalid & candidates
+      if len(invalid):
+        decided[ecu] = invalid
+        candidates -= invalid
 
-      # Allow DSU not being present
-      if ecu_type in [Ecu.unknown, Ecu.dsu] and found_version is None:
-        continue
+    if mode == MATCH_PARTIAL:
+      candidates &= responded
+    return candidates, decided
 
-      if found_version not in expected_versions:
-        invalid.append(candidate)
-        break
 
-  return set(candidates.keys()) - set(invalid)
+def match_fw_to_car(fw_versions, mode=MATCH_EXACT, index=None):
+  if index is None:
+    index = FW_INDEX
+  return index.match(fw_versions, mode)[0]
 
 
-def get_fw_versions(logcan, sendcan, bus, extra=None, timeout=0.1, debug=False, progress=False):
+def get_ecu_types(versions):
+  """Map (addr, subaddr) of every ECU in versions to its type."""
   ecu_types = {}
+  for c in versions.values():
+    for ecu_type, addr, sub_addr in c.keys():
+      ecu_types.setdefault((addr, sub_addr), ecu_type)
+  return ecu_types
+
+ECU_TYPES = get_ecu_types(FW_VERSIONS)
+FW_INDEX = FwVersionIndex(FW_VERSIONS)
+
+
+def query_fw_versions(logcan, sendcan, bus, addrs, timeout=0.1, debug=False, progress=False):
+  """Send every request variant to every ECU and return {addr: (variant, version)}.
+
+  The variants are pipelined per ECU, so an ECU moves on to its next variant as
+  soon as it answered or timed out the previous one. When an ECU answers
+  several variants the last one in REQUESTS wins."""
+  found = {}
+  for addr_chunk in tqdm(list(chunks(addrs)), disable=not progress):
+    try:
+      query = IsoTpParallelQuery(sendcan, logcan, bus, addr_chunk, debug=debug, variants=REQUESTS)
+      for (addr, variant), version in query.get_variants(2 * timeout).items():
+        if addr not in found or found[addr][0] < variant:
+          found[addr] = (variant, version)
+    except Exception:
+      cloudlog.warning(f"FW query exception: {traceback.format_exc()}")
+  return found
+
+
+def verify_fw_versions(logcan, sendcan, bus, cached, timeout=0.1, debug=False):
+  """Ask the ECUs in cached, {addr: (variant, version)}, only the variant they
+  answered before. Returns cached if they all still report the same version."""
+  try:
+    query = IsoTpParallelQuery(sendcan, logcan, bus, list(cached), debug=debug, variants=REQUESTS)
+    found = query.get_variants(2 * timeout, {addr: [variant] for addr, (variant, _) in cached.items()})
+  except Exception:
+    cloudlog.warning(f"FW verify exception: {traceback.format_exc()}")
+    return None
+
+  for addr, (variant, version) in cached.items():
+    if found.get((addr, variant)) != version:
+      cloudlog.warning(f"FW cache mismatch on {hex(addr[0])} {addr[1]}, rescanning")
+      return None
+  return cached
+
+
+def load_fw_cache(params, vin):
+  """Return the ECUs found the last time this car was started, if it was the last car."""
+  try:
+    dat = json.loads(params.get(FW_CACHE_PARAM))
+    if dat['vin'] != vin:
+      return None
+    return {(addr, sub_addr): (variant, bytes.fromhex(version)) for addr, sub_addr, variant, version in dat['ecus']}
+  except Exception:
+    return None
+
+def get_cached_versions(found):
+  return {addr: version for addr, (_, version) in found.items()}
+
+def save_fw_cache(params, vin, found):
+  ecus = [[addr, sub_addr, variant, version.hex()] for (addr, sub_addr), (variant, version) in found.items()]
+  params.put(FW_CACHE_PARAM, json.dumps({'vin': vin, 'ecus': ecus}))
+
+
+def get_fw_versions(logcan, sendcan, bus, extra=None, timeout=0.1, debug=False, progress=False, vin=None, params=None):
+  """Query the firmware versions of all known ECUs.
+
+  With a known vin and params, the ECUs found on the last start of the same car
+  are verified first and the full scan only runs when something changed."""
+  ecu_types, index = ECU_TYPES, FW_INDEX
+  if extra is not None:
+    versions = dict(FW_VERSIONS, **extra)
+    ecu_types, index = get_ecu_types(versions), FwVersionIndex(versions)
 
-  # Extract ECU adresses to query from fingerprints
-  # ECUs using a subadress need be queried one by one, the rest can be done in parallel
-  addrs = []
-  parallel_addrs = []
+  use_cache = params is not None and vin is not None and vin != VIN_UNKNOWN
 
-  versions = FW_VERSIONS
-  if extra is not None:
-    versions.update(extra)
+  verified = None
+  if use_cache:
+    cached = load_fw_cache(params, vin)
+    if cached:
+      verified = verify_fw_versions(logcan, sendcan, bus, cached, timeout, debug)
 
-  for c in versions.values():
-    for ecu_type, addr, sub_addr in c.keys():
-      a = (addr, sub_addr)
-      if a not in ecu_types:
-        ecu_types[a] = ecu_type
+  # a cache that doesn't identify the car, e.g. from a first scan that missed
+  # some ECUs, is a miss. The full scan adds to it so the cache can only grow
+  found = verified
+  if found is None or len(match_fw_to_car(get_cached_versions(found), index=index)) != 1:
+    found = dict(verified or {})
+    found.update(query_fw_versions(logcan, sendcan, bus, list(ecu_types), timeout, debug, progress))
+    if use_cache:
+      save_fw_cache(params, vin, found)
 
-      if sub_addr is None:
-        parallel_addrs.append(a)
-      else:
-        addrs.append([a])
-  addrs.insert(0, parallel_addrs)
-
-  fw_versions = {}
-  for i, addr in enumerate(tqdm(addrs, disable=not progress)):
-    for addr_chunk in chunks(addr):
-      for request, response in REQUESTS:
-        try:
-          query = IsoTpParallelQuery(sendcan, logcan, bus, addr_chunk, request, response, debug=debug)
-          t = 2 * timeout if i == 0 else timeout
-          fw_versions.update(query.get_data(t))
-        except Exception:
-          cloudlog.warning(f"FW query exception: {traceback.format_exc()}")
+  fw_versions = get_cached_versions(found)
 
   # Build capnp list to put into CarParams
   car_fw = []
   for addr, version in fw_versions.items():
     f = car.CarParams.CarFw.new_message()
 
-    f.ecu = ecu_types[addr]
+    f.ecu = ecu_types.get(addr, Ecu.unknown)
     f.fwVersion = version
     f.address = addr[0]
 
@@ -138,7 +259,7 @@ def get_fw_versions(logcan, sendcan, bus, extra=None, timeout=0.1, debug=False,
 
     car_fw.append(f)
 
-  candidates = match_fw_to_car(fw_versions)
+  candidates = match_fw_to_car(fw_versions, index=index)
   return candidates, car_fw
 
 
@@ -56,6 +56,7 @@ class CarState():
     # initialize can parser
 
     self.car_fingerprint = CP.carFingerprint
+    self.min_enable_speed = CP.minEnableSpeed
     self.cruise_buttons = CruiseButtons.UNPRESS
     self.left_blinker_on = False
     self.prev_left_blinker_on = False
@@ -286,7 +286,7 @@ class CarInterface(CarInterfaceBase):
         events.append(create_event('wrongCarMode', [ET.NO_ENTRY, ET.USER_DISABLE]))
       if self.CS.gear_shifter == 3:
         events.append(create_event('reverseGear', [ET.NO_ENTRY, ET.IMMEDIATE_DISABLE]))
-      if ret.vEgo < self.CP.minEnableSpeed:
+      if ret.vEgo < self.CS.min_enable_speed:
         events.append(create_event('speedTooLow', [ET.NO_ENTRY]))
       if self.CS.park_brake:
         events.append(create_event('parkBrake', [ET.NO_ENTRY, ET.USER_DISABLE]))
@@ -2,12 +2,11 @@
 from __future__ import print_function
 import math
 import time
-from cereal import car
 from opendbc.can.parser import CANParser
 from selfdrive.car.gm.interface import CanBus
 from selfdrive.car.gm.values import DBC, CAR
 from selfdrive.config import Conversions as CV
-from selfdrive.car.interfaces import RadarInterfaceBase
+from selfdrive.car.interfaces import RadarInterfaceBase, RadarFrame
 
 RADAR_HEADER_MSG = 1120
 SLOT_1_MSG = RADAR_HEADER_MSG + 1
@@ -60,7 +59,7 @@ class RadarInterface(RadarInterfaceBase):
   def update(self, can_strings):
     if self.rcp is None:
       time.sleep(self.radar_ts)   # nothing to do
-      return car.RadarData.new_message()
+      return RadarFrame()
 
     vls = self.rcp.update_strings(can_strings)
     self.updated_messages.update(vls)
@@ -68,7 +67,6 @@ class RadarInterface(RadarInterfaceBase):
     if self.trigger_msg not in self.updated_messages:
       return None
 
-    ret = car.RadarData.new_message()
     header = self.rcp.vl[RADAR_HEADER_MSG]
     fault = header['FLRRSnsrBlckd'] or header['FLRRSnstvFltPrsntInt'] or \
       header['FLRRYawRtPlsblityFlt'] or header['FLRRHWFltPrsntInt'] or \
@@ -78,7 +76,6 @@ class RadarInterface(RadarInterfaceBase):
       errors.append("canError")
     if fault:
       errors.append("fault")
-    ret.errors = errors
 
     currentTargets = set()
     num_targets = header['FLRRNumValidTargets']
@@ -97,21 +94,17 @@ class RadarInterface(RadarInterfaceBase):
       if cpt['TrkRange'] > 0.0:
         targetId = cpt['TrkObjectID']
         currentTargets.add(targetId)
-        if targetId not in self.pts:
-          self.pts[targetId] = car.RadarData.RadarPoint.new_message()
-          self.pts[targetId].trackId = targetId
         distance = cpt['TrkRange']
-        self.pts[targetId].dRel = distance # from front of car
-        # From driver's pov, left is positive
-        self.pts[targetId].yRel = math.sin(cpt['TrkAzimuth'] * CV.DEG_TO_RAD) * distance
-        self.pts[targetId].vRel = cpt['TrkRangeRate']
-        self.pts[targetId].aRel = float('nan')
-        self.pts[targetId].yvRel = float('nan')
+        self.pts[targetId] = (targetId,
+                              distance,  # from front of car
+                              # From driver's pov, left is positive
+                              math.sin(cpt['TrkAzimuth'] * CV.DEG_TO_RAD) * distance,
+                              cpt['TrkRangeRate'],
+                              False)
 
     for oldTarget in list(self.pts.keys()):
       if not oldTarget in currentTargets:
         del self.pts[oldTarget]
 
-    ret.points = list(self.pts.values())
     self.updated_messages.clear()
-    return ret
+    return RadarFrame(self.pts.values(), errors)
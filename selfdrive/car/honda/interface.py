@@ -7,6 +7,7 @@ from selfdrive.swaglog import cloudlog
 from selfdrive.config import Conversions as CV
 from selfdrive.controls.lib.drive_helpers import create_event, EventTypes as ET, get_events
 from selfdrive.controls.lib.vehicle_model import VehicleModel
+from opendbc.can.parser import CANDemux
 from selfdrive.car.honda.carstate import CarState, get_can_parser, get_cam_can_parser
 from selfdrive.car.honda.values import CruiseButtons, CAR, HONDA_BOSCH, ECU, ECU_FINGERPRINT, FINGERPRINTS
 from selfdrive.car import STD_CARGO_KG, CivicParams, scale_rot_inertia, scale_tire_stiffness, is_ecu_disconnected, gen_empty_fingerprint
@@ -84,6 +85,7 @@ class CarInterface(CarInterfaceBase):
 
     self.cp = get_can_parser(CP)
     self.cp_cam = get_cam_can_parser(CP)
+    self.can_demux = CANDemux([self.cp, self.cp_cam])
 
     # *** init the major players ***
     self.CS = CarState(CP)
@@ -377,8 +379,7 @@ class CarInterface(CarInterfaceBase):
   # returns a car.CarState
   def update(self, c, can_strings):
     # ******************* do can recv *******************
-    self.cp.update_strings(can_strings)
-    self.cp_cam.update_strings(can_strings)
+    self.can_demux.update_strings(can_strings)
 
     self.CS.update(self.cp, self.cp_cam)
 
@@ -400,7 +401,7 @@ class CarInterface(CarInterfaceBase):
 
     # gas pedal
     ret.gas = self.CS.car_gas / 256.0
-    if not self.CP.enableGasInterceptor:
+    if not self.CS.enable_gas_interceptor:
       ret.gasPressed = self.CS.pedal_gas > 0
     else:
       ret.gasPressed = self.CS.user_gas_pressed
@@ -409,7 +410,7 @@ class CarInterface(CarInterfaceBase):
     ret.brake = self.CS.user_brake
     ret.brakePressed = self.CS.brake_pressed != 0
     # FIXME: read sendcan for brakelights
-    brakelights_threshold = 0.02 if self.CS.CP.carFingerprint == CAR.CIVIC else 0.1
+    brakelights_threshold = 0.02 if self.CS.car_fingerprint == CAR.CIVIC else 0.1
     ret.brakeLights = bool(self.CS.brake_switch or
                            c.actuators.brake > brakelights_threshold)
 
@@ -508,12 +509,12 @@ class CarInterface(CarInterfaceBase):
       events.append(create_event('wrongCarMode', [ET.NO_ENTRY, ET.USER_DISABLE]))
     if ret.gearShifter == GearShifter.reverse:
       events.append(create_event('reverseGear', [ET.NO_ENTRY, ET.IMMEDIATE_DISABLE]))
-    if self.CS.brake_hold and self.CS.CP.carFingerprint not in HONDA_BOSCH:
+    if self.CS.brake_hold and self.CS.car_fingerprint not in HONDA_BOSCH:
       events.append(create_event('brakeHold', [ET.NO_ENTRY, ET.USER_DISABLE]))
     if self.CS.park_brake:
       events.append(create_event('parkBrake', [ET.NO_ENTRY, ET.USER_DISABLE]))
 
-    if self.CP.enableCruise and ret.vEgo < self.CP.minEnableSpeed:
+    if self.CS.enable_cruise and ret.vEgo < self.CS.min_enable_speed:
       events.append(create_event('speedTooLow', [ET.NO_ENTRY]))
 
     # disable on pedals rising edge or when brake is pressed and speed isn't zero
@@ -526,13 +527,13 @@ class CarInterface(CarInterfaceBase):
 
     # it can happen that car cruise disables while comma system is enabled: need to
     # keep braking if needed or if the speed is very low
-    if self.CP.enableCruise and not ret.cruiseState.enabled and (c.actuators.brake <= 0. or not self.CP.openpilotLongitudinalControl):
+    if self.CS.enable_cruise and not ret.cruiseState.enabled and (c.actuators.brake <= 0. or not self.CS.openpilot_longitudinal_control):
       # non loud alert if cruise disbales below 25mph as expected (+ a little margin)
-      if ret.vEgo < self.CP.minEnableSpeed + 2.:
+      if ret.vEgo < self.CS.min_enable_speed + 2.:
         events.append(create_event('speedTooLow', [ET.IMMEDIATE_DISABLE]))
       else:
         events.append(create_event("cruiseDisabled", [ET.IMMEDIATE_DISABLE]))
-    if self.CS.CP.minEnableSpeed > 0 and ret.vEgo < 0.001:
+    if self.CS.min_enable_speed > 0 and ret.vEgo < 0.001:
       events.append(create_event('manualRestart', [ET.WARNING]))
 
     cur_time = self.frame * DT_CTRL
@@ -549,7 +550,7 @@ class CarInterface(CarInterfaceBase):
       if b.type == "cancel" and b.pressed:
         events.append(create_event('buttonCancel', [ET.USER_DISABLE]))
 
-    if self.CP.enableCruise:
+    if self.CS.enable_cruise:
       # KEEP THIS EVENT LAST! send enable event if button is pressed and there are
       # NO_ENTRY events, so controlsd will display alerts. Also not send enable events
       # too close in time, so a no_entry will not be followed by another one.
@@ -1,9 +1,8 @@
 #!/usr/bin/env python3
 import os
 import time
-from cereal import car
 from opendbc.can.parser import CANParser
-from selfdrive.car.interfaces import RadarInterfaceBase
+from selfdrive.car.interfaces import RadarInterfaceBase, RadarFrame
 
 def _create_nidec_can_parser():
   dbc_f = 'acura_ilx_2016_nidec.dbc'
@@ -41,7 +40,7 @@ class RadarInterface(RadarInterfaceBase):
     if self.radar_off_can:
       if 'NO_RADAR_SLEEP' not in os.environ:
         time.sleep(self.radar_ts)
-      return car.RadarData.new_message()
+      return RadarFrame()
 
     vls = self.rcp.update_strings(can_strings)
     self.updated_messages.update(vls)
@@ -55,8 +54,6 @@ class RadarInterface(RadarInterfaceBase):
 
 
   def _update(self, updated_messages):
-    ret = car.RadarData.new_message()
-
     for ii in sorted(updated_messages):
       cpt = self.rcp.vl[ii]
       if ii == 0x400:
@@ -65,15 +62,15 @@ class RadarInterface(RadarInterfaceBase):
         self.radar_wrong_config = cpt['RADAR_STATE'] == 0x69
       elif cpt['LONG_DIST'] < 255:
         if ii not in self.pts or cpt['NEW_TRACK']:
-          self.pts[ii] = car.RadarData.RadarPoint.new_message()
-          self.pts[ii].trackId = self.track_id
+          track_id = self.track_id
           self.track_id += 1
-        self.pts[ii].dRel = cpt['LONG_DIST']  # from front of car
-        self.pts[ii].yRel = -cpt['LAT_DIST']  # in car frame's y axis, left is positive
-        self.pts[ii].vRel = cpt['REL_SPEED']
-        self.pts[ii].aRel = float('nan')
-        self.pts[ii].yvRel = float('nan')
-        self.pts[ii].measured = True
+        else:
+          track_id = self.pts[ii][0]
+        self.pts[ii] = (track_id,
+                        cpt['LONG_DIST'],  # from front of car
+                        -cpt['LAT_DIST'],  # in car frame's y axis, left is positive
+                        cpt['REL_SPEED'],
+                        True)
       else:
         if ii in self.pts:
           del self.pts[ii]
@@ -85,8 +82,5 @@ class RadarInterface(RadarInterfaceBase):
       errors.append("fault")
     if self.radar_wrong_config:
       errors.append("wrongConfig")
-    ret.errors = errors
-
-    ret.points = list(self.pts.values())
 
-    return ret
+    return RadarFrame(self.pts.values(), errors)
@@ -131,6 +131,7 @@ class CarState():
 
     # initialize can parser
     self.car_fingerprint = CP.carFingerprint
+    self.min_steer_speed = CP.minSteerSpeed
 
     # vEgo kalman filter
     dt = 0.01
@@ -3,6 +3,7 @@ from cereal import car
 from selfdrive.config import Conversions as CV
 from selfdrive.controls.lib.drive_helpers import EventTypes as ET, create_event
 from selfdrive.controls.lib.vehicle_model import VehicleModel
+from opendbc.can.parser import CANDemux
 from selfdrive.car.hyundai.carstate import CarState, get_can_parser, get_camera_parser
 from selfdrive.car.hyundai.values import ECU, ECU_FINGERPRINT, CAR, get_hud_alerts, FEATURES, FINGERPRINTS
 from selfdrive.car import STD_CARGO_KG, scale_rot_inertia, scale_tire_stiffness, is_ecu_disconnected, gen_empty_fingerprint
@@ -28,6 +29,7 @@ class CarInterface(CarInterfaceBase):
     self.CS = CarState(CP)
     self.cp = get_can_parser(CP)
     self.cp_cam = get_camera_parser(CP)
+    self.can_demux = CANDemux([self.cp, self.cp_cam])
 
     self.CC = None
     if CarController is not None:
@@ -151,8 +153,7 @@ class CarInterface(CarInterfaceBase):
   # returns a car.CarState
   def update(self, c, can_strings):
     # ******************* do can recv *******************
-    self.cp.update_strings(can_strings)
-    self.cp_cam.update_strings(can_strings)
+    self.can_demux.update_strings(can_strings)
 
     self.CS.update(self.cp, self.cp_cam)
     # create message
@@ -172,9 +173,9 @@ class CarInterface(CarInterfaceBase):
     ret.wheelSpeeds.rr = self.CS.v_wheel_rr
 
     # gear shifter
-    if self.CP.carFingerprint in FEATURES["use_cluster_gears"]:
+    if self.CS.car_fingerprint in FEATURES["use_cluster_gears"]:
       ret.gearShifter = self.CS.gear_shifter_cluster
-    elif self.CP.carFingerprint in FEATURES["use_tcu_gears"]:
+    elif self.CS.car_fingerprint in FEATURES["use_tcu_gears"]:
       ret.gearShifter = self.CS.gear_tcu
     else:
       ret.gearShifter = self.CS.gear_shifter
@@ -227,9 +228,9 @@ class CarInterface(CarInterfaceBase):
     ret.seatbeltUnlatched = not self.CS.seatbelt
 
     # low speed steer alert hysteresis logic (only for cars with steer cut off above 10 m/s)
-    if ret.vEgo < (self.CP.minSteerSpeed + 2.) and self.CP.minSteerSpeed > 10.:
+    if ret.vEgo < (self.CS.min_steer_speed + 2.) and self.CS.min_steer_speed > 10.:
       self.low_speed_alert = True
-    if ret.vEgo > (self.CP.minSteerSpeed + 4.):
+    if ret.vEgo > (self.CS.min_steer_speed + 4.):
       self.low_speed_alert = False
 
     events = []
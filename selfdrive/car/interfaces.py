@@ -1,5 +1,6 @@
 import os
 import time
+import numpy as np
 from cereal import car
 from selfdrive.car import gen_empty_fingerprint
 
@@ -29,6 +30,36 @@ class CarInterfaceBase():
   def apply(self, c):
     raise NotImplementedError
 
+# a radar point, as radard reads it
+RADAR_POINT = np.dtype([('trackId', '<u8'), ('dRel', '<f4'), ('yRel', '<f4'), ('vRel', '<f4'), ('measured', '?')])
+
+
+class RadarFrame():
+  """The points and errors of a radar frame. The points are packed in a RADAR_POINT
+  array, from (trackId, dRel, yRel, vRel, measured) tuples, and the frame is only
+  turned into a car.RadarData message when it is logged."""
+
+  def __init__(self, points=(), errors=(), can_mono_times=()):
+    self.points = np.array(list(points), dtype=RADAR_POINT)
+    self.errors = list(errors)
+    self.canMonoTimes = list(can_mono_times)
+
+  def to_capnp(self):
+    ret = car.RadarData.new_message()
+    ret.errors = self.errors
+    ret.canMonoTimes = self.canMonoTimes
+    ret.init('points', len(self.points))
+    for pt, (track_id, d_rel, y_rel, v_rel, measured) in zip(ret.points, self.points.tolist()):
+      pt.trackId = track_id
+      pt.dRel = d_rel
+      pt.yRel = y_rel
+      pt.vRel = v_rel
+      pt.aRel = float('nan')
+      pt.yvRel = float('nan')
+      pt.measured = measured
+    return ret
+
+
 class RadarInterfaceBase():
   def __init__(self, CP):
     self.pts = {}
@@ -36,9 +67,7 @@ class RadarInterfaceBase():
     self.radar_ts = CP.radarTimeStep
 
   def update(self, can_strings):
-    ret = car.RadarData.new_message()
-
     if 'NO_RADAR_SLEEP' not in os.environ:
       time.sleep(self.radar_ts)  # radard runs on RI updates
 
-    return ret
+    return RadarFrame()
@@ -1,6 +1,5 @@
 import time
-from collections import defaultdict
-from functools import partial
+from collections import defaultdict, deque
 
 import cereal.messaging as messaging
 from selfdrive.swaglog import cloudlog
@@ -9,12 +8,12 @@ from panda.python.uds import CanClient, IsoTpMessage, FUNCTIONAL_ADDRS, get_rx_a
 
 
 class IsoTpParallelQuery():
-  def __init__(self, sendcan, logcan, bus, addrs, request, response, functional_addr=False, debug=False):
+  def __init__(self, sendcan, logcan, bus, addrs, request=None, response=None, functional_addr=False, debug=False, variants=None):
     self.sendcan = sendcan
     self.logcan = logcan
     self.bus = bus
-    self.request = request
-    self.response = response
+    # (requests, expected responses) sequences sent to every ECU, one after the other
+    self.variants = variants if variants is not None else [(request, response)]
     self.debug = debug
     self.functional_addr = functional_addr
 
@@ -28,101 +27,172 @@ class IsoTpParallelQuery():
     self.msg_addrs = {tx_addr: get_rx_addr_for_tx_addr(tx_addr[0]) for tx_addr in self.real_addrs}
     self.msg_buffer = defaultdict(list)
 
+    # rx addr -> whether the ECUs answering on it are told apart by subaddress
+    self.rx_routes = {rx_addr: tx_addr[1] is not None for tx_addr, rx_addr in self.msg_addrs.items() if rx_addr is not None}
+
+  def _rx_key(self, tx_addr):
+    # rx_addr not set when using functional tx addr
+    return (self.msg_addrs[tx_addr] or tx_addr[0], tx_addr[1])
+
   def rx(self):
-    """Drain can socket and sort messages into buffers based on address"""
+    """Drain can socket and route every message to the buffer of the query it
+    answers. Returns the keys of the buffers that received messages."""
+    updated = set()
     can_packets = messaging.drain_sock(self.logcan, wait_for_one=True)
 
     for packet in can_packets:
       for msg in packet.can:
-        if msg.src == self.bus:
-          if self.functional_addr:
-            if (0x7E8 <= msg.address <= 0x7EF) or (0x18DAF100 <= msg.address <= 0x18DAF1FF):
-              fn_addr = next(a for a in FUNCTIONAL_ADDRS if msg.address - a <= 32)
-              self.msg_buffer[fn_addr].append((msg.address, msg.busTime, msg.dat, msg.src))
-          elif msg.address in self.msg_addrs.values():
-            self.msg_buffer[msg.address].append((msg.address, msg.busTime, msg.dat, msg.src))
+        if msg.src != self.bus:
+          continue
+
+        addr = msg.address
+        if self.functional_addr:
+          if 0x7E8 <= addr <= 0x7EF:
+            key = (FUNCTIONAL_ADDRS[0], None)
+          elif 0x18DAF100 <= addr <= 0x18DAF1FF:
+            key = (FUNCTIONAL_ADDRS[1], None)
+          else:
+            continue
+          dat = msg.dat
+        else:
+          sub_addressed = self.rx_routes.get(addr)
+          if sub_addressed is None:
+            continue
+          dat = msg.dat
+          if sub_addressed:
+            if len(dat) == 0:
+              continue
+            key = (addr, dat[0])
+          else:
+            key = (addr, None)
+
+        self.msg_buffer[key].append((addr, msg.busTime, dat, msg.src))
+        updated.add(key)
+
+    return updated
 
   def _can_tx(self, tx_addr, dat, bus):
     """Helper function to send single message"""
     msg = [tx_addr, 0, dat, bus]
     self.sendcan.send(can_list_to_can_capnp([msg], msgtype='sendcan'))
 
-  def _can_rx(self, addr, sub_addr=None):
-    """Helper function to retrieve message with specified address and subadress from buffer"""
-    keep_msgs = []
-
-    if sub_addr is None:
-      msgs = self.msg_buffer[addr]
-    else:
-      # Filter based on subadress
-      msgs = []
-      for m in self.msg_buffer[addr]:
-        first_byte = m[2][0]
-        if first_byte == sub_addr:
-          msgs.append(m)
-        else:
-          keep_msgs.append(m)
-
-    self.msg_buffer[addr] = keep_msgs
-    return msgs
+  def _can_rx(self, key):
+    """Helper function to retrieve the messages routed to a query"""
+    return self.msg_buffer.pop(key, [])
 
   def _drain_rx(self):
     messaging.drain_sock(self.logcan)
     self.msg_buffer = defaultdict(list)
 
-  def get_data(self, timeout):
+  def _start_query(self, tx_addr, request):
+    rx_addr = self.msg_addrs[tx_addr]
+    sub_addr = tx_addr[1]
+    key = self._rx_key(tx_addr)
+
+    can_client = CanClient(self._can_tx, lambda: self._can_rx(key), tx_addr[0], rx_addr, self.bus, sub_addr=sub_addr, debug=self.debug)
+
+    max_len = 8 if sub_addr is None else 7
+
+    msg = IsoTpMessage(can_client, timeout=0, max_len=max_len, debug=self.debug)
+    msg.send(request)
+    return msg
+
+  def _late_response(self, dat, variant, previous):
+    """Whether dat answers one of the previous variants instead of variant: it
+    starts with one of their expected responses, or is a negative response to
+    a service only they requested."""
+    request, _ = self.variants[variant]
+    services = set(r[:1] for r in request)
+    for prev in previous:
+      prev_request, prev_response = self.variants[prev]
+      if any(dat[:len(r)] == r for r in prev_response):
+        return True
+      if any(dat[:2] == b'\x7f' + r[:1] for r in prev_request if r[:1] not in services):
+        return True
+    return False
+
+  def get_variants(self, timeout, variants=None):
+    """Query all ECUs with every request variant, or only the variants listed
+    for their tx addr in variants, and return the responses by (tx addr,
+    variant index).
+
+    ECUs sharing a tx address are told apart by subaddress and can only be
+    queried one after the other, as can the variants sent to one ECU.
+    Everything else is queried in parallel. Each query has timeout seconds to
+    be answered from the moment it's sent, this returns as soon as every query
+    was answered or timed out."""
     self._drain_rx()
 
-    # Create message objects
-    msgs = {}
-    request_counter = {}
-    request_done = {}
-    for tx_addr, rx_addr in self.msg_addrs.items():
-      # rx_addr not set when using functional tx addr
-      id_addr = rx_addr or tx_addr[0]
-      sub_addr = tx_addr[1]
-
-      can_client = CanClient(self._can_tx, partial(self._can_rx, id_addr, sub_addr=sub_addr), tx_addr[0], rx_addr, self.bus, sub_addr=sub_addr, debug=self.debug)
+    # queue the queries per tx address, only the head of each queue is in flight
+    queues = defaultdict(deque)
+    for tx_addr in self.msg_addrs:
+      indices = range(len(self.variants)) if variants is None else variants.get(tx_addr, [])
+      queues[tx_addr[0]].extend((tx_addr, i) for i in indices)
 
-      max_len = 8 if sub_addr is None else 7
+    # rx key -> [(tx_addr, variant), isotp message, request counter, deadline]
+    active = {}
+    # rx key -> variants already sent, whose responses can still arrive late
+    sent = defaultdict(list)
 
-      msg = IsoTpMessage(can_client, timeout=0, max_len=max_len, debug=self.debug)
-      msg.send(self.request[0])
+    def start_next(queue):
+      if len(queue):
+        query = queue.popleft()
+        request = self.variants[query[1]][0][0]
+        key = self._rx_key(query[0])
+        active[key] = [query, self._start_query(query[0], request), 0, time.time() + timeout]
+        sent[key].append(query[1])
 
-      msgs[tx_addr] = msg
-      request_counter[tx_addr] = 0
-      request_done[tx_addr] = False
+    for queue in queues.values():
+      start_next(queue)
 
     results = {}
-    start_time = time.time()
-    while True:
-      self.rx()
-
-      if all(request_done.values()):
-        break
-
-      for tx_addr, msg in msgs.items():
+    while len(active):
+      for key in self.rx():
+        if key not in active:
+          # late or unsolicited response, nobody will read it
+          self.msg_buffer.pop(key, None)
+
+      # every pending message is polled, not only the ones that got frames, so
+      # the isotp state machines run on every loop like in a serial query
+      for key in list(active):
+        query = active[key]
+        (tx_addr, variant), msg, counter, _ = query
         dat = msg.recv()
 
         if not dat:
           continue
 
-        counter = request_counter[tx_addr]
-        expected_response = self.response[counter]
+        request, response = self.variants[variant]
+        expected_response = response[counter]
         response_valid = dat[:len(expected_response)] == expected_response
 
         if response_valid:
-          if counter + 1 < len(self.request):
-            msg.send(self.request[counter + 1])
-            request_counter[tx_addr] += 1
-          else:
-            results[tx_addr] = dat[len(expected_response):]
-            request_done[tx_addr] = True
+          if counter + 1 < len(request):
+            msg.send(request[counter + 1])
+            query[2] += 1
+            continue
+          results[(tx_addr, variant)] = dat[len(expected_response):]
+        elif self._late_response(dat, variant, sent[key][:-1]):
+          # answer to a variant that timed out before on this key, keep waiting for ours
+          continue
         else:
-          request_done[tx_addr] = True
           cloudlog.warning(f"iso-tp query bad response: 0x{bytes.hex(dat)}")
 
-      if time.time() - start_time > timeout:
-        break
+        del active[key]
+        start_next(queues[tx_addr[0]])
 
+      t = time.time()
+      for key, query in list(active.items()):
+        if t > query[3]:
+          del active[key]
+          start_next(queues[query[0][0][0]])
+
+    return results
+
+  def get_data(self, timeout):
+    """Query all ECUs and return their responses by tx addr. When ECUs answer
+    several request variants the response to the last one is kept."""
+    results = {}
+    for (tx_addr, _), dat in sorted(self.get_variants(timeout).items(), key=lambda r: r[0][1]):
+      results[tx_addr] = dat
     return results
@@ -3,6 +3,7 @@ from cereal import car
 from selfdrive.config import Conversions as CV
 from selfdrive.controls.lib.drive_helpers import create_event, EventTypes as ET
 from selfdrive.controls.lib.vehicle_model import VehicleModel
+from opendbc.can.parser import CANDemux
 from selfdrive.car.subaru.values import CAR
 from selfdrive.car.subaru.carstate import CarState, get_powertrain_can_parser, get_camera_can_parser
 from selfdrive.car import STD_CARGO_KG, scale_rot_inertia, scale_tire_stiffness, gen_empty_fingerprint
@@ -23,6 +24,7 @@ class CarInterface(CarInterfaceBase):
     self.VM = VehicleModel(CP)
     self.pt_cp = get_powertrain_can_parser(CP)
     self.cam_cp = get_camera_can_parser(CP)
+    self.can_demux = CANDemux([self.pt_cp, self.cam_cp])
 
     self.gas_pressed_prev = False
 
@@ -95,8 +97,7 @@ class CarInterface(CarInterfaceBase):
 
   # returns a car.CarState
   def update(self, c, can_strings):
-    self.pt_cp.update_strings(can_strings)
-    self.cam_cp.update_strings(can_strings)
+    self.can_demux.update_strings(can_strings)
 
     self.CS.update(self.pt_cp, self.cam_cp)
 
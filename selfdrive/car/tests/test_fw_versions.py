@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+import copy
+import random
+import unittest
+
+from cereal import car
+from selfdrive.car.fingerprints import FW_VERSIONS
+from selfdrive.car.toyota.values import CAR as TOYOTA
+from selfdrive.car.fw_versions import get_fw_versions, load_fw_cache, match_fw_to_car, FW_INDEX, OPTIONAL_ECUS, \
+                                      MATCH_PARTIAL, MATCH_FUZZY, SHORT_TESTER_PRESENT_REQUEST, \
+                                      SHORT_TESTER_PRESENT_RESPONSE, TOYOTA_VERSION_REQUEST, TOYOTA_VERSION_RESPONSE, \
+                                      UDS_VERSION_REQUEST, UDS_VERSION_RESPONSE
+from selfdrive.car.tests.simulated_ecu import SimulatedEcu, SimulatedCanBus
+
+Ecu = car.CarParams.Ecu
+
+BUS = 1
+TIMEOUT = 0.01
+VIN = "JTDKARFU0J3000000"
+
+
+class FakeParams():
+  def __init__(self):
+    self.params = {}
+
+  def get(self, key):
+    return self.params.get(key)
+
+  def put(self, key, dat):
+    self.params[key] = dat.encode('utf8')
+
+
+def toyota_ecus(car_name):
+  ecus = []
+  for (_, addr, sub_addr), versions in FW_VERSIONS[car_name].items():
+    ecus.append(SimulatedEcu(addr, sub_addr, {
+      SHORT_TESTER_PRESENT_REQUEST: SHORT_TESTER_PRESENT_RESPONSE,
+      TOYOTA_VERSION_REQUEST: TOYOTA_VERSION_RESPONSE + versions[0],
+    }))
+  return ecus
+
+
+def fw_dict(car_fw):
+  return {(Ecu.schema.enumerants[str(fw.ecu)], fw.address, fw.subAddress if fw.subAddress != 0 else None): [fw.fwVersion]
+          for fw in car_fw}
+
+
+class TestFwVersions(unittest.TestCase):
+  def test_discovery(self):
+    can = SimulatedCanBus(toyota_ecus(TOYOTA.COROLLA_TSS2), BUS)
+    candidates, car_fw = get_fw_versions(can, can, BUS, timeout=TIMEOUT)
+
+    self.assertEqual(candidates, {TOYOTA.COROLLA_TSS2})
+    self.assertEqual(fw_dict(car_fw), FW_VERSIONS[TOYOTA.COROLLA_TSS2])
+
+  def test_last_variant_wins(self):
+    ecu = SimulatedEcu(0x18da30f1, responses={
+      UDS_VERSION_REQUEST: UDS_VERSION_RESPONSE + b'first',
+      b'\x3e\x00': b'\x7e\x00',
+      b'\x10\x01': b'\x50\x01\x00\x32\x01\xf4',
+      b'\x10\x03': b'\x50\x03\x00\x32\x01\xf4',
+    })
+    can = SimulatedCanBus([ecu], BUS)
+    ecu.responses[UDS_VERSION_REQUEST] = UDS_VERSION_RESPONSE + b'second'
+
+    _, car_fw = get_fw_versions(can, can, BUS, timeout=TIMEOUT)
+    self.assertEqual([fw.fwVersion for fw in car_fw], [b'second'])
+
+  def test_extra(self):
+    versions = copy.deepcopy(FW_VERSIONS)
+    can = SimulatedCanBus([SimulatedEcu(0x7e5, responses={UDS_VERSION_REQUEST: UDS_VERSION_RESPONSE + b'extra'})], BUS)
+
+    _, car_fw = get_fw_versions(can, can, BUS, extra={"DEBUG": {(Ecu.unknown, 0x7e5, None): []}}, timeout=TIMEOUT)
+    self.assertEqual([(fw.address, fw.fwVersion) for fw in car_fw], [(0x7e5, b'extra')])
+    self.assertEqual(FW_VERSIONS, versions)
+
+  def test_cache(self):
+    params = FakeParams()
+    ecus = toyota_ecus(TOYOTA.COROLLA_TSS2)
+    can = SimulatedCanBus(ecus, BUS)
+    candidates, car_fw = get_fw_versions(can, can, BUS, timeout=TIMEOUT, vin=VIN, params=params)
+    cached = load_fw_cache(params, VIN)
+    self.assertEqual(len(cached), len(ecus))
+    self.assertIsNone(load_fw_cache(params, "0" * 17))
+
+    # only the cached ECUs are asked, and only the variant they answered
+    for ecu in ecus:
+      ecu.requests = []
+    can = SimulatedCanBus(ecus, BUS)
+    cached_candidates, cached_car_fw = get_fw_versions(can, can, BUS, timeout=TIMEOUT, vin=VIN, params=params)
+    self.assertEqual(cached_candidates, candidates)
+    self.assertEqual(fw_dict(cached_car_fw), fw_dict(car_fw))
+    self.assertEqual(set(addr for addr, _ in can.sent), set(addr for addr, _ in cached))
+    for ecu in ecus:
+      self.assertEqual(ecu.requests, [SHORT_TESTER_PRESENT_REQUEST, TOYOTA_VERSION_REQUEST])
+
+    # a changed version falls back to a full scan and updates the cache
+    ecus[0].responses[TOYOTA_VERSION_REQUEST] = TOYOTA_VERSION_RESPONSE + b'new version'
+    can = SimulatedCanBus(ecus, BUS)
+    candidates, _ = get_fw_versions(can, can, BUS, timeout=TIMEOUT, vin=VIN, params=params)
+    self.assertEqual(candidates, set())
+    self.assertEqual(load_fw_cache(params, VIN)[(ecus[0].addr, ecus[0].sub_addr)], (1, b'new version'))
+
+  def test_partial_cache(self):
+    params = FakeParams()
+    ecus = toyota_ecus(TOYOTA.COROLLA_TSS2)
+
+    # an ECU that wasn't awake on the first start doesn't get locked out by the cache
+    can = SimulatedCanBus(ecus[1:], BUS)
+    candidates, _ = get_fw_versions(can, can, BUS, timeout=TIMEOUT, vin=VIN, params=params)
+    self.assertEqual(candidates, set())
+    self.assertEqual(len(load_fw_cache(params, VIN)), len(ecus) - 1)
+
+    can = SimulatedCanBus(ecus, BUS)
+    candidates, car_fw = get_fw_versions(can, can, BUS, timeout=TIMEOUT, vin=VIN, params=params)
+    self.assertEqual(candidates, {TOYOTA.COROLLA_TSS2})
+    self.assertEqual(fw_dict(car_fw), FW_VERSIONS[TOYOTA.COROLLA_TSS2])
+    self.assertEqual(len(load_fw_cache(params, VIN)), len(ecus))
+
+
+def match_reference(fw_versions):
+  # walks every car and ECU, as match_fw_to_car did before the index
+  candidates = set()
+  for candidate, fws in FW_VERSIONS.items():
+    if all(fw_versions.get(ecu[1:]) in expected or (ecu[0] in OPTIONAL_ECUS and ecu[1:] not in fw_versions)
+           for ecu, expected in fws.items()):
+      candidates.add(candidate)
+  return candidates
+
+
+class TestFwMatching(unittest.TestCase):
+  def test_exact(self):
+    random.seed(0)
+    all_versions = {}
+    for fws in FW_VERSIONS.values():
+      for ecu, versions in fws.items():
+        all_versions.setdefault(ecu[1:], set()).update(versions)
+
+    for candidate, fws in FW_VERSIONS.items():
+      fw_versions = {ecu[1:]: versions[0] for ecu, versions in fws.items()}
+      self.assertIn(candidate, match_fw_to_car(fw_versions))
+
+      # mix in versions of other cars and drop ECUs
+      for _ in range(100):
+        mixed = {addr: random.choice(sorted(all_versions[addr])) for addr in fw_versions if random.random() < 0.8}
+        self.assertEqual(match_fw_to_car(mixed), match_reference(mixed))
+
+  def test_partial(self):
+    fws = FW_VERSIONS[TOYOTA.COROLLA_TSS2]
+    fw_versions = {ecu[1:]: versions[0] for ecu, versions in fws.items() if ecu[1] != 0x700}
+    self.assertEqual(match_fw_to_car(fw_versions), set())
+
+    candidates, decided = FW_INDEX.match(fw_versions, MATCH_PARTIAL)
+    self.assertEqual(candidates, {TOYOTA.COROLLA_TSS2})
+    # every other car with ECUs that responded was ruled out by one of them
+    self.assertEqual(set.union(*decided.values()), set(c for c in FW_VERSIONS if "TOYOTA" in c or "LEXUS" in c) - candidates)
+
+  def test_fuzzy(self):
+    engine = (Ecu.engine, 0x700, None)
+    fw_versions = {engine[1:]: FW_VERSIONS[TOYOTA.COROLLA_TSS2][engine][0], (0x7b0, None): b'unknown'}
+
+    candidates, decided = FW_INDEX.match(fw_versions, MATCH_FUZZY)
+    self.assertEqual(candidates, {TOYOTA.COROLLA_TSS2})
+    self.assertEqual(decided, {engine: {TOYOTA.COROLLA_TSS2}})
+
+    # ECUs pointing at different cars don't match
+    other = next(c for c in FW_VERSIONS if c != TOYOTA.COROLLA_TSS2 and (Ecu.eps, 0x7a1, None) in FW_VERSIONS[c])
+    fw_versions[(0x7a1, None)] = FW_VERSIONS[other][(Ecu.eps, 0x7a1, None)][0]
+    self.assertEqual(match_fw_to_car(fw_versions, MATCH_FUZZY), set())
+
+
+if __name__ == "__main__":
+  unittest.main()
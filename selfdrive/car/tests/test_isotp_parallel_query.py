@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+import time
+import unittest
+from unittest import mock
+
+from panda.python.uds import IsoTpMessage
+from selfdrive.car.isotp_parallel_query import IsoTpParallelQuery
+from selfdrive.car.vin import get_vin, VIN_REQUEST, VIN_RESPONSE
+from selfdrive.car.tests.simulated_ecu import SimulatedEcu, SimulatedCanBus
+
+REQUEST = b'\x22\xf1\x81'
+RESPONSE = b'\x62\xf1\x81'
+BUS = 1
+
+
+def ecu(addr, version, sub_addr=None):
+  return SimulatedEcu(addr, sub_addr, {REQUEST: RESPONSE + version})
+
+
+class TestIsoTpParallelQuery(unittest.TestCase):
+  def query(self, ecus, addrs, timeout=1.):
+    can = SimulatedCanBus(ecus, BUS)
+    query = IsoTpParallelQuery(can, can, BUS, addrs, [REQUEST], [RESPONSE])
+    t = time.time()
+    return query.get_data(timeout), time.time() - t, can
+
+  def test_parallel(self):
+    ecus = [ecu(0x7e0, b'short'), ecu(0x7e1, b'a much longer version string'), ecu(0x18da10f1, b'29bit')]
+    results, dt, _ = self.query(ecus, [0x7e0, 0x7e1, 0x18da10f1])
+
+    self.assertEqual(results, {
+      (0x7e0, None): b'short',
+      (0x7e1, None): b'a much longer version string',
+      (0x18da10f1, None): b'29bit',
+    })
+    # returns as soon as everyone answered
+    self.assertLess(dt, 0.5)
+
+  def test_sub_addresses(self):
+    ecus = [ecu(0x750, b'sub 0x6d', 0x6d), ecu(0x750, b'sub 0xf with a long version', 0xf), ecu(0x7e0, b'engine')]
+    results, dt, can = self.query(ecus, [(0x750, 0x6d), (0x750, 0xf), (0x7e0, None)])
+
+    self.assertEqual(results, {
+      (0x750, 0x6d): b'sub 0x6d',
+      (0x750, 0xf): b'sub 0xf with a long version',
+      (0x7e0, None): b'engine',
+    })
+    self.assertLess(dt, 0.5)
+
+    # ECUs sharing an address are queried one after the other
+    requests = [dat[0] for addr, dat in can.sent if addr == 0x750 and dat[1] >> 4 == 0]
+    self.assertEqual(requests, [0x6d, 0xf])
+    self.assertEqual(can.sent[0][0], 0x750)
+    self.assertEqual(can.sent[1][0], 0x7e0)
+
+  def test_missing_ecu(self):
+    results, dt, _ = self.query([ecu(0x750, b'present', 0x6d)], [(0x750, 0x10), (0x750, 0x6d)], timeout=0.1)
+
+    self.assertEqual(results, {(0x750, 0x6d): b'present'})
+    # the query for the next subaddress starts once the missing ECU timed out
+    self.assertGreaterEqual(dt, 0.1)
+    self.assertLess(dt, 0.2)
+
+  def test_recv_without_frames(self):
+    polled = set()
+    recv = IsoTpMessage.recv
+
+    def recv_spy(msg, *args, **kwargs):
+      polled.add(msg._can_client.rx_addr)
+      return recv(msg, *args, **kwargs)
+
+    # the message of the ECU that never answers is polled too
+    with mock.patch.object(IsoTpMessage, "recv", recv_spy):
+      results, _, _ = self.query([ecu(0x7e0, b'engine')], [0x7e0, 0x7e1], timeout=0.1)
+    self.assertEqual(results, {(0x7e0, None): b'engine'})
+    self.assertEqual(polled, {0x7e8, 0x7e9})
+
+  def test_bad_response(self):
+    bad = SimulatedEcu(0x7e1, responses={REQUEST: b'\x7f\x22\x11'})
+    results, dt, _ = self.query([ecu(0x7e0, b'good'), bad], [0x7e0, 0x7e1])
+
+    self.assertEqual(results, {(0x7e0, None): b'good'})
+    self.assertLess(dt, 0.5)
+
+  def test_request_sequence(self):
+    tester_present = (b'\x3e', b'\x7e')
+    ecus = [SimulatedEcu(0x7e0, responses={tester_present[0]: tester_present[1], REQUEST: RESPONSE + b'engine'})]
+    can = SimulatedCanBus(ecus, BUS)
+    query = IsoTpParallelQuery(can, can, BUS, [0x7e0], [tester_present[0], REQUEST], [tester_present[1], RESPONSE])
+
+    self.assertEqual(query.get_data(1.), {(0x7e0, None): b'engine'})
+    self.assertEqual(ecus[0].requests, [tester_present[0], REQUEST])
+
+  def test_late_response(self):
+    kwp_request, kwp_response = b'\x1a\x88', b'\x5a\x88'
+
+    class LateEcu(SimulatedEcu):
+      # answers the first request only once the next one arrives
+      def handle(self, addr, dat):
+        frames = super().handle(addr, dat)
+        if len(self.requests) == 1:
+          self.late, frames = frames, []
+        elif len(self.requests) == 2 and len(frames):
+          frames = self.late + frames
+        return frames
+
+    ecus = [LateEcu(0x7e0, responses={kwp_request: kwp_response + b'kwp', REQUEST: RESPONSE + b'uds'})]
+    can = SimulatedCanBus(ecus, BUS)
+    query = IsoTpParallelQuery(can, can, BUS, [0x7e0], variants=[([kwp_request], [kwp_response]), ([REQUEST], [RESPONSE])])
+
+    # the late answer to the first variant doesn't abort the second one
+    self.assertEqual(query.get_variants(0.1), {((0x7e0, None), 1): b'uds'})
+
+  def test_vin(self):
+    vin = "1HGCV1F34JA000000"
+    can = SimulatedCanBus([SimulatedEcu(0x7e0, responses={VIN_REQUEST: VIN_RESPONSE + vin.encode()})], BUS)
+    # answered on the functional address
+    self.assertEqual(get_vin(can, can, BUS), (0x7df, vin))
+
+
+if __name__ == "__main__":
+  unittest.main()
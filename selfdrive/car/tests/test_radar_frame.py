@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+import math
+import unittest
+
+from selfdrive.car.interfaces import RadarFrame
+
+
+class TestRadarFrame(unittest.TestCase):
+  def test_to_capnp(self):
+    # logged frames have the points radard reads, with the float32 precision of the message
+    points = [(3, 10.25, -1.5, 0.1, True), (7, 150., 2.75, -3.3, False)]
+    rr = RadarFrame(points, ["canError"])
+    msg = rr.to_capnp()
+
+    self.assertEqual(list(msg.errors), ["canError"])
+    self.assertEqual(len(msg.points), len(points))
+    for pt, packed in zip(msg.points, rr.points.tolist()):
+      self.assertEqual((pt.trackId, pt.dRel, pt.yRel, pt.vRel, pt.measured), packed)
+      self.assertTrue(math.isnan(pt.aRel) and math.isnan(pt.yvRel))
+
+  def test_empty(self):
+    rr = RadarFrame()
+    self.assertEqual(len(rr.points), 0)
+    self.assertEqual(len(rr.to_capnp().points), 0)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import unittest
+import numpy as np
+
+from selfdrive.car import apply_std_steer_torque_limits, apply_toyota_steer_torque_limits
+from selfdrive.car.chrysler.values import SteerLimitParams as ChryslerLimits
+from selfdrive.car.gm.carcontroller import CarControllerParams as GmParams
+from selfdrive.car.gm.values import CAR as GM
+from selfdrive.car.hyundai.values import SteerLimitParams as HyundaiLimits
+from selfdrive.car.subaru.carcontroller import CarControllerParams as SubaruParams
+from selfdrive.car.subaru.values import CAR as SUBARU
+from selfdrive.car.toyota.values import SteerLimitParams as ToyotaLimits
+from selfdrive.car.volkswagen.values import CarControllerParams as VolkswagenParams
+from panda.tests.safety.torque_model import BRANDS, SteerLimits, std_steer_torque_limits, toyota_steer_torque_limits, torque_bounds
+
+# the panda torque model by brand -> openpilot limits and frames between steering messages
+CARCONTROLLER_LIMITS = {
+  'toyota': (ToyotaLimits, 1),
+  'chrysler': (ChryslerLimits, 1),
+  'hyundai': (HyundaiLimits, 1),
+  'gm': (GmParams(GM.VOLT), GmParams(GM.VOLT).STEER_STEP),
+  'subaru': (SubaruParams(SUBARU.IMPREZA), SubaruParams(SUBARU.IMPREZA).STEER_STEP),
+  'volkswagen': (VolkswagenParams, VolkswagenParams.HCA_STEP),
+}
+
+
+class TestSteerLimits(unittest.TestCase):
+  def test_panda_model_limits(self):
+    # the panda safety tests check the safety code against these limits
+    self.assertEqual(set(BRANDS), set(CARCONTROLLER_LIMITS))
+    for brand, (limits, steer_step) in CARCONTROLLER_LIMITS.items():
+      model = BRANDS[brand]
+      for field in SteerLimits._fields:
+        if hasattr(limits, field):
+          self.assertEqual(getattr(model.limits, field), getattr(limits, field), "%s %s" % (brand, field))
+      self.assertEqual(model.steer_step, steer_step, brand)
+
+  def test_vectorized_limits(self):
+    rng = np.random.RandomState(0)
+    for brand, model in BRANDS.items():
+      limits = model.limits
+      n = 2000
+      apply_torque = rng.uniform(-1.5, 1.5, n) * limits.STEER_MAX
+      apply_torque_last = rng.randint(-limits.STEER_MAX, limits.STEER_MAX + 1, n)
+      meas = rng.randint(-model.meas_max, model.meas_max + 1, n)
+
+      if model.limiter == 'std':
+        meas = meas / limits.STEER_DRIVER_FACTOR
+        expected = [apply_std_steer_torque_limits(*args, limits) for args in zip(apply_torque, apply_torque_last, meas)]
+        ret = std_steer_torque_limits(apply_torque, apply_torque_last, meas, limits)
+      else:
+        expected = [apply_toyota_steer_torque_limits(*args, limits) for args in zip(apply_torque, apply_torque_last, meas)]
+        ret = toyota_steer_torque_limits(apply_torque, apply_torque_last, meas, limits)
+      self.assertEqual(ret.tolist(), expected, brand)
+
+  def test_requests_past_limits(self):
+    # requests past the limits the safety code enforces are cut back to them
+    rng = np.random.RandomState(0)
+    for brand, model in BRANDS.items():
+      limits = model.limits
+      n = 2000
+      apply_torque_last = rng.randint(-limits.STEER_MAX, limits.STEER_MAX + 1, n)
+      meas = rng.randint(-model.meas_max, model.meas_max + 1, n)
+      lo, hi = torque_bounds(model, apply_torque_last, meas, meas)
+
+      for apply_torque in (lo - 1 - rng.randint(0, limits.STEER_MAX, n), hi + 1 + rng.randint(0, limits.STEER_MAX, n)):
+        if model.limiter == 'std':
+          ret = [apply_std_steer_torque_limits(*args, limits) for args in zip(apply_torque, apply_torque_last, meas / limits.STEER_DRIVER_FACTOR)]
+        else:
+          ret = [apply_toyota_steer_torque_limits(*args, limits) for args in zip(apply_torque, apply_torque_last, meas)]
+        self.assertTrue(np.all((lo <= ret) & (ret <= hi)), brand)
+
+
+if __name__ == "__main__":
+  unittest.main()
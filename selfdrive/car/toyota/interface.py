@@ -3,6 +3,7 @@ from cereal import car
 from selfdrive.config import Conversions as CV
 from selfdrive.controls.lib.drive_helpers import EventTypes as ET, create_event
 from selfdrive.controls.lib.vehicle_model import VehicleModel
+from opendbc.can.parser import CANDemux
 from selfdrive.car.toyota.carstate import CarState, get_can_parser, get_cam_can_parser
 from selfdrive.car.toyota.values import ECU, ECU_FINGERPRINT, CAR, NO_STOP_TIMER_CAR, TSS2_CAR, FINGERPRINTS
 from selfdrive.car import STD_CARGO_KG, scale_rot_inertia, scale_tire_stiffness, is_ecu_disconnected, gen_empty_fingerprint
@@ -27,6 +28,7 @@ class CarInterface(CarInterfaceBase):
 
     self.cp = get_can_parser(CP)
     self.cp_cam = get_cam_can_parser(CP)
+    self.can_demux = CANDemux([self.cp, self.cp_cam])
 
     self.CC = None
     if CarController is not None:
@@ -296,8 +298,7 @@ class CarInterface(CarInterfaceBase):
   # returns a car.CarState
   def update(self, c, can_strings):
     # ******************* do can recv *******************
-    self.cp.update_strings(can_strings)
-    self.cp_cam.update_strings(can_strings)
+    self.can_demux.update_strings(can_strings)
 
     self.CS.update(self.cp, self.cp_cam)
 
@@ -322,7 +323,7 @@ class CarInterface(CarInterfaceBase):
 
     # gas pedal
     ret.gas = self.CS.car_gas
-    if self.CP.enableGasInterceptor:
+    if self.CS.enable_gas_interceptor:
     # use interceptor values to disengage on pedal press
       ret.gasPressed = self.CS.pedal_gas > 15
     else:
@@ -348,7 +349,7 @@ class CarInterface(CarInterfaceBase):
     ret.cruiseState.available = bool(self.CS.main_on)
     ret.cruiseState.speedOffset = 0.
 
-    if self.CP.carFingerprint in NO_STOP_TIMER_CAR or self.CP.enableGasInterceptor:
+    if self.CS.car_fingerprint in NO_STOP_TIMER_CAR or self.CS.enable_gas_interceptor:
       # ignore standstill in hybrid vehicles, since pcm allows to restart without
       # receiving any special command
       # also if interceptor is detected
@@ -382,25 +383,25 @@ class CarInterface(CarInterfaceBase):
     # events
     events = []
 
-    if self.cp_cam.can_invalid_cnt >= 200 and self.CP.enableCamera:
+    if self.cp_cam.can_invalid_cnt >= 200 and self.CS.enable_camera:
       events.append(create_event('invalidGiraffeToyota', [ET.PERMANENT]))
-    if not ret.gearShifter == GearShifter.drive and self.CP.openpilotLongitudinalControl:
+    if not ret.gearShifter == GearShifter.drive and self.CS.openpilot_longitudinal_control:
       events.append(create_event('wrongGear', [ET.NO_ENTRY, ET.SOFT_DISABLE]))
     if ret.doorOpen:
       events.append(create_event('doorOpen', [ET.NO_ENTRY, ET.SOFT_DISABLE]))
     if ret.seatbeltUnlatched:
       events.append(create_event('seatbeltNotLatched', [ET.NO_ENTRY, ET.SOFT_DISABLE]))
-    if self.CS.esp_disabled and self.CP.openpilotLongitudinalControl:
+    if self.CS.esp_disabled and self.CS.openpilot_longitudinal_control:
       events.append(create_event('espDisabled', [ET.NO_ENTRY, ET.SOFT_DISABLE]))
-    if not self.CS.main_on and self.CP.openpilotLongitudinalControl:
+    if not self.CS.main_on and self.CS.openpilot_longitudinal_control:
       events.append(create_event('wrongCarMode', [ET.NO_ENTRY, ET.USER_DISABLE]))
-    if ret.gearShifter == GearShifter.reverse and self.CP.openpilotLongitudinalControl:
+    if ret.gearShifter == GearShifter.reverse and self.CS.openpilot_longitudinal_control:
       events.append(create_event('reverseGear', [ET.NO_ENTRY, ET.IMMEDIATE_DISABLE]))
     if self.CS.steer_error:
       events.append(create_event('steerTempUnavailable', [ET.NO_ENTRY, ET.WARNING]))
-    if self.CS.low_speed_lockout and self.CP.openpilotLongitudinalControl:
+    if self.CS.low_speed_lockout and self.CS.openpilot_longitudinal_control:
       events.append(create_event('lowSpeedLockout', [ET.NO_ENTRY, ET.PERMANENT]))
-    if ret.vEgo < self.CP.minEnableSpeed and self.CP.openpilotLongitudinalControl:
+    if ret.vEgo < self.CS.min_enable_speed and self.CS.openpilot_longitudinal_control:
       events.append(create_event('speedTooLow', [ET.NO_ENTRY]))
       if c.actuators.gas > 0.1:
         # some margin on the actuator to not false trigger cancellation while stopping
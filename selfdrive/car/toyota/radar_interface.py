@@ -2,9 +2,8 @@
 import os
 import time
 from opendbc.can.parser import CANParser
-from cereal import car
 from selfdrive.car.toyota.values import NO_DSU_CAR, DBC, TSS2_CAR
-from selfdrive.car.interfaces import RadarInterfaceBase
+from selfdrive.car.interfaces import RadarInterfaceBase, RadarFrame
 
 def _create_radar_can_parser(car_fingerprint):
   dbc_f = DBC[car_fingerprint]['radar']
@@ -57,7 +56,7 @@ class RadarInterface(RadarInterfaceBase):
   def update(self, can_strings):
     if self.no_radar:
       time.sleep(self.radar_ts)
-      return car.RadarData.new_message()
+      return RadarFrame()
 
     vls = self.rcp.update_strings(can_strings)
     self.updated_messages.update(vls)
@@ -71,11 +70,9 @@ class RadarInterface(RadarInterfaceBase):
     return rr
 
   def _update(self, updated_messages):
-    ret = car.RadarData.new_message()
     errors = []
     if not self.rcp.can_valid:
       errors.append("canError")
-    ret.errors = errors
 
     for ii in sorted(updated_messages):
       if ii in self.RADAR_A_MSGS:
@@ -94,18 +91,17 @@ class RadarInterface(RadarInterfaceBase):
         # radar point only valid if it's a valid measurement and score is above 50
         if cpt['VALID'] or (score > 50 and cpt['LONG_DIST'] < 255 and self.valid_cnt[ii] > 0):
           if ii not in self.pts or cpt['NEW_TRACK']:
-            self.pts[ii] = car.RadarData.RadarPoint.new_message()
-            self.pts[ii].trackId = self.track_id
+            track_id = self.track_id
             self.track_id += 1
-          self.pts[ii].dRel = cpt['LONG_DIST']  # from front of car
-          self.pts[ii].yRel = -cpt['LAT_DIST']  # in car frame's y axis, left is positive
-          self.pts[ii].vRel = cpt['REL_SPEED']
-          self.pts[ii].aRel = float('nan')
-          self.pts[ii].yvRel = float('nan')
-          self.pts[ii].measured = bool(cpt['VALID'])
+          else:
+            track_id = self.pts[ii][0]
+          self.pts[ii] = (track_id,
+                          cpt['LONG_DIST'],  # from front of car
+                          -cpt['LAT_DIST'],  # in car frame's y axis, left is positive
+                          cpt['REL_SPEED'],
+                          bool(cpt['VALID']))
         else:
           if ii in self.pts:
             del self.pts[ii]
 
-    ret.points = list(self.pts.values())
-    return ret
+    return RadarFrame(self.pts.values(), errors)
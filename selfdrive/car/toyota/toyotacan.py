@@ -22,16 +22,13 @@ def create_ipas_steer_command(packer, steer, enabled, apgs_enabled):
     return packer.make_can_msg("STEERING_IPAS_COMMA", 0, values)
 
 
+STEERING_LKA_SIGNALS = ("STEER_REQUEST", "STEER_TORQUE_CMD", "COUNTER", "SET_ME_1")
+
 def create_steer_command(packer, steer, steer_req, raw_cnt):
   """Creates a CAN message for the Toyota Steer Command."""
-
-  values = {
-    "STEER_REQUEST": steer_req,
-    "STEER_TORQUE_CMD": steer,
-    "COUNTER": raw_cnt,
-    "SET_ME_1": 1,
-  }
-  return packer.make_can_msg("STEERING_LKA", 0, values)
+  # sent every frame, the packer resolves the signals once
+  prepared = packer.prepare("STEERING_LKA", STEERING_LKA_SIGNALS)
+  return packer.make_prepared_msg(prepared, 0, (steer_req, steer, raw_cnt, 1))
 
 
 def create_lta_steer_command(packer, steer, steer_req, raw_cnt, angle):
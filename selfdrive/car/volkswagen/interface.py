@@ -2,6 +2,7 @@ from cereal import car
 from selfdrive.config import Conversions as CV
 from selfdrive.controls.lib.drive_helpers import create_event, EventTypes as ET
 from selfdrive.controls.lib.vehicle_model import VehicleModel
+from opendbc.can.parser import CANDemux
 from selfdrive.car.volkswagen.values import CAR, BUTTON_STATES
 from selfdrive.car.volkswagen.carstate import CarState, get_mqb_pt_can_parser, get_mqb_cam_can_parser
 from common.params import Params
@@ -32,6 +33,7 @@ class CarInterface(CarInterfaceBase):
     self.VM = VehicleModel(CP)
     self.pt_cp = get_mqb_pt_can_parser(CP, CANBUS)
     self.cam_cp = get_mqb_cam_can_parser(CP, CANBUS)
+    self.can_demux = CANDemux([self.pt_cp, self.cam_cp])
 
     # sending if read only is False
     if CarController is not None:
@@ -125,8 +127,7 @@ class CarInterface(CarInterfaceBase):
     # Process the most recent CAN message traffic, and check for validity
     # The camera CAN has no signals we use at this time, but we process it
     # anyway so we can test connectivity with can_valid
-    self.pt_cp.update_strings(can_strings)
-    self.cam_cp.update_strings(can_strings)
+    self.can_demux.update_strings(can_strings)
     self.CS.update(self.pt_cp)
     ret.canValid = self.pt_cp.can_valid and self.cam_cp.can_valid
 
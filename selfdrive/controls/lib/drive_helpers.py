@@ -1,3 +1,4 @@
+from functools import lru_cache
 from cereal import car
 from common.numpy_fast import clip, interp
 from selfdrive.config import Conversions as CV
@@ -34,7 +35,8 @@ class EventTypes:
   PERMANENT = 'permanent'
 
 
-def create_event(name, types):
+@lru_cache(maxsize=None)
+def _create_event(name, types):
   event = car.CarEvent.new_message()
   event.name = name
   for t in types:
@@ -42,6 +44,11 @@ def create_event(name, types):
   return event
 
 
+def create_event(name, types):
+  # events are built once and shared, they must not be modified
+  return _create_event(name, tuple(types))
+
+
 def get_events(events, types):
   out = []
   for e in events:
@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import os
 import importlib
 import math
 from collections import defaultdict, deque
@@ -7,12 +8,24 @@ import cereal.messaging as messaging
 from cereal import car
 from common.numpy_fast import interp
 from common.params import Params
-from common.realtime import Ratekeeper, set_realtime_priority
+from common.realtime import Ratekeeper, set_realtime_priority, sec_since_boot
 from selfdrive.config import RADAR_TO_CAMERA
 from selfdrive.controls.lib.cluster.fastcluster_py import cluster_points_centroid
 from selfdrive.controls.lib.radar_helpers import Cluster, Track
 from selfdrive.swaglog import cloudlog
 
+# liveTracks is only used to debug the radar, it is published slower than radarState
+LIVE_TRACKS_RATE = 5.  # Hz, unless set by the LIVE_TRACKS_RATE env var
+
+
+def get_live_tracks_rate():
+  return float(os.getenv("LIVE_TRACKS_RATE", LIVE_TRACKS_RATE))
+
+
+def live_tracks_decimation(radar_ts, rate):
+  # radar frames per liveTracks message, never more than one per radar frame
+  return max(int(round(1. / (radar_ts * rate))), 1)
+
 
 class KalmanParams():
   def __init__(self, dt):
@@ -102,9 +115,13 @@ class RadarD():
 
     self.ready = False
 
+    self.last_dat = None
+    self.last_errors = None
+
   def update(self, frame, sm, rr, has_radar):
     self.current_time = 1e-9*max([sm.logMonoTime[key] for key in sm.logMonoTime.keys()])
 
+    last_v_ego, last_ready = self.v_ego, self.ready
     if sm.updated['controlsState']:
       self.active = sm['controlsState'].active
       self.v_ego = sm['controlsState'].vEgo
@@ -112,9 +129,20 @@ class RadarD():
     if sm.updated['model']:
       self.ready = True
 
+    # without radar points or tracks the leads only depend on the model lead and v_ego,
+    # if those didn't change either the last radarState is the same, and is sent again
+    leads_changed = has_radar and (sm.updated['model'] or self.v_ego != last_v_ego or self.ready != last_ready)
+    if self.last_dat is not None and len(rr.points) == 0 and len(self.tracks) == 0 and \
+       not leads_changed and rr.errors == self.last_errors:
+      dat = self.last_dat
+      dat.logMonoTime = int(sec_since_boot() * 1e9)
+      dat.valid = sm.all_alive_and_valid(service_list=['controlsState', 'model'])
+      dat.radarState.canMonoTimes = list(rr.canMonoTimes)
+      return dat
+
     ar_pts = {}
-    for pt in rr.points:
-      ar_pts[pt.trackId] = [pt.dRel, pt.yRel, pt.vRel, pt.measured]
+    for track_id, d_rel, y_rel, v_rel, measured in rr.points.tolist():
+      ar_pts[track_id] = [d_rel, y_rel, v_rel, measured]
 
     # *** remove missing points from meta data ***
     for ids in list(self.tracks.keys()):
@@ -174,11 +202,26 @@ class RadarD():
     if has_radar:
       dat.radarState.leadOne = get_lead(self.v_ego, self.ready, clusters, sm['model'].lead, low_speed_override=True)
       dat.radarState.leadTwo = get_lead(self.v_ego, self.ready, clusters, sm['model'].leadFuture, low_speed_override=False)
+
+    self.last_dat = dat
+    self.last_errors = rr.errors
+    return dat
+
+  def live_tracks(self):
+    dat = messaging.new_message()
+    live_tracks = dat.init('liveTracks', len(self.tracks))
+
+    for lt, ids in zip(live_tracks, sorted(self.tracks.keys())):
+      track = self.tracks[ids]
+      lt.trackId = ids
+      lt.dRel = float(track.dRel)
+      lt.yRel = float(track.yRel)
+      lt.vRel = float(track.vRel)
     return dat
 
 
 # fuses camera and radar data for best lead detection
-def radard_thread(sm=None, pm=None, can_sock=None):
+def radard_thread(sm=None, pm=None, can_sock=None, live_tracks_rate=None):
   set_realtime_priority(2)
 
   # wait for stats about the car to come in from controls
@@ -204,6 +247,9 @@ def radard_thread(sm=None, pm=None, can_sock=None):
 
   rk = Ratekeeper(1.0 / CP.radarTimeStep, print_delay_threshold=None)
   RD = RadarD(CP.radarTimeStep, RI.delay)
+  if live_tracks_rate is None:
+    live_tracks_rate = get_live_tracks_rate()
+  tracks_decimation = live_tracks_decimation(CP.radarTimeStep, live_tracks_rate)
 
   has_radar = not CP.radarOffCan
 
@@ -222,24 +268,14 @@ def radard_thread(sm=None, pm=None, can_sock=None):
     pm.send('radarState', dat)
 
     # *** publish tracks for UI debugging (keep last) ***
-    tracks = RD.tracks
-    dat = messaging.new_message()
-    dat.init('liveTracks', len(tracks))
-
-    for cnt, ids in enumerate(sorted(tracks.keys())):
-      dat.liveTracks[cnt] = {
-        "trackId": ids,
-        "dRel": float(tracks[ids].dRel),
-        "yRel": float(tracks[ids].yRel),
-        "vRel": float(tracks[ids].vRel),
-      }
-    pm.send('liveTracks', dat)
+    if rk.frame % tracks_decimation == 0:
+      pm.send('liveTracks', RD.live_tracks())
 
     rk.monitor_time()
 
 
-def main(sm=None, pm=None, can_sock=None):
-  radard_thread(sm, pm, can_sock)
+def main(sm=None, pm=None, can_sock=None, live_tracks_rate=None):
+  radard_thread(sm, pm, can_sock, live_tracks_rate)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+import os
+import unittest
+from unittest import mock
+
+import cereal.messaging as messaging
+from selfdrive.car.interfaces import RadarFrame
+from selfdrive.controls.radard import RadarD, LIVE_TRACKS_RATE, get_live_tracks_rate, live_tracks_decimation
+
+
+def model_msg(prob):
+  dat = messaging.new_message()
+  dat.init('model')
+  dat.model.lead.prob = prob
+  dat.model.lead.dist = 30.
+  return dat
+
+
+def controls_state_msg(v_ego):
+  dat = messaging.new_message()
+  dat.init('controlsState')
+  dat.controlsState.vEgo = v_ego
+  return dat
+
+
+class TestRadard(unittest.TestCase):
+  def setUp(self):
+    self.sm = messaging.SubMaster(['model', 'controlsState', 'liveParameters'], addr=None)
+    self.RD = RadarD(0.05)
+
+  def test_unchanged_frames(self):
+    # without points or new model data, the last radarState is sent again
+    self.sm.update_msgs(0., [model_msg(0.9)])
+    dat = self.RD.update(0, self.sm, RadarFrame(), True)
+    self.assertTrue(dat.radarState.leadOne.status)
+
+    self.sm.update_msgs(0.05, [])
+    self.assertIs(self.RD.update(1, self.sm, RadarFrame(), True), dat)
+
+    # controlsState without a new speed doesn't change the leads, but is still tracked
+    self.sm.update_msgs(0.1, [controls_state_msg(0.)])
+    self.assertIs(self.RD.update(2, self.sm, RadarFrame(), True), dat)
+    self.assertEqual(len(self.RD.v_ego_hist), 1)
+
+    # radar errors, points, speed and model data are computed again
+    for rr, msgs in [(RadarFrame(errors=["canError"]), []),
+                     (RadarFrame(), [controls_state_msg(10.)]),
+                     (RadarFrame(), [model_msg(0.1)]),
+                     (RadarFrame([(1, 30., 0., 0., True)]), [])]:
+      self.sm.update_msgs(0.1, msgs)
+      new_dat = self.RD.update(2, self.sm, rr, True)
+      self.assertIsNot(new_dat, dat)
+      dat = new_dat
+
+    self.assertEqual(list(dat.radarState.radarErrors), [])
+    self.assertFalse(dat.radarState.leadOne.status)
+
+  def test_unchanged_frames_no_radar(self):
+    # without a radar the leads aren't sent, so model and speed updates are skipped too
+    self.sm.update_msgs(0., [model_msg(0.9), controls_state_msg(0.)])
+    dat = self.RD.update(0, self.sm, RadarFrame(), False)
+
+    self.sm.update_msgs(0.05, [model_msg(0.1), controls_state_msg(10.)])
+    self.assertIs(self.RD.update(1, self.sm, RadarFrame(can_mono_times=[5]), False), dat)
+    self.assertEqual(self.RD.v_ego, 10.)
+    self.assertEqual(list(dat.radarState.canMonoTimes), [5])
+
+  def test_live_tracks(self):
+    points = [(i, 10. + 5 * i, i - 2., -1., True) for i in range(5)]
+    self.sm.update_msgs(0., [])
+    self.RD.update(0, self.sm, RadarFrame(reversed(points)), True)
+
+    live_tracks = self.RD.live_tracks().liveTracks
+    self.assertEqual([(t.trackId, t.dRel, t.yRel, t.vRel) for t in live_tracks], [p[:4] for p in points])
+
+  def test_live_tracks_decimation(self):
+    self.assertEqual(live_tracks_decimation(0.05, 5.), 4)
+    self.assertEqual(live_tracks_decimation(0.05, 2.), 10)
+    self.assertEqual(live_tracks_decimation(1., 5.), 1)
+    self.assertEqual(live_tracks_decimation(0.05, float("inf")), 1)
+
+  def test_live_tracks_rate(self):
+    with mock.patch.dict(os.environ, {"LIVE_TRACKS_RATE": "2"}):
+      self.assertEqual(get_live_tracks_rate(), 2.)
+    with mock.patch.dict(os.environ):
+      os.environ.pop("LIVE_TRACKS_RATE", None)
+      self.assertEqual(get_live_tracks_rate(), LIVE_TRACKS_RATE)
+
+
+if __name__ == "__main__":
+  unittest.main()
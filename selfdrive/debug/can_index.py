@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+import os
+import argparse
+import numpy as np
+from itertools import chain
+
+from opendbc import DBC_PATH
+from opendbc.can.dbc import dbc
+
+# every CAN frame of a route, sorted by bus, address and time
+FRAME = np.dtype([('t', '<u8'), ('dlc', 'u1'), ('dat', 'u1', (8,))])
+
+# frames as they are collected while building, before sorting
+RAW_FRAME = np.dtype([('t', '<u8'), ('bus', 'u1'), ('address', '<u4'), ('dlc', 'u1'), ('dat', 'u1', (8,))])
+BUILD_CHUNK = 1 << 16  # frames per array while building
+
+# where the frames of every bus and address are, with how often they were seen
+KEY = np.dtype([('bus', 'u1'), ('address', '<u4'), ('start', '<u8'), ('count', '<u8'),
+                ('first', '<u8'), ('last', '<u8'), ('rate', '<f8')])
+
+
+def build_chunk(t, buses, addresses, dlcs, dats):
+  chunk = np.empty(len(t), dtype=RAW_FRAME)
+  chunk['t'] = t
+  chunk['bus'] = buses
+  chunk['address'] = addresses
+  chunk['dlc'] = dlcs
+  chunk['dat'] = np.frombuffer(b''.join(dats), dtype=np.uint8).reshape(-1, 8)
+  return chunk
+
+
+class CanIndex():
+  """Index of the CAN frames of a route by bus and address, built with a single
+  scan of the logs. Saved indexes are memory mapped, so a query only reads the
+  frames of the message it decodes."""
+
+  def __init__(self, frames, keys):
+    self.frames = frames
+    self.keys = keys
+    self.lookup = {(int(k['bus']), int(k['address'])): i for i, k in enumerate(keys)}
+
+  @classmethod
+  def build(cls, events):
+    # frames are collected in lists and converted to arrays a chunk at a time,
+    # so a long route never holds a python object per frame
+    chunks = []
+    t, buses, addresses, dlcs, dats = [], [], [], [], []
+    for evt in events:
+      if evt.which() != 'can':
+        continue
+
+      log_mono_time = evt.logMonoTime
+      for c in evt.can:
+        dat = c.dat
+        t.append(log_mono_time)
+        buses.append(c.src)
+        addresses.append(c.address)
+        dlcs.append(len(dat))
+        dats.append(dat[:8].ljust(8, b'\x00'))
+
+      if len(t) >= BUILD_CHUNK:
+        chunks.append(build_chunk(t, buses, addresses, dlcs, dats))
+        t, buses, addresses, dlcs, dats = [], [], [], [], []
+    chunks.append(build_chunk(t, buses, addresses, dlcs, dats))
+
+    raw = np.concatenate(chunks)
+    del chunks
+    raw = raw[np.lexsort((raw['t'], raw['address'], raw['bus']))]
+
+    frames = np.zeros(len(raw), dtype=FRAME)
+    frames['t'] = raw['t']
+    frames['dlc'] = raw['dlc']
+    frames['dat'] = raw['dat']
+    buses, addresses = raw['bus'].copy(), raw['address'].copy()
+    del raw
+
+    route_keys = (buses.astype(np.uint64) << np.uint64(32)) | addresses
+    _, start, count = np.unique(route_keys, return_index=True, return_counts=True)
+
+    keys = np.zeros(len(start), dtype=KEY)
+    keys['bus'] = buses[start]
+    keys['address'] = addresses[start]
+    keys['start'] = start
+    keys['count'] = count
+    keys['first'] = frames['t'][start]
+    keys['last'] = frames['t'][start + count - 1]
+    duration = (keys['last'] - keys['first']) * 1e-9
+    keys['rate'] = np.where(duration > 0, (count - 1) / np.maximum(duration, 1e-9), 0.)
+    return cls(frames, keys)
+
+  def save(self, path):
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'frames.npy'), self.frames)
+    np.save(os.path.join(path, 'keys.npy'), self.keys)
+
+  @classmethod
+  def load(cls, path):
+    frames = np.load(os.path.join(path, 'frames.npy'), mmap_mode='r')
+    keys = np.load(os.path.join(path, 'keys.npy'))
+    return cls(frames, keys)
+
+  def get_frames(self, bus, address):
+    """The frames of a message on a bus, in the order they were logged."""
+    i = self.lookup.get((bus, address))
+    if i is None:
+      return self.frames[:0]
+    start, count = int(self.keys['start'][i]), int(self.keys['count'][i])
+    return self.frames[start:start + count]
+
+  def query(self, can_dbc, msg, signals=None, bus=0):
+    """Decodes the requested signals of a message from every frame of it on the bus.
+
+       Returns a tuple (t, values), where t is the logMonoTime of every frame and
+       values maps each signal name to an array of its values."""
+    address = can_dbc.lookup_msg_id(msg)
+    frames = self.get_frames(bus, address)
+    size = can_dbc.msgs[address][0][1]
+    return np.array(frames['t']), can_dbc.decode_batch(address, frames['dat'][:, :size], signals)
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Index the CAN frames of a route, and decode signals from the index')
+  subparsers = parser.add_subparsers(dest='cmd')
+
+  build_parser = subparsers.add_parser('build', help='index the CAN frames of log files')
+  build_parser.add_argument('index')
+  build_parser.add_argument('logs', nargs='+')
+
+  stats_parser = subparsers.add_parser('stats', help='print the messages seen on every bus')
+  stats_parser.add_argument('index')
+
+  query_parser = subparsers.add_parser('query', help='print signals of a message')
+  query_parser.add_argument('index')
+  query_parser.add_argument('dbc', help='DBC name, like honda_civic_touring_2016_can_generated')
+  query_parser.add_argument('msg', help='message name or address')
+  query_parser.add_argument('signals', nargs='*', help='signals to decode, all of them if none are given')
+  query_parser.add_argument('--bus', type=int, default=0)
+
+  args = parser.parse_args()
+
+  if args.cmd == 'build':
+    from tools.lib.logreader import LogReader  # pylint: disable=import-error
+    CanIndex.build(chain.from_iterable(LogReader(fn) for fn in args.logs)).save(args.index)
+  elif args.cmd == 'stats':
+    idx = CanIndex.load(args.index)
+    for k in idx.keys:
+      print("bus %d %04X(%4d) %8d frames %7.2f Hz %10.2f - %10.2f s" %
+            (k['bus'], k['address'], k['address'], k['count'], k['rate'], k['first'] * 1e-9, k['last'] * 1e-9))
+  elif args.cmd == 'query':
+    idx = CanIndex.load(args.index)
+    can_dbc = dbc(os.path.join(DBC_PATH, args.dbc + '.dbc'))
+    msg = int(args.msg, 0) if args.msg[0].isdigit() else args.msg
+    t, values = idx.query(can_dbc, msg, args.signals or None, args.bus)
+    names = list(values)
+    print(' '.join(['t'] + names))
+    for i in range(len(t)):
+      print(' '.join(['%.3f' % (t[i] * 1e-9)] + [str(values[n][i]) for n in names]))
+  else:
+    parser.print_help()
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import time
+import argparse
+from cereal import car
+
+from selfdrive.boardd.boardd import can_list_to_can_capnp
+from selfdrive.car import gen_empty_fingerprint
+from selfdrive.car.car_helpers import get_interface
+from selfdrive.car.fingerprints import _FINGERPRINTS as FINGERPRINTS
+from selfdrive.car.chrysler.values import CAR as CHRYSLER
+from selfdrive.car.ford.values import CAR as FORD
+from selfdrive.car.gm.values import CAR as GM
+from selfdrive.car.honda.values import CAR as HONDA
+from selfdrive.car.hyundai.values import CAR as HYUNDAI
+from selfdrive.car.subaru.values import CAR as SUBARU
+from selfdrive.car.toyota.values import CAR as TOYOTA
+from selfdrive.car.volkswagen.values import CAR as VOLKSWAGEN
+
+# a car of every brand
+CARS = [CHRYSLER.PACIFICA_2018, FORD.FUSION, GM.VOLT, HONDA.CIVIC, HYUNDAI.SANTA_FE,
+        SUBARU.IMPREZA, TOYOTA.PRIUS, VOLKSWAGEN.GOLF]
+
+
+def benchmark_car(candidate, frames, repeat=5):
+  """Seconds per CarInterface.update, fed a frame with every fingerprint message of the car.
+     The best of repeat runs is returned, the others are slowed down by whatever else runs."""
+  CarInterface, CarController = get_interface(candidate)
+  fingerprint = gen_empty_fingerprint()
+  fingerprint[0] = FINGERPRINTS[candidate][0]
+  CP = CarInterface.get_params(candidate, fingerprint)
+  CI = CarInterface(CP, CarController)
+
+  can = can_list_to_can_capnp([[address, 0, b'\x00' * size, 0] for address, size in fingerprint[0].items()])
+  CC = car.CarControl.new_message()
+
+  for _ in range(100):
+    CI.update(CC, [can])
+
+  best = float('inf')
+  for _ in range(repeat):
+    t = time.perf_counter()
+    for _ in range(frames):
+      CI.update(CC, [can])
+    best = min(best, (time.perf_counter() - t) / frames)
+  return best
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description='Time CarInterface.update for a car of every brand')
+  parser.add_argument('--frames', type=int, default=2000, help='frames per run')
+  parser.add_argument('--repeat', type=int, default=5, help='runs per car, the fastest one is printed')
+  parser.add_argument('cars', nargs='*', default=CARS, help='cars to time, a car of every brand by default')
+  args = parser.parse_args()
+
+  for candidate in args.cars:
+    print("%-40s %8.1f us/frame" % (candidate, benchmark_car(candidate, args.frames, args.repeat) * 1e6))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+import time
+import argparse
+from cereal import car
+
+from opendbc.can.packer import CANPacker
+from selfdrive.boardd.boardd import can_list_to_can_capnp
+from selfdrive.car.ford.radar_interface import RadarInterface, RADAR_MSGS
+from selfdrive.car.ford.values import CAR, DBC
+
+
+def radar_stream(tracks, frames):
+  """CAN strings of a synthetic stream of the Ford radar, which has a slot for 64 tracks,
+     with tracks objects slowly moving in front of the car."""
+  packer = CANPacker(DBC[CAR.FUSION]['radar'])
+  stream = []
+  for frame in range(frames):
+    msgs = []
+    for i, address in enumerate(RADAR_MSGS):
+      if i < tracks:
+        values = {'X_Rel': 10. + 3. * i + 0.1 * frame, 'Angle': (i % 7) - 3., 'V_Rel': 0.1 * i - 1.}
+      else:
+        values = {'X_Rel': 0.}
+      msgs.append(packer.make_can_msg(address, 1, values))
+    stream.append(can_list_to_can_capnp(msgs))
+  return stream
+
+
+def benchmark_radar(tracks, frames):
+  """Seconds per frame to assemble a radar frame, to read its points like radard
+     does and to serialize it to be logged."""
+  CP = car.CarParams.new_message()
+  CP.carFingerprint = CAR.FUSION
+  CP.radarTimeStep = 0.05
+  RI = RadarInterface(CP)
+
+  update_t, read_t, log_t = 0., 0., 0.
+  for can_string in radar_stream(tracks, frames):
+    t = time.perf_counter()
+    rr = RI.update([can_string])
+    update_t += time.perf_counter() - t
+
+    t = time.perf_counter()
+    ar_pts = {}
+    for track_id, d_rel, y_rel, v_rel, measured in rr.points.tolist():
+      ar_pts[track_id] = [d_rel, y_rel, v_rel, measured]
+    read_t += time.perf_counter() - t
+
+    t = time.perf_counter()
+    rr.to_capnp().to_bytes()
+    log_t += time.perf_counter() - t
+
+  assert len(ar_pts) == tracks
+  return update_t / frames, read_t / frames, log_t / frames
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description='Time radar frames of a synthetic radar stream')
+  parser.add_argument('--tracks', type=int, default=32)
+  parser.add_argument('--frames', type=int, default=1000)
+  args = parser.parse_args()
+
+  update_t, read_t, log_t = benchmark_radar(args.tracks, args.frames)
+  print("%d tracks: update %.1f us/frame, radard read %.1f us/frame, log %.1f us/frame" %
+        (args.tracks, update_t * 1e6, read_t * 1e6, log_t * 1e6))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from unittest import mock
+
+from cereal import log
+from opendbc import DBC_PATH
+from opendbc.can.dbc import dbc
+import selfdrive.debug.can_index as can_index
+from selfdrive.debug.can_index import CanIndex
+
+DBC_NAME = "toyota_prius_2017_pt_generated"
+
+# message, bus and frames between sends
+MSGS = [("STEER_ANGLE_SENSOR", 0, 1), ("STEER_TORQUE_SENSOR", 0, 2), ("STEER_ANGLE_SENSOR", 1, 5)]
+
+
+def make_events(can_dbc, n):
+  events = []
+  for frame in range(n):
+    msgs = []
+    for name, bus, step in MSGS:
+      if frame % step == 0:
+        if name == "STEER_ANGLE_SENSOR":
+          values = {"STEER_ANGLE": frame * 1.5 - 100 + bus, "STEER_RATE": 0}
+        else:
+          values = {"STEER_TORQUE_EPS": (1000 - frame) * 0.66}
+        msgs.append((can_dbc.lookup_msg_id(name), can_dbc.encode(name, values), bus))
+
+    evt = log.Event.new_message()
+    evt.logMonoTime = 1000000000 + frame * 10000000
+    can = evt.init('can', len(msgs))
+    for c, (address, dat, bus) in zip(can, msgs):
+      c.address = address
+      c.dat = dat
+      c.src = bus
+    events.append(evt)
+
+    # only can events are indexed
+    evt = log.Event.new_message()
+    evt.logMonoTime = 1000000000 + frame * 10000000
+    evt.init('sendcan', 1)
+    events.append(evt)
+  return events
+
+
+class TestCanIndex(unittest.TestCase):
+  def setUp(self):
+    self.can_dbc = dbc(os.path.join(DBC_PATH, DBC_NAME + ".dbc"))
+    self.n = 300
+    self.index = CanIndex.build(make_events(self.can_dbc, self.n))
+
+  def test_keys(self):
+    self.assertEqual(len(self.index.keys), len(MSGS))
+    for name, bus, step in MSGS:
+      i = self.index.lookup[(bus, self.can_dbc.lookup_msg_id(name))]
+      k = self.index.keys[i]
+      self.assertEqual(k['count'], len(range(0, self.n, step)))
+      self.assertEqual(k['first'], 1000000000)
+      self.assertEqual(k['last'], 1000000000 + (self.n - 1) // step * step * 10000000)
+      self.assertAlmostEqual(k['rate'], 100. / step)
+
+  def test_query(self):
+    t, values = self.index.query(self.can_dbc, "STEER_ANGLE_SENSOR", ["STEER_ANGLE"], bus=1)
+    frames = np.arange(0, self.n, 5)
+    np.testing.assert_equal(t, 1000000000 + frames * 10000000)
+    self.assertEqual(list(values), ["STEER_ANGLE"])
+    np.testing.assert_allclose(values["STEER_ANGLE"], frames * 1.5 - 99)
+
+    t, values = self.index.query(self.can_dbc, "STEER_TORQUE_SENSOR")
+    np.testing.assert_allclose(values["STEER_TORQUE_EPS"], (1000 - np.arange(0, self.n, 2)) * 0.66)
+
+    # nothing for messages that were not seen
+    t, values = self.index.query(self.can_dbc, "STEER_TORQUE_SENSOR", bus=1)
+    self.assertEqual(len(t), 0)
+    self.assertEqual(len(values["STEER_TORQUE_EPS"]), 0)
+
+  def test_chunks(self):
+    # the index doesn't depend on how the frames were split into chunks while building
+    with mock.patch.object(can_index, "BUILD_CHUNK", 7):
+      index = CanIndex.build(make_events(self.can_dbc, self.n))
+    np.testing.assert_equal(index.keys, self.index.keys)
+    np.testing.assert_equal(index.frames, self.index.frames)
+
+    index = CanIndex.build([])
+    self.assertEqual(len(index.frames), 0)
+    self.assertEqual(len(index.keys), 0)
+
+  def test_save_load(self):
+    path = tempfile.mkdtemp()
+    try:
+      self.index.save(path)
+      loaded = CanIndex.load(path)
+      np.testing.assert_equal(loaded.keys, self.index.keys)
+      np.testing.assert_equal(loaded.frames, self.index.frames)
+      for bus in [0, 1]:
+        expected = self.index.query(self.can_dbc, "STEER_ANGLE_SENSOR", bus=bus)
+        ret = loaded.query(self.can_dbc, "STEER_ANGLE_SENSOR", bus=bus)
+        np.testing.assert_equal(ret, expected)
+    finally:
+      shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+  unittest.main()
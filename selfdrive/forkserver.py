@@ -0,0 +1,184 @@
+import os
+import sys
+import time
+import signal
+import socket
+import importlib
+import traceback
+from setproctitle import setproctitle  #pylint: disable=no-name-in-module
+
+from selfdrive.swaglog import cloudlog
+from selfdrive.launcher import launcher
+
+# heavy imports shared by most python processes, loaded once in the fork server
+PRELOAD_MODULES = [
+  "numpy",
+  "cereal",
+  "cereal.messaging",
+  "selfdrive.crash",
+  "opendbc.can.parser",
+  "opendbc.can.packer",
+]
+
+# exit codes of children manager hasn't polled yet, oldest are dropped first
+MAX_EXITED = 256
+# reported for a child that exited but whose exit code was dropped
+UNKNOWN_EXITCODE = -signal.SIGKILL
+
+def run_child(proc):
+  signal.signal(signal.SIGINT, signal.default_int_handler)
+  signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+  signal.pthread_sigmask(signal.SIG_UNBLOCK, [signal.SIGCHLD])
+
+  code = 0
+  try:
+    launcher(proc)
+  except SystemExit as e:
+    code = e.code if isinstance(e.code, int) else 1
+  except BaseException:
+    traceback.print_exc()
+    code = 1
+
+  sys.stdout.flush()
+  sys.stderr.flush()
+  os._exit(code)
+
+def exitcode_from_status(status):
+  # same convention as multiprocessing.Process.exitcode
+  if os.WIFSIGNALED(status):
+    return -os.WTERMSIG(status)
+  return os.WEXITSTATUS(status)
+
+def reap_children(running, exited):
+  while True:
+    try:
+      pid, status = os.waitpid(-1, os.WNOHANG)
+    except ChildProcessError:
+      break
+    if pid == 0:
+      break
+    running.discard(pid)
+    exited[pid] = exitcode_from_status(status)
+
+  while len(exited) > MAX_EXITED:
+    del exited[next(iter(exited))]
+
+
+class ForkServer():
+  """Pre-warmed process that python managed processes are forked from.
+
+  The server is forked from manager once the process modules are preimported,
+  loads PRELOAD_MODULES and then forks children on request, so (re)starting a
+  process costs a fork instead of a fresh interpreter state and the pages of the
+  shared imports stay shared between all children. Children belong to the
+  server, which reaps them and reports their exit codes back to manager.
+  """
+
+  def __init__(self, preload=PRELOAD_MODULES):
+    self.preload = preload
+    self.pid = None
+    self.sock = None
+
+  def start(self):
+    parent_sock, child_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    pid = os.fork()
+    if pid == 0:
+      parent_sock.close()
+      try:
+        self.serve(child_sock)
+      except Exception:
+        cloudlog.exception("forkserver failed")
+      finally:
+        os._exit(0)
+
+    child_sock.close()
+    self.pid = pid
+    self.sock = parent_sock
+    cloudlog.info("forkserver started with pid %d" % pid)
+
+  def stop(self):
+    if self.sock is not None:
+      self.sock.close()
+      self.sock = None
+      os.waitpid(self.pid, 0)
+
+  def request(self, *args):
+    self.sock.send(' '.join(args).encode('utf8'))
+    return self.sock.recv(64).decode('utf8')
+
+  def serve(self, sock):
+    setproctitle("selfdrive.forkserver")
+
+    # ctrl-c is handled by manager and the children
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    for mod in self.preload:
+      try:
+        importlib.import_module(mod)
+      except Exception:
+        cloudlog.exception("forkserver failed to preload %s" % mod)
+
+    # children are reaped as soon as they exit, not only when manager polls
+    running, exited = set(), {}
+    signal.signal(signal.SIGCHLD, lambda signum, frame: reap_children(running, exited))
+
+    while True:
+      msg = sock.recv(4096)
+      if not msg:
+        # manager went away
+        break
+
+      cmd, arg = msg.decode('utf8').split(' ', 1)
+      signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGCHLD])
+      if cmd == "start":
+        # drop a stale exit code of a reused pid before the new child can be reaped
+        pid = os.fork()
+        if pid == 0:
+          sock.close()
+          run_child(arg)
+        exited.pop(pid, None)
+        running.add(pid)
+        ret = pid
+      elif cmd == "poll":
+        # manager keeps the exit code once it has seen it, a child that is neither
+        # running nor has an exit code left exited while its code was dropped
+        pid = int(arg)
+        ret = None if pid in running else exited.pop(pid, UNKNOWN_EXITCODE)
+      signal.pthread_sigmask(signal.SIG_UNBLOCK, [signal.SIGCHLD])
+      sock.send(str(ret).encode('utf8'))
+
+class ForkServerProcess():
+  """The parts of the multiprocessing.Process interface manager uses, for a
+  python process started by a ForkServer."""
+
+  def __init__(self, server, name, proc):
+    self.server = server
+    self.name = name
+    self.proc = proc
+    self.pid = None
+    self._exitcode = None
+
+  def start(self):
+    self.pid = int(self.server.request("start", self.proc))
+
+  @property
+  def exitcode(self):
+    if self._exitcode is None and self.pid is not None:
+      ret = self.server.request("poll", str(self.pid))
+      if ret != "None":
+        self._exitcode = int(ret)
+    return self._exitcode
+
+  def is_alive(self):
+    return self.pid is not None and self.exitcode is None
+
+  def terminate(self):
+    os.kill(self.pid, signal.SIGTERM)
+
+  def join(self, timeout=None):
+    t = time.time()
+    while self.exitcode is None:
+      if timeout is not None and time.time() - t > timeout:
+        return
+      time.sleep(0.001)
@@ -5,9 +5,11 @@ import threading
 from selfdrive.swaglog import cloudlog
 from selfdrive.loggerd.config import ROOT, get_available_bytes
 from selfdrive.loggerd.uploader import listdir_by_creation
+from selfdrive.loggerd.manifest import DataManifest, notify
 
 
 def deleter_thread(exit_event):
+  manifest = DataManifest(ROOT)
   while not exit_event.is_set():
     available_bytes = get_available_bytes()
 
@@ -23,6 +25,7 @@ def deleter_thread(exit_event):
         try:
           cloudlog.info("deleting %s" % delete_path)
           shutil.rmtree(delete_path)
+          notify(manifest, "segment_deleted", delete_dir)
           break
         except OSError:
           cloudlog.exception("issue deleting %s" % delete_path)
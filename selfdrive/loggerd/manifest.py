@@ -0,0 +1,177 @@
+import os
+import sqlite3
+from contextlib import closing
+
+from selfdrive.swaglog import cloudlog
+from selfdrive.loggerd.config import ROOT
+
+# upload states for files tracked in the manifest
+UPLOAD_PENDING = "pending"
+UPLOAD_UPLOADING = "uploading"
+UPLOAD_FAILED = "failed"
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+  name TEXT PRIMARY KEY,
+  mtime_ns INTEGER NOT NULL,
+  locked INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+  path TEXT PRIMARY KEY,
+  segment TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  mtime REAL NOT NULL,
+  upload_state TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_segment ON files (segment);
+"""
+
+
+class DataManifest():
+  """Cached listing of the segments and files in the loggerd data directory.
+
+  Segment directories are only rescanned when their mtime changes (files were
+  created, renamed or removed by loggerd rotation, the uploader or the deleter)
+  or while they are still being written, so a refresh costs one listdir of ROOT
+  plus one stat per segment. The manifest is shared between processes through
+  a sqlite database.
+  """
+
+  def __init__(self, root=ROOT, path=None):
+    self.root = root
+    # kept next to, not inside, the data directory so it's never uploaded or deleted
+    self.path = path if path is not None else get_manifest_path(root)
+
+  def _connect(self):
+    db = sqlite3.connect(self.path, timeout=10)
+    version = db.execute("PRAGMA user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+      db.executescript("DROP TABLE IF EXISTS segments; DROP TABLE IF EXISTS files;")
+      db.executescript(SCHEMA)
+      db.execute("PRAGMA user_version = %d" % SCHEMA_VERSION)
+      db.commit()
+    return db
+
+  def _scan_segment(self, db, name, st):
+    seg_path = os.path.join(self.root, name)
+    try:
+      fns = os.listdir(seg_path)
+    except OSError:
+      self._remove_segment(db, name)
+      return
+
+    old_states = dict(db.execute("SELECT path, upload_state FROM files WHERE segment = ?", (name,)))
+    rows = []
+    for fn in fns:
+      try:
+        fst = os.stat(os.path.join(seg_path, fn))
+      except OSError:
+        continue
+      key = os.path.join(name, fn)
+      rows.append((key, name, fst.st_size, fst.st_mtime, old_states.get(key, UPLOAD_PENDING)))
+
+    locked = any(fn.endswith(".lock") for fn in fns)
+    db.execute("DELETE FROM files WHERE segment = ?", (name,))
+    db.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?)", rows)
+    db.execute("INSERT OR REPLACE INTO segments VALUES (?, ?, ?)", (name, st.st_mtime_ns, int(locked)))
+
+  def _remove_segment(self, db, name):
+    db.execute("DELETE FROM files WHERE segment = ?", (name,))
+    db.execute("DELETE FROM segments WHERE name = ?", (name,))
+
+  def refresh(self):
+    """Bring the manifest up to date with the data directory.
+
+    Returns the number of segments that had to be rescanned."""
+    try:
+      names = os.listdir(self.root)
+    except OSError:
+      names = []
+
+    rescanned = 0
+    with closing(self._connect()) as db:
+      known = {name: (mtime_ns, locked) for name, mtime_ns, locked in db.execute("SELECT * FROM segments")}
+
+      # top-level files are listed as their own segment
+      for name in names:
+        try:
+          st = os.stat(os.path.join(self.root, name))
+        except OSError:
+          continue
+
+        if os.path.isdir(os.path.join(self.root, name)):
+          mtime_ns, locked = known.pop(name, (None, True))
+          if locked or mtime_ns != st.st_mtime_ns:
+            self._scan_segment(db, name, st)
+            rescanned += 1
+        else:
+          known.pop(name, None)
+          db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, COALESCE((SELECT upload_state FROM files WHERE path = ?), ?))",
+                     (name, name, st.st_size, st.st_mtime, name, UPLOAD_PENDING))
+          db.execute("INSERT OR REPLACE INTO segments VALUES (?, ?, ?)", (name, st.st_mtime_ns, 1))
+
+      for name in known:
+        self._remove_segment(db, name)
+
+      db.commit()
+    return rescanned
+
+  def segment_changed(self, name):
+    """Rescan a single segment, e.g. after it was rotated, uploaded from or deleted."""
+    with closing(self._connect()) as db:
+      try:
+        st = os.stat(os.path.join(self.root, name))
+        self._scan_segment(db, name, st)
+      except OSError:
+        self._remove_segment(db, name)
+      db.commit()
+
+  def set_upload_state(self, key, state):
+    with closing(self._connect()) as db:
+      db.execute("UPDATE files SET upload_state = ? WHERE path = ?", (state, key))
+      db.commit()
+
+  def file_uploaded(self, key):
+    with closing(self._connect()) as db:
+      db.execute("DELETE FROM files WHERE path = ?", (key,))
+      db.commit()
+
+  def segment_deleted(self, name):
+    with closing(self._connect()) as db:
+      self._remove_segment(db, name)
+      db.commit()
+
+  def list_files(self, prefix="", start_after=None, limit=None):
+    """Return files as (path, size, mtime, upload_state) tuples sorted by path.
+
+    Results can be paged by passing the path of the last returned file as
+    start_after. Only files whose path starts with prefix are returned."""
+    query = "SELECT path, size, mtime, upload_state FROM files WHERE path >= ?"
+    args = [prefix]
+    if prefix:
+      # prefix match as a range scan on the primary key
+      query += " AND path < ?"
+      args.append(prefix + "\uffff")
+    if start_after is not None:
+      query += " AND path > ?"
+      args.append(start_after)
+    query += " ORDER BY path"
+    if limit is not None:
+      query += " LIMIT ?"
+      args.append(int(limit))
+
+    with closing(self._connect()) as db:
+      return db.execute(query, args).fetchall()
+
+
+def get_manifest_path(root):
+  return os.path.normpath(root) + "_manifest.db"
+
+def notify(manifest, fn, *args):
+  """Best-effort manifest update, failures are logged but never raised."""
+  try:
+    getattr(manifest, fn)(*args)
+  except Exception:
+    cloudlog.exception("manifest.%s failed" % fn)
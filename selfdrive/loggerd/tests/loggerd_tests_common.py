@@ -6,6 +6,7 @@ import tempfile
 import unittest
 
 import selfdrive.loggerd.uploader as uploader
+from selfdrive.loggerd.manifest import get_manifest_path
 
 def create_random_file(file_path, size_mb, lock=False):
     try:
@@ -73,6 +74,11 @@ class UploaderTestCase(unittest.TestCase):
     except OSError as e:
       if e.errno != errno.ENOENT:
         raise
+    try:
+      os.unlink(get_manifest_path(self.root))
+    except OSError as e:
+      if e.errno != errno.ENOENT:
+        raise
 
   def make_file_with_data(self, f_dir, fn, size_mb=.1, lock=False):
     file_path = os.path.join(self.root, f_dir, fn)
@@ -0,0 +1,79 @@
+import os
+import unittest
+
+from selfdrive.loggerd.manifest import DataManifest, UPLOAD_PENDING, UPLOAD_FAILED
+
+from selfdrive.loggerd.tests.loggerd_tests_common import UploaderTestCase
+
+
+class TestManifest(UploaderTestCase):
+  def setUp(self):
+    super(TestManifest, self).setUp()
+    self.manifest = DataManifest(self.root)
+
+  def gen_segments(self, seg_nums):
+    keys = []
+    for i in seg_nums:
+      seg_dir = self.seg_format.format(i)
+      for f in ["qlog.bz2", "rlog.bz2"]:
+        self.make_file_with_data(seg_dir, f, .01)
+        keys.append(os.path.join(seg_dir, f))
+    return sorted(keys)
+
+  def test_list_files(self):
+    keys = self.gen_segments([0, 1, 2])
+    self.manifest.refresh()
+
+    files = self.manifest.list_files()
+    self.assertEqual([f[0] for f in files], keys)
+    for path, size, _, upload_state in files:
+      self.assertEqual(size, os.path.getsize(os.path.join(self.root, path)))
+      self.assertEqual(upload_state, UPLOAD_PENDING)
+
+  def test_incremental_refresh(self):
+    self.gen_segments([0, 1, 2])
+    self.assertEqual(self.manifest.refresh(), 3)
+    self.assertEqual(self.manifest.refresh(), 0, "Unchanged segments rescanned")
+
+    self.gen_segments([3])
+    self.assertEqual(self.manifest.refresh(), 1)
+
+  def test_locked_segment_rescanned(self):
+    seg_dir = self.seg_format.format(0)
+    self.make_file_with_data(seg_dir, "rlog.bz2", .01, lock=True)
+    self.manifest.refresh()
+    self.assertEqual(self.manifest.refresh(), 1, "Locked segment not rescanned")
+
+  def test_paging_and_prefix(self):
+    keys = self.gen_segments([0, 1, 2])
+    self.manifest.refresh()
+
+    page1 = self.manifest.list_files(limit=4)
+    page2 = self.manifest.list_files(start_after=page1[-1][0], limit=4)
+    self.assertEqual([f[0] for f in page1 + page2], keys)
+
+    prefix = self.seg_format.format(1) + "/"
+    self.assertEqual([f[0] for f in self.manifest.list_files(prefix=prefix)],
+                     [k for k in keys if k.startswith(prefix)])
+
+  def test_upload_state(self):
+    keys = self.gen_segments([0])
+    self.manifest.refresh()
+
+    self.manifest.set_upload_state(keys[0], UPLOAD_FAILED)
+    self.manifest.file_uploaded(keys[1])
+    files = self.manifest.list_files()
+    self.assertEqual([f[0] for f in files], keys[:1])
+    self.assertEqual(files[0][3], UPLOAD_FAILED)
+
+  def test_segment_deleted(self):
+    self.gen_segments([0, 1])
+    self.manifest.refresh()
+
+    seg_dir = self.seg_format.format(0)
+    self.manifest.segment_deleted(seg_dir)
+    self.assertFalse(any(f[0].startswith(seg_dir) for f in self.manifest.list_files()))
+
+
+if __name__ == "__main__":
+  unittest.main()
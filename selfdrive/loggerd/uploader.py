@@ -13,6 +13,7 @@ import subprocess
 
 from selfdrive.swaglog import cloudlog
 from selfdrive.loggerd.config import ROOT
+from selfdrive.loggerd.manifest import DataManifest, notify, UPLOAD_UPLOADING, UPLOAD_FAILED
 
 from common import android
 from common.params import Params
@@ -92,6 +93,7 @@ class Uploader():
     self.dongle_id = dongle_id
     self.api = Api(dongle_id)
     self.root = root
+    self.manifest = DataManifest(root)
 
     self.upload_thread = None
 
@@ -108,6 +110,7 @@ class Uploader():
         # remove empty directories
         if not os.listdir(path):
           os.rmdir(path)
+          notify(self.manifest, "segment_deleted", logname)
     except OSError:
       cloudlog.exception("clean_dirs failed")
 
@@ -205,6 +208,7 @@ class Uploader():
       success = True
     else:
       cloudlog.info("uploading %r", fn)
+      notify(self.manifest, "set_upload_state", key, UPLOAD_UPLOADING)
       stat = self.normal_upload(key, fn)
       if stat is not None and stat.status_code in (200, 201):
         cloudlog.event("upload_success", key=key, fn=fn, sz=sz)
@@ -215,9 +219,11 @@ class Uploader():
         except OSError:
           cloudlog.event("delete_failed", stat=stat, exc=self.last_exc, key=key, fn=fn, sz=sz)
 
+        notify(self.manifest, "file_uploaded", key)
         success = True
       else:
         cloudlog.event("upload_failed", stat=stat, exc=self.last_exc, key=key, fn=fn, sz=sz)
+        notify(self.manifest, "set_upload_state", key, UPLOAD_FAILED)
         success = False
 
     self.clean_dirs()
@@ -11,6 +11,7 @@ import datetime
 
 from common.basedir import BASEDIR
 from common.android import ANDROID
+from common.profiler import StartupTimer
 sys.path.append(os.path.join(BASEDIR, "pyextra"))
 os.environ['BASEDIR'] = BASEDIR
 
@@ -67,6 +68,8 @@ import importlib
 import traceback
 from multiprocessing import Process
 
+startup_timer = StartupTimer()
+
 # Run scons
 spinner = Spinner()
 spinner.update("0")
@@ -113,25 +116,32 @@ if not prebuilt:
     else:
       break
 
+startup_timer.stage("scons")
+
 import cereal
 import cereal.messaging as messaging
 
 from common.params import Params
+from common.realtime import RATEKEEPER_STATS_PATH
 import selfdrive.crash as crash
 from selfdrive.swaglog import cloudlog
 from selfdrive.registration import register
 from selfdrive.version import version, dirty
 from selfdrive.loggerd.config import ROOT
 from selfdrive.launcher import launcher
+from selfdrive.forkserver import ForkServer, ForkServerProcess
 from common import android
 from common.apk import update_apks, pm_apply_packages, start_frame
 
+startup_timer.stage("imports")
+
 ThermalStatus = cereal.log.ThermalData.ThermalStatus
 
 # comment out anything you don't want to run
 managed_processes = {
   "thermald": "selfdrive.thermald",
   "uploader": "selfdrive.loggerd.uploader",
+  "proctelemd": "selfdrive.proctelemd",
   "deleter": "selfdrive.loggerd.deleter",
   "controlsd": "selfdrive.controls.controlsd",
   "plannerd": "selfdrive.controls.plannerd",
@@ -164,6 +174,9 @@ running = {}
 def get_running():
   return running
 
+# when set, python processes are forked from a pre-warmed fork server
+forkserver = None
+
 # due to qualcomm kernel bugs SIGKILLing camerad sometimes causes page table corruption
 unkillable_processes = ['camerad']
 
@@ -179,6 +192,7 @@ green_temp_processes = ['uploader']
 persistent_processes = [
   'thermald',
   'logmessaged',
+  'proctelemd',
   'ui',
   'uploader',
 ]
@@ -235,7 +249,10 @@ def start_managed_process(name):
   proc = managed_processes[name]
   if isinstance(proc, str):
     cloudlog.info("starting python %s" % proc)
-    running[name] = Process(name=name, target=launcher, args=(proc,))
+    if forkserver is not None:
+      running[name] = ForkServerProcess(forkserver, name, proc)
+    else:
+      running[name] = Process(name=name, target=launcher, args=(proc,))
   else:
     pdir, pargs = proc
     cwd = os.path.join(BASEDIR, pdir)
@@ -267,6 +284,11 @@ def start_daemon_process(name):
   params.put(pid_param, str(proc.pid))
 
 def prepare_managed_process(p):
+  t = time.time()
+  _prepare_managed_process(p)
+  return time.time() - t
+
+def _prepare_managed_process(p):
   proc = managed_processes[p]
   if isinstance(proc, str):
     # import this python
@@ -319,6 +341,10 @@ def kill_managed_process(name):
         running[name].join()
 
   cloudlog.info("%s is dead with %d" % (name, running[name].exitcode))
+  try:
+    os.unlink(RATEKEEPER_STATS_PATH % running[name].pid)
+  except OSError:
+    pass
   del running[name]
 
 
@@ -330,6 +356,9 @@ def cleanup_all_processes(signal, frame):
 
   for name in list(running.keys()):
     kill_managed_process(name)
+
+  if forkserver is not None:
+    forkserver.stop()
   cloudlog.info("everything is dead")
 
 # ****************** run loop ******************
@@ -347,6 +376,7 @@ def manager_init(should_register=True):
   # set dongle id
   cloudlog.info("dongle id is " + dongle_id)
   os.environ['DONGLE_ID'] = dongle_id
+  os.environ['MANAGER_PID'] = str(os.getpid())
 
   cloudlog.info("dirty is %d" % dirty)
   if not dirty:
@@ -442,7 +472,13 @@ def manager_prepare(spinner=None):
   for i, p in enumerate(managed_processes):
     if spinner is not None:
       spinner.update("%d" % ((100.0 - total) + total * (i + 1) / len(managed_processes),))
-    prepare_managed_process(p)
+    startup_timer.substage("prepare", p, prepare_managed_process(p))
+
+def start_forkserver():
+  global forkserver
+  # fork after prepare so the server inherits all the preimported processes
+  forkserver = ForkServer()
+  forkserver.start()
 
 def uninstall():
   cloudlog.warning("uninstalling")
@@ -501,15 +537,25 @@ def main():
   if params.get("Passive") is None:
     raise Exception("Passive must be set to continue")
 
+  startup_timer.stage("params")
+
   if ANDROID:
     update_apks()
   manager_init()
+  startup_timer.stage("init")
   manager_prepare(spinner)
+  startup_timer.stage("prepare")
   spinner.close()
 
+  startup_timer.display()
+  cloudlog.event("manager.startup_timing", **startup_timer.as_dict())
+
   if os.getenv("PREPAREONLY") is not None:
     return
 
+  if os.getenv("FORKSERVER") is not None:
+    start_forkserver()
+
   # SystemExit on sigterm
   signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
 
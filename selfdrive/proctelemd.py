@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+import os
+import struct
+from collections import deque
+
+import numpy as np
+
+import cereal.messaging as messaging
+from common.realtime import sec_since_boot, Ratekeeper, RATEKEEPER_STATS, RATEKEEPER_STATS_PATH
+from selfdrive.thermal_sampler import SysfsFile
+
+TELEMETRY_RATE = 1.  # Hz
+WINDOW = 60  # samples in the rolling summary
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def parse_stat(dat):
+  # the process name can contain spaces and parentheses, fields start after the last ')'
+  fields = dat[dat.rindex(')') + 2:].split()
+  return {
+    'ppid': int(fields[1]),
+    'cpu_time': (int(fields[11]) + int(fields[12])) / CLOCK_TICKS,  # utime + stime
+    'rss': int(fields[21]) * PAGE_SIZE,
+  }
+
+def parse_ctxt_switches(dat):
+  voluntary, nonvoluntary = 0, 0
+  for line in dat.split('\n'):
+    if line.startswith('voluntary_ctxt_switches'):
+      voluntary = int(line.split()[1])
+    elif line.startswith('nonvoluntary_ctxt_switches'):
+      nonvoluntary = int(line.split()[1])
+  return voluntary, nonvoluntary
+
+def name_from_cmdline(cmdline):
+  # python processes are renamed to their module with setproctitle, native processes are exec'd
+  for arg in cmdline.split('\0'):
+    name = os.path.basename(arg)
+    if not name or name.startswith('-') or name.startswith('python'):
+      continue
+    return name.rsplit('.', 1)[-1] if '/' not in arg else name
+  return None
+
+
+class TrackedProcess():
+  def __init__(self, pid, ppid, name, proc_root, stats_path):
+    self.pid = pid
+    self.ppid = ppid
+    self.name = name
+    self.stat = SysfsFile(os.path.join(proc_root, str(pid), "stat"), size=1024)
+    self.status = SysfsFile(os.path.join(proc_root, str(pid), "status"), size=4096)
+    self.stats_path = stats_path
+    self.loop_stats = None
+
+    self.last_cpu_time = None
+    self.last_loop = None
+    self.cpu_percent = deque(maxlen=WINDOW)
+    self.loop_lag = deque(maxlen=WINDOW)
+
+  def read_loop_stats(self):
+    if self.loop_stats is None:
+      # Ratekeeper may be created after the process started
+      self.loop_stats = SysfsFile(self.stats_path, size=RATEKEEPER_STATS.size)
+      if self.loop_stats.fd is None:
+        self.loop_stats = None
+        return None
+
+    try:
+      dat = os.pread(self.loop_stats.fd, RATEKEEPER_STATS.size, 0)
+      return RATEKEEPER_STATS.unpack(dat)
+    except (OSError, struct.error):
+      return None
+
+  def close(self):
+    self.stat.close()
+    self.status.close()
+    if self.loop_stats is not None:
+      self.loop_stats.close()
+
+
+class ProcTelemetry():
+  """Tracks the manager and the processes it started (including the ones
+  forked from its fork server) in one pass over /proc per sample."""
+
+  def __init__(self, manager_pid, proc_root="/proc", stats_path=RATEKEEPER_STATS_PATH):
+    self.manager_pid = manager_pid
+    self.proc_root = proc_root
+    self.stats_path = stats_path
+    self.tracked = {}
+    self.ignored = set()
+    self.last_t = None
+
+    # python processes carry the manager's cmdline until they set their title
+    self.manager_name = self.read_name(manager_pid)
+
+  def read_ppid(self, pid):
+    try:
+      with open(os.path.join(self.proc_root, str(pid), "stat")) as f:
+        return parse_stat(f.read())['ppid']
+    except (OSError, ValueError, IndexError):
+      return None
+
+  def read_name(self, pid):
+    try:
+      with open(os.path.join(self.proc_root, str(pid), "cmdline")) as f:
+        return name_from_cmdline(f.read())
+    except OSError:
+      return None
+
+  def discover(self):
+    pids = set(int(p) for p in os.listdir(self.proc_root) if p.isdigit())
+
+    for pid in list(self.tracked):
+      if pid not in pids:
+        self.tracked.pop(pid).close()
+        try:
+          os.unlink(self.stats_path % pid)
+        except OSError:
+          pass
+    self.ignored &= pids
+
+    for p in self.tracked.values():
+      if p.pid != self.manager_pid and p.name == self.manager_name:
+        p.name = self.read_name(p.pid) or p.name
+
+    # only new pids are inspected, parents of tracked processes don't change
+    for pid in sorted(pids - self.ignored - set(self.tracked)):
+      ppid = self.read_ppid(pid)
+      parent = self.tracked.get(ppid)
+      forked = parent is not None and parent.name == "forkserver"
+      if pid == self.manager_pid or ppid == self.manager_pid or forked:
+        name = "manager" if pid == self.manager_pid else self.read_name(pid)
+        if name is not None:
+          self.tracked[pid] = TrackedProcess(pid, ppid, name, self.proc_root, self.stats_path % pid)
+          continue
+      self.ignored.add(pid)
+
+  def update(self, t):
+    self.discover()
+    dt = t - self.last_t if self.last_t is not None else 0.
+    self.last_t = t
+
+    ret = []
+    for p in self.tracked.values():
+      dat = p.stat.read()
+      if dat is None:
+        continue
+      stat = parse_stat(dat)
+      voluntary, nonvoluntary = parse_ctxt_switches(p.status.read() or "")
+
+      cpu_percent = 0.
+      if p.last_cpu_time is not None and dt > 0:
+        cpu_percent = 100. * (stat['cpu_time'] - p.last_cpu_time) / dt
+        p.cpu_percent.append(cpu_percent)
+      p.last_cpu_time = stat['cpu_time']
+
+      proc = {
+        'name': p.name,
+        'pid': p.pid,
+        'cpuPercent': cpu_percent,
+        'memRss': stat['rss'],
+        'voluntaryCtxtSwitches': voluntary,
+        'nonvoluntaryCtxtSwitches': nonvoluntary,
+      }
+
+      loop = p.read_loop_stats()
+      if loop is not None:
+        frames, lagged_frames, total_lag, _ = loop
+        proc['loopFrames'] = frames
+        if p.last_loop is not None and frames > p.last_loop[0]:
+          proc['loopLaggedFrames'] = lagged_frames - p.last_loop[1]
+          proc['loopLag'] = (total_lag - p.last_loop[2]) / (frames - p.last_loop[0])
+          p.loop_lag.append(proc['loopLag'])
+        p.last_loop = loop
+
+      if len(p.cpu_percent):
+        cpu = np.array(p.cpu_percent)
+        proc['cpuPercentP50'] = np.percentile(cpu, 50)
+        proc['cpuPercentP90'] = np.percentile(cpu, 90)
+        proc['cpuPercentMax'] = np.max(cpu)
+      if len(p.loop_lag):
+        lag = np.array(p.loop_lag)
+        proc['loopLagP90'] = np.percentile(lag, 90)
+        proc['loopLagMax'] = np.max(lag)
+
+      ret.append(proc)
+    return ret
+
+
+def proctelemd_thread():
+  telemetry_sock = messaging.pub_sock('procTelemetry')
+  telemetry = ProcTelemetry(int(os.getenv("MANAGER_PID", os.getppid())))
+
+  rk = Ratekeeper(TELEMETRY_RATE, print_delay_threshold=None)
+  while True:
+    procs = telemetry.update(sec_since_boot())
+
+    dat = messaging.new_message()
+    dat.init('procTelemetry')
+    dat.procTelemetry.init('procs', len(procs))
+    for i, proc in enumerate(procs):
+      for k, v in proc.items():
+        setattr(dat.procTelemetry.procs[i], k, v)
+    telemetry_sock.send(dat.to_bytes())
+
+    rk.keep_time()
+
+
+def main(gctx=None):
+  proctelemd_thread()
+
+if __name__ == "__main__":
+  main()
@@ -11,6 +11,7 @@ else:
 
 from cereal import car, log
 from selfdrive.car.car_helpers import get_car
+from selfdrive.controls.radard import get_live_tracks_rate, live_tracks_decimation
 import selfdrive.manager as manager
 import cereal.messaging as messaging
 from common.params import Params
@@ -160,10 +161,17 @@ def get_car_params(msgs, fsm, can_sock):
   Params().put("CarParams", CP.to_bytes())
 
 def radar_rcv_callback(msg, CP, cfg, fsm):
+  # liveTracks is sent when radard's rk.frame is a multiple of the decimation. The fake
+  # SubMaster only counts this frame after the callback, so rk.frame is fsm.frame + 1
+  radar_frame = fsm.frame + 1
+  recv_socks = ["radarState"]
+  if radar_frame % live_tracks_decimation(CP.radarTimeStep, get_live_tracks_rate()) == 0:
+    recv_socks.append("liveTracks")
+
   if msg.which() != "can":
     return [], False
   elif CP.radarOffCan:
-    return ["radarState", "liveTracks"], True
+    return recv_socks, True
 
   radar_msgs = {"honda": [0x445], "toyota": [0x19f, 0x22f], "gm": [0x474],
                 "chrysler": [0x2d4]}.get(CP.carName, None)
@@ -173,7 +181,7 @@ def radar_rcv_callback(msg, CP, cfg, fsm):
 
   for m in msg.can:
     if m.src == 1 and m.address in radar_msgs:
-      return ["radarState", "liveTracks"], True
+      return recv_socks, True
   return [], False
 
 def calibration_rcv_callback(msg, CP, cfg, fsm):
@@ -248,6 +256,8 @@ def replay_process(cfg, lr):
   params.put("CommunityFeaturesToggle", "1")
 
   os.environ['NO_RADAR_SLEEP'] = "1"
+  # the reference logs have liveTracks on every radar frame
+  os.environ['LIVE_TRACKS_RATE'] = "inf"
   manager.prepare_managed_process(cfg.proc_name)
   mod = importlib.import_module(manager.managed_processes[cfg.proc_name])
   thread = threading.Thread(target=mod.main, args=args)
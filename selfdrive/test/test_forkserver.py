@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import signal
+import unittest
+from unittest import mock
+
+import selfdrive.forkserver as forkserver
+from selfdrive.forkserver import ForkServer, ForkServerProcess
+
+
+def fake_launcher(proc):
+  # proc is "<action> <arg>" instead of a module name
+  action, arg = proc.split(' ')
+  if action == "exit":
+    sys.exit(int(arg))
+  elif action == "sleep":
+    time.sleep(float(arg))
+
+
+class TestForkServer(unittest.TestCase):
+  def setUp(self):
+    # patched before the fork, so the server and its children see it
+    with mock.patch.object(forkserver, "launcher", fake_launcher):
+      self.server = ForkServer(preload=[])
+      self.server.start()
+
+  def tearDown(self):
+    self.server.stop()
+
+  def test_exit_code(self):
+    for code in [0, 3]:
+      p = ForkServerProcess(self.server, "test", "exit %d" % code)
+      p.start()
+      p.join(5)
+      self.assertFalse(p.is_alive())
+      self.assertEqual(p.exitcode, code)
+
+  def test_kill(self):
+    p = ForkServerProcess(self.server, "test", "sleep 10")
+    p.start()
+    self.assertTrue(p.is_alive())
+    p.terminate()
+    p.join(5)
+    self.assertEqual(p.exitcode, -signal.SIGTERM)
+
+  def test_reaped_without_poll(self):
+    p = ForkServerProcess(self.server, "test", "exit 0")
+    p.start()
+
+    # the server reaps on SIGCHLD, so no zombie is left behind before manager polls
+    for _ in range(500):
+      if not os.path.exists("/proc/%d" % p.pid):
+        break
+      time.sleep(0.01)
+    self.assertFalse(os.path.exists("/proc/%d" % p.pid))
+    self.assertEqual(p.exitcode, 0)
+
+  def test_exit_codes_pruned(self):
+    procs = [ForkServerProcess(self.server, "test", "exit 0") for _ in range(forkserver.MAX_EXITED + 10)]
+    for p in procs:
+      p.start()
+    time.sleep(0.5)
+
+    # the oldest unpolled exit codes are dropped, those children are still reported as exited
+    self.assertEqual(procs[0].exitcode, forkserver.UNKNOWN_EXITCODE)
+    self.assertFalse(procs[0].is_alive())
+    self.assertEqual(procs[-1].exitcode, 0)
+
+    # exit codes are handed out once
+    self.assertEqual(self.server.request("poll", str(procs[-1].pid)), str(forkserver.UNKNOWN_EXITCODE))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import common.realtime as realtime
+from common.realtime import RatekeeperStats, RATEKEEPER_STATS
+from selfdrive.proctelemd import ProcTelemetry, TrackedProcess, CLOCK_TICKS, PAGE_SIZE, parse_stat, parse_ctxt_switches, name_from_cmdline
+
+MANAGER_PID = 100
+
+# pid: (ppid, cmdline)
+PROCS = {
+  MANAGER_PID: (1, "python\0./manager.py\0"),
+  101: (MANAGER_PID, "selfdrive.controls.controlsd\0"),
+  102: (MANAGER_PID, "selfdrive.forkserver\0"),
+  103: (102, "selfdrive.controls.radard\0"),
+  104: (MANAGER_PID, "./boardd\0"),
+  200: (1, "/usr/bin/some_daemon\0"),
+}
+
+
+def stat_line(pid, ppid, name, utime=0, stime=0, rss=0):
+  fields = ["S", ppid] + [0] * 9 + [utime, stime] + [0] * 8 + [rss]
+  return "%d (%s) %s\n" % (pid, name, " ".join(str(f) for f in fields))
+
+
+class TestProcTelemd(unittest.TestCase):
+  def setUp(self):
+    self.root = tempfile.mkdtemp()
+    self.stats_path = os.path.join(self.root, "ratekeeper_%d")
+    for pid, (ppid, cmdline) in PROCS.items():
+      self.write_proc(pid, ppid, cmdline)
+
+  def tearDown(self):
+    shutil.rmtree(self.root)
+
+  def write(self, path, dat, mode='w'):
+    with open(os.path.join(self.root, path), mode) as f:
+      f.write(dat)
+
+  def write_proc(self, pid, ppid, cmdline, **kwargs):
+    os.makedirs(os.path.join(self.root, str(pid)), exist_ok=True)
+    self.write("%d/stat" % pid, stat_line(pid, ppid, "python3", **kwargs))
+    self.write("%d/status" % pid, "Name:\tpython3\nvoluntary_ctxt_switches:\t10\nnonvoluntary_ctxt_switches:\t2\n")
+    self.write("%d/cmdline" % pid, cmdline)
+
+  def write_loop_stats(self, pid, *stats):
+    self.write(os.path.basename(self.stats_path % pid), RATEKEEPER_STATS.pack(*stats), mode='wb')
+
+  def telemetry(self):
+    return ProcTelemetry(MANAGER_PID, proc_root=self.root, stats_path=self.stats_path)
+
+  def test_parse(self):
+    stat = parse_stat(stat_line(5, 4, "a (b) c", utime=3 * CLOCK_TICKS, stime=CLOCK_TICKS, rss=10))
+    self.assertEqual(stat, {'ppid': 4, 'cpu_time': 4., 'rss': 10 * PAGE_SIZE})
+    self.assertEqual(parse_ctxt_switches("voluntary_ctxt_switches:\t7\nnonvoluntary_ctxt_switches:\t3\n"), (7, 3))
+
+    self.assertEqual(name_from_cmdline("selfdrive.controls.controlsd\0"), "controlsd")
+    self.assertEqual(name_from_cmdline("python\0-u\0./manager.py\0"), "manager.py")
+    self.assertEqual(name_from_cmdline("./boardd\0"), "boardd")
+
+  def test_discover(self):
+    telemetry = self.telemetry()
+    names = {p['pid']: p['name'] for p in telemetry.update(0.)}
+
+    # manager, its children and the children of the fork server, nothing else
+    self.assertEqual(names, {MANAGER_PID: "manager", 101: "controlsd", 102: "forkserver", 103: "radard", 104: "boardd"})
+
+    # exited processes are dropped along with their loop stats
+    self.write_loop_stats(101, 1, 0, 0., 0.)
+    shutil.rmtree(os.path.join(self.root, "101"))
+    names = [p['name'] for p in telemetry.update(1.)]
+    self.assertNotIn("controlsd", names)
+    self.assertFalse(os.path.exists(self.stats_path % 101))
+
+  def test_renamed_after_start(self):
+    # a forked python process has manager's cmdline until it sets its title
+    self.write_proc(105, MANAGER_PID, PROCS[MANAGER_PID][1])
+    telemetry = self.telemetry()
+    telemetry.update(0.)
+    self.assertEqual(telemetry.tracked[105].name, "manager.py")
+
+    self.write("105/cmdline", "selfdrive.thermald\0")
+    telemetry.update(1.)
+    self.assertEqual(telemetry.tracked[105].name, "thermald")
+
+  def test_cpu_and_loop_stats(self):
+    telemetry = self.telemetry()
+    self.write_loop_stats(101, 100, 0, 0., 0.)
+    telemetry.update(0.)
+
+    self.write_proc(101, MANAGER_PID, PROCS[101][1], utime=CLOCK_TICKS // 2, rss=3)
+    self.write_loop_stats(101, 200, 4, 0.02, 0.)
+    procs = {p['pid']: p for p in telemetry.update(2.)}
+
+    p = procs[101]
+    self.assertAlmostEqual(p['cpuPercent'], 25.)
+    self.assertEqual(p['memRss'], 3 * PAGE_SIZE)
+    self.assertEqual(p['voluntaryCtxtSwitches'], 10)
+    self.assertEqual(p['nonvoluntaryCtxtSwitches'], 2)
+    self.assertEqual(p['loopFrames'], 200)
+    self.assertEqual(p['loopLaggedFrames'], 4)
+    self.assertAlmostEqual(p['loopLag'], 0.02 / 100)
+    self.assertAlmostEqual(p['cpuPercentMax'], 25.)
+
+    # processes without a Ratekeeper have no loop stats
+    self.assertNotIn('loopFrames', procs[104])
+
+  def test_ratekeeper_stats(self):
+    with mock.patch.object(realtime, "RATEKEEPER_STATS_PATH", self.stats_path), \
+         mock.patch.object(RatekeeperStats, "_owner_pid", None):
+      # only processes started by manager publish stats
+      with mock.patch.dict(os.environ, {}, clear=True):
+        self.assertIsNone(RatekeeperStats().buf)
+      self.assertFalse(os.path.exists(self.stats_path % os.getpid()))
+
+      with mock.patch.dict(os.environ, {"MANAGER_PID": str(MANAGER_PID)}):
+        stats = RatekeeperStats()
+        stats.update(1, 0.01)
+        stats.update(2, -0.005)
+
+        # the second Ratekeeper in a process doesn't take over the file
+        self.assertIsNone(RatekeeperStats().buf)
+
+      proc = TrackedProcess(MANAGER_PID, 1, "manager", self.root, self.stats_path % os.getpid())
+      self.assertEqual(proc.read_loop_stats(), (2, 1, 0.005, 0.005))
+      proc.close()
+
+
+if __name__ == "__main__":
+  unittest.main()
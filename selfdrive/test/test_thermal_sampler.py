@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+import os
+import shutil
+import tempfile
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+from selfdrive.thermal_sampler import ThermalSampler, THERMAL_ZONE_PATH, THERMAL_ZONES, POWER_SUPPLY_FILES
+
+Stats = namedtuple("Stats", ['f_bavail', 'f_blocks', 'f_frsize'])
+
+MEMINFO = "MemTotal:        1000 kB\nMemFree:          100 kB\nMemAvailable:     250 kB\n"
+
+
+class FakeClock():
+  def __init__(self):
+    self.t = 0.
+
+  def __call__(self):
+    return self.t
+
+
+class TestThermalSampler(unittest.TestCase):
+  def setUp(self):
+    self.root = tempfile.mkdtemp()
+    for name, tz in THERMAL_ZONES.items():
+      self.write(THERMAL_ZONE_PATH % tz, "%d\n" % (tz * 10))
+    self.write(POWER_SUPPLY_FILES['batteryPercent'], "87\n")
+    self.write(POWER_SUPPLY_FILES['batteryStatus'], "Charging\n")
+    self.write(POWER_SUPPLY_FILES['batteryCurrent'], "-500000\n")
+    self.write(POWER_SUPPLY_FILES['batteryVoltage'], "4100000\n")
+    self.write(POWER_SUPPLY_FILES['usbOnline'], "1\n")
+    self.write("proc/meminfo", MEMINFO)
+    self.write("proc/stat", "cpu  100 0 100 800 0 0 0 0 0 0\n")
+
+    self.clock = FakeClock()
+    self.statvfs = mock.patch.object(os, 'statvfs', return_value=Stats(f_bavail=25, f_blocks=100, f_frsize=4096))
+    self.statvfs_mock = self.statvfs.start()
+
+  def tearDown(self):
+    self.statvfs.stop()
+    shutil.rmtree(self.root)
+
+  def write(self, path, dat):
+    path = os.path.join(self.root, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+      f.write(dat)
+
+  def test_values(self):
+    sampler = ThermalSampler(root=self.root, clock=self.clock)
+    values = sampler.update()
+
+    for name, tz in THERMAL_ZONES.items():
+      self.assertEqual(values[name], tz * 10)
+    self.assertEqual(values['batteryPercent'], 87)
+    self.assertEqual(values['batteryStatus'], "Charging")
+    self.assertEqual(values['batteryCurrent'], -500000)
+    self.assertEqual(values['batteryVoltage'], 4100000)
+    self.assertTrue(values['usbOnline'])
+    self.assertEqual(values['memUsedPercent'], 75)
+    self.assertAlmostEqual(values['freeSpace'], 0.25)
+
+    # cpu usage is the busy fraction since the previous sample
+    self.write("proc/stat", "cpu  150 0 150 900 0 0 0 0 0 0\n")
+    self.clock.t += 0.5
+    self.assertEqual(sampler.update()['cpuPerc'], 50)
+
+  def test_fresh_values_from_open_files(self):
+    sampler = ThermalSampler(root=self.root, clock=self.clock)
+    sampler.update()
+
+    self.write(THERMAL_ZONE_PATH % THERMAL_ZONES['cpu0'], "555\n")
+    self.clock.t += 0.5
+    self.assertEqual(sampler.update()['cpu0'], 555)
+
+  def test_missing_files(self):
+    shutil.rmtree(os.path.join(self.root, "sys/class"))
+    sampler = ThermalSampler(root=self.root, clock=self.clock)
+    values = sampler.update()
+    self.assertNotIn('batteryPercent', values)
+
+    os.unlink(os.path.join(self.root, THERMAL_ZONE_PATH % THERMAL_ZONES['bat']))
+    sampler = ThermalSampler(root=self.root, clock=self.clock)
+    self.assertEqual(sampler.update()['bat'], 0)
+
+  def test_syscall_counts(self):
+    sampler = ThermalSampler(root=self.root, clock=self.clock)
+    with mock.patch.object(os, 'open', wraps=os.open) as open_mock:
+      for _ in range(120):
+        sampler.update()
+        self.clock.t += 0.5
+
+    # files are only opened once, disk space is only sampled every 30s
+    self.assertEqual(open_mock.call_count, 0)
+    self.assertEqual(self.statvfs_mock.call_count, 2)
+
+  def test_intervals(self):
+    sampler = ThermalSampler(root=self.root, clock=self.clock, intervals={'temperatures': 1.})
+    sampler.update()
+
+    self.write(THERMAL_ZONE_PATH % THERMAL_ZONES['cpu0'], "555\n")
+    self.clock.t += 0.5
+    self.assertEqual(sampler.update()['cpu0'], 50)
+    self.clock.t += 0.5
+    self.assertEqual(sampler.update()['cpu0'], 555)
+
+
+if __name__ == "__main__":
+  unittest.main()
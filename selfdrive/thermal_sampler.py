@@ -0,0 +1,167 @@
+import os
+import time
+
+from selfdrive.loggerd.config import get_available_percent
+
+THERMAL_ZONE_PATH = "sys/devices/virtual/thermal/thermal_zone%d/temp"
+
+# thermal message field -> thermal zone
+THERMAL_ZONES = {
+  'cpu0': 5,
+  'cpu1': 7,
+  'cpu2': 10,
+  'cpu3': 12,
+  'mem': 2,
+  'gpu': 16,
+  'bat': 29,
+  'pa0': 25,
+}
+
+POWER_SUPPLY_FILES = {
+  'batteryPercent': "sys/class/power_supply/battery/capacity",
+  'batteryStatus': "sys/class/power_supply/battery/status",
+  'batteryCurrent': "sys/class/power_supply/battery/current_now",
+  'batteryVoltage': "sys/class/power_supply/battery/voltage_now",
+  'usbOnline': "sys/class/power_supply/usb/present",
+}
+
+# sample intervals in seconds, 0 samples every update
+DEFAULT_INTERVALS = {
+  'temperatures': 0.,
+  'power_supply': 0.,
+  'cpu': 0.,
+  'memory': 5.,
+  'disk': 30.,
+}
+
+
+class SysfsFile():
+  """Sysfs or procfs file that is kept open and reread with pread.
+
+  Reading from offset 0 makes the kernel regenerate the contents, so the
+  value is fresh on every read without an open/close per sample."""
+
+  def __init__(self, path, size=64):
+    self.path = path
+    self.size = size
+    try:
+      self.fd = os.open(path, os.O_RDONLY)
+    except OSError:
+      self.fd = None
+
+  def read(self):
+    if self.fd is None:
+      return None
+    try:
+      return os.pread(self.fd, self.size, 0).decode('utf8')
+    except OSError:
+      return None
+
+  def read_int(self):
+    dat = self.read()
+    try:
+      return int(dat)
+    except (TypeError, ValueError):
+      return None
+
+  def close(self):
+    if self.fd is not None:
+      os.close(self.fd)
+      self.fd = None
+
+
+class ThermalSampler():
+  """Samples the metrics published by thermald, each at its own rate.
+
+  Files are opened once against root, which can be pointed at a fake sysfs
+  tree for testing. Values keeps the latest sample of every metric."""
+
+  def __init__(self, root="/", intervals=None, clock=time.monotonic):
+    self.root = root
+    self.clock = clock
+    self.intervals = dict(DEFAULT_INTERVALS)
+    if intervals is not None:
+      self.intervals.update(intervals)
+    self.last_sample = {k: None for k in self.intervals}
+
+    self.thermal_zones = {k: SysfsFile(os.path.join(root, THERMAL_ZONE_PATH % tz)) for k, tz in THERMAL_ZONES.items()}
+    self.power_supply = {k: SysfsFile(os.path.join(root, path)) for k, path in POWER_SUPPLY_FILES.items()}
+    self.meminfo = SysfsFile(os.path.join(root, "proc/meminfo"), size=4096)
+    self.stat = SysfsFile(os.path.join(root, "proc/stat"), size=256)
+    self.last_cpu_times = None
+
+    self.values = {
+      'freeSpace': 1.0,
+      'memUsedPercent': 0,
+      'cpuPerc': 0,
+    }
+    self.values.update({k: 0 for k in THERMAL_ZONES})
+
+  def read_tz(self, name, clip=True):
+    ret = self.thermal_zones[name].read_int()
+    if ret is None:
+      return 0
+    return max(0, ret) if clip else ret
+
+  def sample_temperatures(self):
+    for k in self.thermal_zones:
+      self.values[k] = self.read_tz(k)
+
+  def sample_power_supply(self):
+    for k, f in self.power_supply.items():
+      if k == 'batteryStatus':
+        dat = f.read()
+        if dat is not None:
+          self.values[k] = dat.strip()
+      else:
+        dat = f.read_int()
+        if dat is not None:
+          self.values[k] = bool(dat) if k == 'usbOnline' else dat
+
+  def sample_cpu(self):
+    dat = self.stat.read()
+    if dat is None:
+      return
+
+    # cpu user nice system idle iowait irq softirq steal guest guest_nice
+    times = [int(x) for x in dat.split('\n', 1)[0].split()[1:]]
+    total = sum(times[:8])
+    idle = times[3] + times[4]
+    if self.last_cpu_times is not None:
+      dtotal = total - self.last_cpu_times[0]
+      didle = idle - self.last_cpu_times[1]
+      if dtotal > 0:
+        self.values['cpuPerc'] = int(round(100. * (dtotal - didle) / dtotal))
+    self.last_cpu_times = (total, idle)
+
+  def sample_memory(self):
+    dat = self.meminfo.read()
+    if dat is None:
+      return
+
+    meminfo = {}
+    for line in dat.split('\n'):
+      fields = line.split()
+      if len(fields) >= 2:
+        meminfo[fields[0].rstrip(':')] = int(fields[1])
+
+    total = meminfo.get('MemTotal', 0)
+    available = meminfo.get('MemAvailable', meminfo.get('MemFree', 0) + meminfo.get('Cached', 0))
+    if total > 0:
+      self.values['memUsedPercent'] = int(round(100. * (total - available) / total))
+
+  def sample_disk(self):
+    self.values['freeSpace'] = get_available_percent(default=100.0) / 100.0
+
+  def update(self):
+    t = self.clock()
+    for k, interval in self.intervals.items():
+      last = self.last_sample[k]
+      if last is None or t - last >= interval:
+        getattr(self, "sample_" + k)()
+        self.last_sample[k] = t
+    return self.values
+
+  def close(self):
+    for f in list(self.thermal_zones.values()) + list(self.power_supply.values()) + [self.meminfo, self.stat]:
+      f.close()
@@ -3,7 +3,6 @@ import os
 import json
 import copy
 import datetime
-import psutil
 from smbus2 import SMBus
 from cereal import log
 from common.android import ANDROID
@@ -15,7 +14,7 @@ from common.filter_simple import FirstOrderFilter
 from selfdrive.version import terms_version, training_version
 from selfdrive.swaglog import cloudlog
 import cereal.messaging as messaging
-from selfdrive.loggerd.config import get_available_percent
+from selfdrive.thermal_sampler import ThermalSampler
 from selfdrive.pandad import get_expected_signature
 
 FW_SIGNATURE = get_expected_signature()
@@ -29,28 +28,11 @@ DAYS_NO_CONNECTIVITY_PROMPT = 4  # send an offroad prompt after 4 days with no i
 with open(BASEDIR + "/selfdrive/controls/lib/alerts_offroad.json") as json_file:
   OFFROAD_ALERTS = json.load(json_file)
 
-def read_tz(x, clip=True):
-  try:
-    with open("/sys/devices/virtual/thermal/thermal_zone%d/temp" % x) as f:
-      ret = int(f.read())
-      if clip:
-        ret = max(0, ret)
-  except FileNotFoundError:
-    return 0
-
-  return ret
-
-def read_thermal():
+def read_thermal(sampler):
   dat = messaging.new_message()
   dat.init('thermal')
-  dat.thermal.cpu0 = read_tz(5)
-  dat.thermal.cpu1 = read_tz(7)
-  dat.thermal.cpu2 = read_tz(10)
-  dat.thermal.cpu3 = read_tz(12)
-  dat.thermal.mem = read_tz(2)
-  dat.thermal.gpu = read_tz(16)
-  dat.thermal.bat = read_tz(29)
-  dat.thermal.pa0 = read_tz(25)
+  for k, v in sampler.update().items():
+    setattr(dat.thermal, k, v)
   return dat
 
 LEON = False
@@ -159,7 +141,8 @@ def thermald_thread():
   time_valid_prev = True
   should_start_prev = False
 
-  is_uno = (read_tz(29, clip=False) < -1000)
+  sampler = ThermalSampler()
+  is_uno = (sampler.read_tz('bat', clip=False) < -1000)
   if is_uno or not ANDROID:
     handle_fan = handle_fan_uno
   else:
@@ -172,7 +155,7 @@ def thermald_thread():
     health = messaging.recv_sock(health_sock, wait=True)
     location = messaging.recv_sock(location_sock)
     location = location.gpsLocation if location else None
-    msg = read_thermal()
+    msg = read_thermal(sampler)
 
     # clear car params when panda gets disconnected
     if health is None and health_prev is not None:
@@ -182,24 +165,6 @@ def thermald_thread():
     if health is not None:
       usb_power = health.health.usbPowerMode != log.HealthData.UsbPowerMode.client
 
-    msg.thermal.freeSpace = get_available_percent(default=100.0) / 100.0
-    msg.thermal.memUsedPercent = int(round(psutil.virtual_memory().percent))
-    msg.thermal.cpuPerc = int(round(psutil.cpu_percent()))
-
-    try:
-      with open("/sys/class/power_supply/battery/capacity") as f:
-        msg.thermal.batteryPercent = int(f.read())
-      with open("/sys/class/power_supply/battery/status") as f:
-        msg.thermal.batteryStatus = f.read().strip()
-      with open("/sys/class/power_supply/battery/current_now") as f:
-        msg.thermal.batteryCurrent = int(f.read())
-      with open("/sys/class/power_supply/battery/voltage_now") as f:
-        msg.thermal.batteryVoltage = int(f.read())
-      with open("/sys/class/power_supply/usb/present") as f:
-        msg.thermal.usbOnline = bool(int(f.read()))
-    except FileNotFoundError:
-      pass
-
     # Fake battery levels on uno for frame
     if is_uno:
       msg.thermal.batteryPercent = 100